@@ -26,6 +26,14 @@ class ExternalExecutableException(Exception):
     pass
 
 
+class ZipOutputException(Exception):
+    pass
+
+
+class CancelledException(Exception):
+    pass
+
+
 RandomizerExceptions = (
     GeneratorException,
     HintException,
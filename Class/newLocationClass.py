@@ -16,6 +16,10 @@ class KH2Location:
     def name(self) -> str:
         return self.Description
 
+    def equality_key(self) -> tuple:
+        """ Returns a hashable key that matches this location's equality (which, unlike its hash, ignores the name). """
+        return self.LocationId, self.LocationCategory, tuple(self.LocationTypes)
+
     def __eq__(self, obj):
         return self.LocationId == obj.LocationId and self.LocationCategory == obj.LocationCategory and self.LocationTypes == obj.LocationTypes
 
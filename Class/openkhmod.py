@@ -1,13 +1,15 @@
+import os
 import re
 from copy import deepcopy
 from enum import StrEnum
 from pathlib import PurePath, Path
-from typing import Any, Optional, Iterator, Union
-from zipfile import ZipFile
+from typing import Any, Optional, Iterator, Union, Mapping
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED, ZIP64_LIMIT
 
 import yaml
 
-from Module.resources import resource_path
+from Module.staticdata import derived_static_data, static_data
+from Module.zipcache import CompressedFile, CompressedFileCache
 
 ModPath = Union[str, PurePath]
 StrDict = dict[str, Any]
@@ -25,12 +27,62 @@ _TITLE = "title"
 _TYPE = "type"
 
 
+class _TaglessDumper(yaml.Dumper):
+    """Pure-Python dumper that never writes YAML tags, so that (for example) tuples come out as plain sequences."""
+
+    def process_tag(self):
+        pass
+
+
+# libyaml's emitter, if PyYAML was built with it
+_LibyamlDumper = getattr(yaml, "CDumper", None)
+
+# Printable ASCII other than double quotes and backslashes, which never needs escaping. libyaml wraps long escaped
+# (double-quoted) strings differently than the pure-Python emitter, so anything else goes through the Python emitter.
+_LIBYAML_SAFE_STRING = re.compile(r"[ !#-\[\]-~]*")
+
+
+def _libyaml_output_matches(data) -> bool:
+    """Returns True if libyaml would emit the data exactly the same as _TaglessDumper."""
+    pending = [data]
+    while pending:
+        value = pending.pop()
+        value_type = type(value)
+        if value_type is dict:
+            # The emitters also disagree on which keys can be written as simple keys (empty or very long ones)
+            if any(type(key) is str and not 0 < len(key) < 100 for key in value):
+                return False
+            pending.extend(value.keys())
+            pending.extend(value.values())
+        elif value_type is list:
+            pending.extend(value)
+        elif value_type is str:
+            if not _LIBYAML_SAFE_STRING.fullmatch(value):
+                return False
+        elif value is not None and value_type not in (int, bool, float):
+            # Anything else could need a tag, which _TaglessDumper leaves out
+            return False
+    return True
+
+
+def dump_mod_yaml(data, sort_keys: bool) -> str:
+    """
+    Returns the data as mod YAML (CRLF line breaks, no tags), using libyaml when that gives the same output as the
+    pure-Python emitter.
+    """
+    if _LibyamlDumper is not None and _libyaml_output_matches(data):
+        dumper = _LibyamlDumper
+    else:
+        dumper = _TaglessDumper
+    return yaml.dump(data, Dumper=dumper, line_break="\r\n", sort_keys=sort_keys)
+
+
 def write_yaml_to_zip_file(zip_file: ZipFile, name: str, data, sort_keys: bool):
-    zip_file.writestr(name, yaml.dump(data, line_break="\r\n", sort_keys=sort_keys))
+    zip_file.writestr(name, dump_mod_yaml(data, sort_keys=sort_keys))
 
 
 def write_unicode_yaml_to_zip_file(zip_file: ZipFile, name: str, data, sort_keys: bool):
-    yaml_string = yaml.dump(data, line_break="\r\n", sort_keys=sort_keys)
+    yaml_string = dump_mod_yaml(data, sort_keys=sort_keys)
     yaml_string = re.sub(
         r"en: ([a-zA-Z0-9\\]+)", r'en: "\1"', yaml_string
     )  # surround text of the journal with double quotes to allow for automatic unicode conversion
@@ -38,6 +90,117 @@ def write_unicode_yaml_to_zip_file(zip_file: ZipFile, name: str, data, sort_keys
     zip_file.writestr(name, yaml_string)
 
 
+# (compression method, compression level) to use for mod files with these extensions. These formats are already
+# compressed, so deflating them again costs time for next to no reduction in size.
+DEFAULT_MEMBER_COMPRESSION: dict[str, tuple[int, Optional[int]]] = {
+    ".dds": (ZIP_STORED, None),
+    ".jpg": (ZIP_STORED, None),
+    ".ogg": (ZIP_STORED, None),
+    ".png": (ZIP_STORED, None),
+    ".scd": (ZIP_STORED, None),
+}
+
+
+# Largest file that's kept in memory so it can still be read back from a zip written to a stream that can't be read
+READ_BACK_LIMIT = 64 * 1024
+
+
+class ModZipFile(ZipFile):
+    """
+    ZipFile for writing mods that chooses the compression of each file by its extension, falling back to the zip's own
+    compression. An explicit compress_type or compresslevel passed to write/writestr always wins.
+
+    The zip can be written to anything writable, including streams that can't seek or be read (a pipe, for example).
+    Files are written through as they're added. For such streams, small files added with writestr are also kept in
+    memory, so that they can still be read back with read.
+
+    Given a file cache, files added with write are compressed once per process and their compressed data reused after
+    that (see Module.zipcache).
+    """
+
+    def __init__(
+        self,
+        file,
+        mode: str = "w",
+        compression: int = ZIP_DEFLATED,
+        compresslevel: Optional[int] = None,
+        member_compression: Mapping[str, tuple[int, Optional[int]]] = DEFAULT_MEMBER_COMPRESSION,
+        file_cache: Optional[CompressedFileCache] = None,
+    ):
+        super().__init__(file, mode, compression, compresslevel=compresslevel)
+        self.member_compression = {extension.lower(): value for extension, value in member_compression.items()}
+        self.file_cache = file_cache
+        self._read_back: Optional[dict[str, bytes]] = None if self._readable_output() else {}
+
+    def _readable_output(self) -> bool:
+        try:
+            return self.fp.seekable() and self.fp.readable()
+        except (AttributeError, OSError, ValueError):
+            return False
+
+    def member_compression_for(self, name: str) -> tuple[int, Optional[int]]:
+        """Returns the (compression method, compression level) that a file with the given name is written with."""
+        return self.member_compression.get(PurePath(name).suffix.lower(), (self.compression, self.compresslevel))
+
+    def write(self, filename, arcname=None, compress_type=None, compresslevel=None):
+        if compress_type is None and compresslevel is None:
+            compress_type, compresslevel = self.member_compression_for(arcname if arcname is not None else filename)
+        if self.file_cache is not None and os.path.isfile(filename):
+            compress_type = self.compression if compress_type is None else compress_type
+            compresslevel = self.compresslevel if compresslevel is None else compresslevel
+            compressed_file = self.file_cache.compressed_file(filename, compress_type, compresslevel)
+            if compressed_file is not None and compressed_file.file_size * 1.05 <= ZIP64_LIMIT:
+                zinfo = ZipInfo.from_file(filename, arcname, strict_timestamps=self._strict_timestamps)
+                zinfo.compress_type = compress_type
+                zinfo._compresslevel = compresslevel
+                self._write_compressed(zinfo, compressed_file)
+                return
+        super().write(filename, arcname, compress_type=compress_type, compresslevel=compresslevel)
+
+    def _write_compressed(self, zinfo: ZipInfo, compressed_file: CompressedFile):
+        """
+        Writes already-compressed file data to the zip. This mirrors what ZipFile does when writing a file (see
+        ZipFile._open_to_write and _ZipWriteFile.close), except that the sizes and CRC are known up front.
+        """
+        if not self.fp:
+            raise ValueError("Attempt to write to ZIP archive that was already closed")
+        with self._lock:
+            if self._writing:
+                raise ValueError("Can't write to the ZIP file while there is another write handle open on it.")
+            zinfo.CRC = compressed_file.crc
+            zinfo.file_size = compressed_file.file_size
+            zinfo.compress_size = len(compressed_file.compressed_data)
+            zinfo.flag_bits = 0x00
+            if not zinfo.external_attr:
+                zinfo.external_attr = 0o600 << 16
+
+            if self._seekable:
+                self.fp.seek(self.start_dir)
+            zinfo.header_offset = self.fp.tell()
+            self._writecheck(zinfo)
+            self._didModify = True
+            self.fp.write(zinfo.FileHeader(False))
+            self.fp.write(compressed_file.compressed_data)
+            self.start_dir = self.fp.tell()
+            self.filelist.append(zinfo)
+            self.NameToInfo[zinfo.filename] = zinfo
+
+    def writestr(self, zinfo_or_arcname, data, compress_type=None, compresslevel=None):
+        if compress_type is None and compresslevel is None and not isinstance(zinfo_or_arcname, ZipInfo):
+            compress_type, compresslevel = self.member_compression_for(zinfo_or_arcname)
+        super().writestr(zinfo_or_arcname, data, compress_type=compress_type, compresslevel=compresslevel)
+        if self._read_back is not None and len(data) <= READ_BACK_LIMIT:
+            written_name = self.filelist[-1].filename
+            self._read_back[written_name] = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+
+    def read(self, name, pwd=None) -> bytes:
+        if self._read_back is not None:
+            member_name = name.filename if isinstance(name, ZipInfo) else name
+            if member_name in self._read_back:
+                return self._read_back[member_name]
+        return super().read(name, pwd)
+
+
 def _as_path(mod_path: ModPath) -> PurePath:
     if isinstance(mod_path, PurePath):
         return mod_path
@@ -734,9 +897,10 @@ class LevelUps:
     def __init__(self, source_name: str):
         self.data: dict[str, dict[int, dict[str, Any]]] = {"Sora": {}, "Donald": {}, "Goofy": {}, "PingMulan": {}, "Beast": {}, "Sparrow": {}, "Aladdin": {}, "Jack": {}, "Auron": {}, "Simba": {}, "Tron": {}, "Riku": {},}
         self.source_name = source_name
-        with open(resource_path("static/LvupList.yml"), "r") as file:
-            list_data = yaml.safe_load(file)
-        self.yaml_list_data = list_data
+
+    @property
+    def yaml_list_data(self):
+        return static_data("static/LvupList.yml")
 
     def add_sora_level(
         self,
@@ -791,9 +955,7 @@ class LevelUps:
         }
 
     def get_companion_levels(self, companion_name: str):
-        for entry in self.yaml_list_data:
-            if entry == companion_name:
-                return self.yaml_list_data[entry]
+        return self.yaml_list_data.get(companion_name)
 
     def write_to_zip_file(self, zip_file: ZipFile):
         write_yaml_to_zip_file(zip_file, self.source_name, self.data, sort_keys=True)
@@ -1188,13 +1350,33 @@ class ATKPObject:
             raise ValueError(f"HPDrain {self.HPDrain} outside bounds")
 
 
+ATKP_LIST_FILE = "static/AtkpList.yml"
+
+
+def _index_attacks_by_ids(list_data) -> dict[tuple[int, int], Any]:
+    # Keeps the first entry for each key, matching what a scan of the list would find
+    result = {}
+    for attack_entry in list_data:
+        result.setdefault((attack_entry["SubId"], attack_entry["Id"]), attack_entry)
+    return result
+
+
+def _index_attacks_by_ids_and_switch(list_data) -> dict[tuple[int, int, Any], Any]:
+    result = {}
+    for attack_entry in list_data:
+        result.setdefault((attack_entry["SubId"], attack_entry["Id"], attack_entry["Switch"]), attack_entry)
+    return result
+
+
 class AttackEntriesOrganizer:
     def __init__(self, source_name: str):
         self.data: list[dict] = []
         self.source_name = source_name
-        with open(resource_path("static/AtkpList.yml"), "r") as file:
-            list_data = yaml.safe_load(file)
-        self.yaml_list_data = list_data
+
+    @property
+    def yaml_list_data(self):
+        # Only loaded if attack data is actually used, since it's by far the largest data file
+        return static_data(ATKP_LIST_FILE)
 
     def convert_atkp_object_to_dict_and_add_to_data(self, atkp_object: ATKPObject):
         self.data.append(
@@ -1280,19 +1462,15 @@ class AttackEntriesOrganizer:
     
     # Obsolete, use the switch method instead to avoid any bugs
     def get_attack_using_ids(self, SubId, Id):
-        for attack_entry in self.yaml_list_data:
-            if attack_entry["SubId"] == SubId and attack_entry["Id"] == Id:
-                return self.attack_entry_constructor(attack_entry)
+        attack_entry = derived_static_data(ATKP_LIST_FILE, _index_attacks_by_ids).get((SubId, Id))
+        if attack_entry is not None:
+            return self.attack_entry_constructor(attack_entry)
 
     # Used specifically for entries that have the same Id and SubId
     def get_attack_using_ids_plus_switch(self, SubId, Id, Switch):
-        for attack_entry in self.yaml_list_data:
-            if (
-                attack_entry["SubId"] == SubId
-                and attack_entry["Id"] == Id
-                and attack_entry["Switch"] == Switch
-            ):
-                return self.attack_entry_constructor(attack_entry)
+        attack_entry = derived_static_data(ATKP_LIST_FILE, _index_attacks_by_ids_and_switch).get((SubId, Id, Switch))
+        if attack_entry is not None:
+            return self.attack_entry_constructor(attack_entry)
 
     def get_all_attack_ids(self):
         return self.yaml_list_data
@@ -1,13 +1,20 @@
 import random
 import string
-from bisect import bisect_left
-from itertools import accumulate
-from typing import Optional
+from typing import Optional, Sequence
 
 # An instance of a Random that deliberately _isn't_ tied to a specific seed.
 unseeded_rng = random.Random()
 
 
+def rng_or_shared(rng: Optional[random.Random]):
+    """
+    Returns the given generator instance if there is one; otherwise, returns the shared generator instance.
+
+    The result supports the same drawing methods either way, so callers can use it in place of the random module.
+    """
+    return random if rng is None else rng
+
+
 def random_seed_name(rng: Optional[random.Random] = None) -> str:
     """
     Returns a randomly generated seed name.
@@ -22,15 +29,91 @@ def random_seed_name(rng: Optional[random.Random] = None) -> str:
     return "".join(chosen_characters)
 
 
-def weighted_sample_without_replacement(population, weights, k):
-    wts = list(weights)
+class WeightedSampler:
+    """
+    Draws indices with probability proportional to a mutable list of non-negative weights.
+
+    Backed by a Fenwick (binary indexed) tree, so drawing an index and changing or removing a weight are each O(log n)
+    rather than the O(n) it takes to rebuild cumulative weights for every draw.
+    """
+
+    def __init__(self, weights: Sequence[float]):
+        self._weights = list(weights)
+        size = len(self._weights)
+        self._tree = [0] + self._weights
+        for index in range(1, size + 1):
+            parent = index + (index & -index)
+            if parent <= size:
+                self._tree[parent] += self._tree[index]
+        self._total = sum(self._weights)
+        self._top_step = 1 << (size.bit_length() - 1) if size > 0 else 0
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    def total(self) -> float:
+        """Returns the sum of all current weights."""
+        return self._total
+
+    def weight(self, index: int) -> float:
+        """Returns the current weight of the given index."""
+        return self._weights[index]
+
+    def update(self, index: int, weight: float):
+        """Changes the weight of the given index."""
+        delta = weight - self._weights[index]
+        if delta == 0:
+            return
+        self._weights[index] = weight
+        self._total += delta
+        size = len(self._weights)
+        position = index + 1
+        while position <= size:
+            self._tree[position] += delta
+            position += position & -position
+
+    def remove(self, index: int):
+        """Removes the given index from consideration for any further draws."""
+        self.update(index, 0)
+
+    def find(self, target: float) -> int:
+        """Returns the first index whose cumulative weight is greater than the target."""
+        position = 0
+        cumulative = 0
+        step = self._top_step
+        size = len(self._weights)
+        while step > 0:
+            candidate = position + step
+            if candidate <= size and cumulative + self._tree[candidate] <= target:
+                position = candidate
+                cumulative += self._tree[candidate]
+            step >>= 1
+        # Guards against floating point rounding pushing the target past the end, as random.choices does
+        return min(position, size - 1)
+
+    def draw(self, rng: Optional[random.Random] = None) -> int:
+        """
+        Returns a randomly chosen index, respecting the current weights. Uses a single draw from the generator, the
+        same as random.choices with k=1.
+
+        If a specific generator instance is passed, uses that; otherwise, uses the shared generator instance.
+        """
+        rng = rng_or_shared(rng)
+        return self.find(rng.random() * self._total)
+
+
+def weighted_sample_without_replacement(population, weights, k, rng: Optional[random.Random] = None):
+    """
+    Returns k elements chosen from the population without replacement, respecting the given weights.
+
+    If a specific generator instance is passed, uses that; otherwise, uses the shared generator instance.
+    """
+    rng = rng_or_shared(rng)
+    sampler = WeightedSampler(weights)
     sampl = []
-    rnums = [random.random() for _ in range(k)]
+    rnums = [rng.random() for _ in range(k)]
     for r in rnums:
-        acm_wts = list(accumulate(wts))
-        total = acm_wts[-1]
-        i = bisect_left(acm_wts, total * r)
-        p = population[i]
-        wts[i] = 0
-        sampl.append(p)
+        i = sampler.find(sampler.total() * r)
+        sampl.append(population[i])
+        sampler.remove(i)
     return sampl
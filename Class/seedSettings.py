@@ -3101,9 +3101,9 @@ _all_settings = [
         shared=False,
         default=True,
         tooltip="""
-        If enabled, previously generated textures will be kept around to speed up future recolors. This will potentially
-        use large amounts of disk space, but improves performance. Disable this option to minimize disk space usage, but
-        recoloring will take longer.
+        If enabled, previously generated textures will be kept around to speed up future recolors. This can use up to
+        2 GB of disk space (the least recently used textures are removed beyond that), but improves performance. Disable
+        this option to minimize disk space usage, but recoloring will take longer.
         """,
     ),
     TextureRecolorsSetting(
@@ -3539,6 +3539,13 @@ class SeedSettings:
         ]
         self._observers: dict[str, list[Callable[[], Any]]] = {}
 
+    def __getstate__(self):
+        # Observers belong to whatever registered them (usually UI widgets), so they don't come along when pickled,
+        # such as when sending settings to another process
+        state = self.__dict__.copy()
+        state["_observers"] = {}
+        return state
+
     def get(self, name: str):
         return self._values[name]
 
@@ -1,3 +1,5 @@
+import threading
+from collections import OrderedDict
 from typing import Iterator, List, Optional
 
 from altgraph.Graph import Graph
@@ -8,42 +10,93 @@ from List.location import landofdragons, spaceparanoids, weaponslot, donaldbonus
     summonlevel, agrabah, disneycastle, hundredacrewood, olympuscoliseum, beastscastle, halloweentown, portroyal, \
     hollowbastion, pridelands, simulatedtwilighttown, twilighttown, worldthatneverwas, atlantica, synthesis, \
     puzzlereward, soralevel
-from List.location.graph import LocationGraphBuilder, START_NODE, RequirementEdge, RequirementFunction
+from List.location.graph import LocationGraphBuilder, START_NODE, RequirementEdge, RequirementFunction, ItemInventory, \
+    LocationNode
 from Module.RandomizerSettings import RandomizerSettings
 
 
-# updated function to allow for multiple incoming connections to enforce multiple constraints
-def get_all_parent_edge_requirements(
-        node_id: str,
-        graph: Graph
-) -> RequirementFunction:
-    # base_requirement = lambda inv : True
-    non_strict_requirements = []
-    strict_requirements = []
-
-    for edge in graph.inc_edges(node_id):
-        # we want to collate the parent requirements in the proper arrangement. 
-        #   If we have non-strict edges, only one of the parent edges is needed to enter this node.
-        source, _ = graph.edge_by_id(edge)
-        parent_requirements = get_all_parent_edge_requirements(source, graph)
-        # if debug_mode:
-        #     parent_requirements([])
-        data: RequirementEdge = graph.edge_data(edge)
-        # condition to get to here through this parent
-        if data.requirement is not None:
-            requirement = lambda inv, this_req=data.requirement, par_req=parent_requirements : this_req(inv) and par_req(inv)
-        else:
-            requirement = lambda inv, par_req=parent_requirements: par_req(inv)
-        if data.strict:
-            strict_requirements.append(requirement)
-        else:
-            non_strict_requirements.append(requirement)
-    if len(non_strict_requirements) > 0:
-        #convert the non-strict requirements into a strict with with an or condition
-        new_strict_func = lambda inv, non_s_req=non_strict_requirements: any([r(inv) for r in non_s_req])
-        strict_requirements.append(new_strict_func)
-    this_requirement = lambda inv, s_req=strict_requirements : all([r(inv) for r in s_req])
-    return this_requirement
+ParentEdge = tuple[str, Optional[RequirementFunction]]
+
+
+class NodeRequirements:
+    """
+    Requirements to reach each node of a location graph, compiled from the graph's incoming edges.
+
+    A node is reachable if every strict parent edge is satisfied and, if there are any non-strict parent edges, at
+    least one of those is satisfied. An edge is satisfied if its own requirement is met and its source node is
+    reachable. Results are cached per node for as long as the inventory being checked is unchanged, so nodes shared
+    by many descendants are only evaluated once per inventory rather than once per descendant. The item IDs each
+    node's result depended on are cached alongside it, and reported to the inventory when a cached result is reused.
+    """
+
+    def __init__(self, graph: Graph, parent_edges: Optional[dict[str, tuple[list[ParentEdge], list[ParentEdge]]]] = None):
+        if parent_edges is None:
+            parent_edges = NodeRequirements.compile_parent_edges(graph)
+        self.parent_edges = parent_edges
+
+        self._results: dict[str, bool] = {}
+        self._accessed_ids: dict[str, set[int]] = {}
+        self._inventory: Optional[ItemInventory] = None
+        self._inventory_version = -1
+
+    @staticmethod
+    def compile_parent_edges(graph: Graph) -> dict[str, tuple[list[ParentEdge], list[ParentEdge]]]:
+        """ Returns the strict and non-strict incoming edges of every node, as (source node, requirement) pairs. """
+        parent_edges: dict[str, tuple[list[ParentEdge], list[ParentEdge]]] = {}
+        for node_id in graph.node_list():
+            strict_edges = []
+            non_strict_edges = []
+            for edge in graph.inc_edges(node_id):
+                source, _ = graph.edge_by_id(edge)
+                data: RequirementEdge = graph.edge_data(edge)
+                if data.strict:
+                    strict_edges.append((source, data.requirement))
+                else:
+                    non_strict_edges.append((source, data.requirement))
+            parent_edges[node_id] = (strict_edges, non_strict_edges)
+        return parent_edges
+
+    def requirement_for_node(self, node_id: str) -> RequirementFunction:
+        """ Returns a requirement function that checks whether the given node is reachable with an inventory. """
+        return lambda inventory, this_node=node_id: self.is_node_reachable(this_node, ItemInventory.of(inventory))
+
+    def is_node_reachable(self, node_id: str, inventory: ItemInventory) -> bool:
+        if inventory is not self._inventory or inventory.version != self._inventory_version:
+            self._results.clear()
+            self._accessed_ids.clear()
+            self._inventory = inventory
+            self._inventory_version = inventory.version
+        return self._evaluate_node(node_id, inventory)
+
+    def _evaluate_node(self, node_id: str, inventory: ItemInventory) -> bool:
+        result = self._results.get(node_id)
+        if result is None:
+            outer_accessed_ids = inventory.accessed_ids
+            node_accessed_ids: set[int] = set()
+            inventory.accessed_ids = node_accessed_ids
+            try:
+                strict_edges, non_strict_edges = self.parent_edges[node_id]
+                result = all(self._evaluate_edge(source, requirement, inventory) for source, requirement in strict_edges)
+                if result and len(non_strict_edges) > 0:
+                    # only one of the non-strict edges is needed to enter this node
+                    result = any(self._evaluate_edge(source, requirement, inventory) for source, requirement in non_strict_edges)
+            finally:
+                inventory.accessed_ids = outer_accessed_ids
+            self._results[node_id] = result
+            self._accessed_ids[node_id] = node_accessed_ids
+        if inventory.accessed_ids is not None:
+            inventory.accessed_ids.update(self._accessed_ids[node_id])
+        return result
+
+    def _evaluate_edge(self, source: str, requirement: Optional[RequirementFunction], inventory: ItemInventory) -> bool:
+        if requirement is not None and not requirement(inventory):
+            return False
+        return self._evaluate_node(source, inventory)
+
+
+_LOCATIONS_CACHE_SIZE = 8
+_locations_cache: OrderedDict[tuple, "Locations"] = OrderedDict()
+_locations_cache_lock = threading.Lock()
 
 
 class Locations:
@@ -55,8 +108,85 @@ class Locations:
         self.first_boss_nodes: list[str] = []
         self.last_story_boss_nodes: list[str] = []
         self.superboss_nodes: list[str] = []
+        self._parent_edges: Optional[dict[str, tuple[list[ParentEdge], list[ParentEdge]]]] = None
         self.make_location_graph(settings)
 
+    @staticmethod
+    def cache_key(settings: RandomizerSettings, secondary_graph: bool) -> tuple:
+        """ Returns every input that building the location graph depends on. The seed name is deliberately absent. """
+        return (
+            secondary_graph,
+            settings.keyblades_unlock_chests,
+            tuple(settings.enabled_keyblade_unlock_worlds),
+            settings.extended_placement_logic,
+            settings.disable_antiform,
+            settings.disable_final_form,
+            settings.objective_rando,
+            settings.num_objectives_needed,
+            settings.emblems,
+            settings.num_emblems_needed,
+            settings.max_level_checks,
+            settings.split_levels,
+            tuple(settings.excluded_levels()),
+        )
+
+    @staticmethod
+    def cached(settings: RandomizerSettings, secondary_graph: bool = False) -> "Locations":
+        """
+        Returns a copy of the location graph for the given settings. Built graphs are kept in a small LRU cache, so
+        retries and other seeds with the same settings only pay for the copy rather than rebuilding every world.
+        """
+        key = Locations.cache_key(settings, secondary_graph)
+        with _locations_cache_lock:
+            template = _locations_cache.get(key)
+            if template is None:
+                template = Locations(settings, secondary_graph)
+                template.node_requirements()
+                _locations_cache[key] = template
+                if len(_locations_cache) > _LOCATIONS_CACHE_SIZE:
+                    _locations_cache.popitem(last=False)
+            else:
+                _locations_cache.move_to_end(key)
+        return template.copy()
+
+    def copy(self) -> "Locations":
+        """
+        Returns a copy of these locations that's safe to modify. Locations are copied (item placement modifies their
+        invalid checks), but the edges and their requirement functions are shared since they're never modified.
+        """
+        result = Locations.__new__(Locations)
+        result.location_graph = Graph()
+        result.reverse_rando = self.reverse_rando
+        result.locations_by_name = {}
+        for node_id in self.location_graph.node_list():
+            node_locations = []
+            for location in self.locations_for_node(node_id):
+                location_copy = KH2Location(
+                    location.LocationId,
+                    location.Description,
+                    location.LocationCategory,
+                    list(location.LocationTypes),
+                    list(location.InvalidChecks),
+                    list(location.VanillaItems),
+                )
+                node_locations.append(location_copy)
+                result.locations_by_name[location_copy.name()] = location_copy
+            result.location_graph.add_node(node_id, LocationNode(node_locations))
+        for edge in self.location_graph.edge_list():
+            head, tail = self.location_graph.edge_by_id(edge)
+            result.location_graph.add_edge(head, tail, self.location_graph.edge_data(edge), create_nodes=False)
+        result.first_boss_nodes = list(self.first_boss_nodes)
+        result.last_story_boss_nodes = list(self.last_story_boss_nodes)
+        result.superboss_nodes = list(self.superboss_nodes)
+        result._parent_edges = self._parent_edges
+        return result
+
+    def node_requirements(self) -> NodeRequirements:
+        """ Returns the requirements to reach each node. The compiled edges are shared with copies of this graph. """
+        if self._parent_edges is None:
+            self._parent_edges = NodeRequirements.compile_parent_edges(self.location_graph)
+        return NodeRequirements(self.location_graph, self._parent_edges)
+
     def _all_locations_iter(self) -> Iterator[KH2Location]:
         graph = self.location_graph
         for node_id in graph.nodes.keys():
@@ -1,4 +1,7 @@
 import random
+from typing import Optional
+
+from Class.randomUtils import rng_or_shared
 
 hashTextEntries = [
     "item-consumable",
@@ -41,5 +44,10 @@ hashTextEntries = [
 ]
 
 
-def generate_hash_icons() -> list[str]:
-    return random.choices(hashTextEntries, k=7)
+def generate_hash_icons(rng: Optional[random.Random] = None) -> list[str]:
+    """
+    Returns the icons making up a seed hash.
+
+    If a specific generator instance is passed, uses that; otherwise, uses the shared generator instance.
+    """
+    return rng_or_shared(rng).choices(hashTextEntries, k=7)
@@ -1,5 +1,6 @@
+from collections import Counter
 from enum import Enum
-from typing import Optional, Union, Callable
+from typing import Optional, Union, Callable, Iterable, Iterator
 
 from altgraph.Graph import Graph
 
@@ -11,6 +12,59 @@ from List.inventory.item import InventoryItem
 RequirementFunction = Callable[[list[int]], bool]
 
 
+class ItemInventory:
+    """
+    Item IDs collected so far, stored as counts per item ID. Supports the same `in` and `count()` checks as a list of
+    item IDs (so requirement functions accept either), but without scanning the whole inventory for every check.
+    The version is bumped on every change so that cached requirement results can tell when they've gone stale.
+
+    While accessed_ids is set, every item ID that gets checked is recorded into it, so callers can tell which items
+    a requirement result depends on. Checks that look at the whole inventory record ANY_ITEM instead.
+    """
+
+    ANY_ITEM = -1
+
+    def __init__(self, item_ids: Iterable[int] = ()):
+        self.counts: Counter[int] = Counter(item_ids)
+        self.version = 0
+        self.accessed_ids: Optional[set[int]] = None
+
+    @staticmethod
+    def of(inventory: Union[list[int], "ItemInventory"]) -> "ItemInventory":
+        """ Returns the given inventory if it's already an ItemInventory, otherwise a new one with the same items. """
+        if isinstance(inventory, ItemInventory):
+            return inventory
+        return ItemInventory(inventory)
+
+    def __contains__(self, item_id: int) -> bool:
+        if self.accessed_ids is not None:
+            self.accessed_ids.add(item_id)
+        return self.counts.get(item_id, 0) > 0
+
+    def __iter__(self) -> Iterator[int]:
+        if self.accessed_ids is not None:
+            self.accessed_ids.add(ItemInventory.ANY_ITEM)
+        return self.counts.elements()
+
+    def __len__(self) -> int:
+        if self.accessed_ids is not None:
+            self.accessed_ids.add(ItemInventory.ANY_ITEM)
+        return self.counts.total()
+
+    def count(self, item_id: int) -> int:
+        if self.accessed_ids is not None:
+            self.accessed_ids.add(item_id)
+        return self.counts.get(item_id, 0)
+
+    def append(self, item_id: int):
+        self.counts[item_id] += 1
+        self.version += 1
+
+    def extend(self, item_ids: Iterable[int]):
+        self.counts.update(item_ids)
+        self.version += 1
+
+
 START_NODE = "Starting"
 
 
@@ -6,6 +6,7 @@ from typing import Any, Optional
 from Class.exceptions import HintException
 from Class.itemClass import KH2Item
 from Class.newLocationClass import KH2Location
+from Class.randomUtils import rng_or_shared
 from List.LvupStats import DreamWeaponOffsets
 from List.ObjectiveList import KH2Objective
 from List.configDict import HintType, SoraLevelOption, itemType, locationCategory, locationType
@@ -516,7 +517,9 @@ class HintUtils:
         settings: RandomizerSettings,
         world_items: WorldItems,
         point_data: list[PointHintData],
+        rng: Optional[random.Random] = None,
     ) -> dict[int, dict[str, Any]]:
+        rng = rng_or_shared(rng)
         prevent_self_hinting = settings.prevent_self_hinting
         report_number_to_world_to_item = []
         for report_number in range(1, 14):
@@ -538,7 +541,7 @@ class HintUtils:
             ]
             if len(filtered_list) == 0:
                 return None, None, None
-            return random.choice(filtered_list)
+            return rng.choice(filtered_list)
 
         def reduce_list(
                 input_report_num: int,
@@ -557,7 +560,7 @@ class HintUtils:
         for _ in range(50):
             data = copy.deepcopy(report_number_to_world_to_item)
             report_assignments = {}
-            random.shuffle(hintable_worlds)
+            rng.shuffle(hintable_worlds)
             if len(hintable_worlds) >= 13:
                 final_hintable_worlds = hintable_worlds[0:13]
             else:
@@ -591,7 +594,9 @@ class HintUtils:
         settings: RandomizerSettings,
         world_items: WorldItems,
         jsmartee_data: list[JsmarteeHintData],
+        rng: Optional[random.Random] = None,
     ) -> dict[int, dict[str, Any]]:
+        rng = rng_or_shared(rng)
         prevent_self_hinting: bool = settings.prevent_self_hinting
         augmented_jsmartee_data = copy.deepcopy(jsmartee_data)
         # populate the hintable world list with ones that have valid items
@@ -626,7 +631,7 @@ class HintUtils:
             ]
             if len(filtered_list) == 0:
                 return None, None, None
-            return random.choice(filtered_list)
+            return rng.choice(filtered_list)
 
         def reduce_list(
                 input_report_num: Optional[int],
@@ -678,7 +683,7 @@ class HintUtils:
             # cull down the world list to a set of 13
             selected_worlds = copy.deepcopy(priorities)
             remaining_worlds = [world for world in hintable_worlds if world not in selected_worlds]
-            random.shuffle(remaining_worlds)
+            rng.shuffle(remaining_worlds)
             selected_worlds = selected_worlds + remaining_worlds
             selected_worlds = selected_worlds[0:13]
 
@@ -687,7 +692,7 @@ class HintUtils:
                 continue
 
             report_numbers = list(range(1, 14))
-            random.shuffle(report_numbers)
+            rng.shuffle(report_numbers)
             report_assignments = {}
             # try to assign the proof reports
             for index, world in enumerate(selected_worlds):
@@ -734,10 +739,12 @@ class HintUtils:
     def jsmartee_progression_hints(
         world_items: WorldItems,
         jsmartee_data: list[JsmarteeHintData],
+        rng: Optional[random.Random] = None,
     ) -> dict[int, dict[str, Any]]:
+        rng = rng_or_shared(rng)
         # output all the data as sequential reports
         report_assignments = {}
-        random.shuffle(jsmartee_data)
+        rng.shuffle(jsmartee_data)
         for chosen_report, hint_data in enumerate(jsmartee_data):
             if chosen_report < 13:
                 location = world_items.report_information[chosen_report + 1]["FoundIn"]
@@ -756,7 +763,9 @@ class HintUtils:
         path_data: list[PathHintData],
         tracker_data: CommonTrackerInfo,
         hintable_worlds: list[locationType],
+        rng: Optional[random.Random] = None,
     ) -> dict[int, dict[str, Any]]:
+        rng = rng_or_shared(rng)
         progression_hints = tracker_data.progression_settings is not None
         must_hint = list(
             set(
@@ -788,7 +797,7 @@ class HintUtils:
             report_assignments = {}
             report_numbers = list(range(1, 14))
             # shuffle first 13 reports
-            random.shuffle(report_numbers)
+            rng.shuffle(report_numbers)
             if progression_hints:
                 report_numbers = report_numbers + list(range(14, len(all_data) + 1))
                 # make sure all worlds with no items are last, and worlds that are enabled are before disabled ones
@@ -817,12 +826,14 @@ class HintUtils:
         tracker_data: CommonTrackerInfo,
         world_items: WorldItems,
         hintable_worlds: list[locationType],
+        rng: Optional[random.Random] = None,
     ) -> dict[int, dict[str, Any]]:
+        rng = rng_or_shared(rng)
         worlds_to_hint = copy.deepcopy(hintable_worlds)
         if tracker_data.progression_settings is not None:
             # report locations don't matter, but we'll populate the report locations anyway
             data = {}
-            random.shuffle(worlds_to_hint)
+            rng.shuffle(worlds_to_hint)
             for index, w in enumerate(worlds_to_hint):
                 if index < 13:
                     location = world_items.report_information[index + 1]["FoundIn"]
@@ -832,7 +843,7 @@ class HintUtils:
             return data
 
         for _ in range(50):
-            random.shuffle(worlds_to_hint)
+            rng.shuffle(worlds_to_hint)
             selected_worlds = worlds_to_hint[0:13]
             data = {}
             for index, w in enumerate(selected_worlds):
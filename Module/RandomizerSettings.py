@@ -1,5 +1,6 @@
 import random
 from itertools import chain
+from typing import Optional
 
 from Class import settingkey
 from Class.exceptions import SettingsException
@@ -450,7 +451,7 @@ class RandomizerSettings:
         self.ui_version: str = ui_version
         self.boss_enemy_overrides: str = boss_enemy_overrides if boss_enemy_overrides and (self.enemy_options["boss"] != "Disabled" or self.enemy_options["enemy"] != "Disabled") else ""
         self.create_full_seed_string()
-        self.seedHashIcons: list[str] = generate_hash_icons()
+        self.seedHashIcons: list[str] = generate_hash_icons(rng=self.create_seeded_rng())
 
         # TODO: We could make this its own opt-in setting, or we could just make it automatic if/when we're confident
         self.write_seed_checker_script: bool = spoiler_log
@@ -812,7 +813,15 @@ class RandomizerSettings:
             + self.boss_enemy_overrides
         )
         self.full_rando_seed = seed_string_from_all_inputs
-        random.seed(seed_string_from_all_inputs)
+
+    def create_seeded_rng(self) -> random.Random:
+        """
+        Returns a new generator instance seeded with the full seed string.
+
+        Each seed generation should draw from its own instance rather than the shared generator, so that seeds
+        generated alongside each other (in other threads or in the same process) can't affect each other.
+        """
+        return random.Random(self.full_rando_seed)
 
     def validateSettings(self):
         boss_depths = [
@@ -922,15 +931,24 @@ class RandomizerSettings:
                 msg = "Either Absent Silhouettes or Data Organization need to be enabled for superboss-only proof depth"
                 raise SettingsException(msg)
 
-    def excluded_levels(self) -> list[int]:
+    def excluded_levels(self, rng: Optional[random.Random] = None) -> list[int]:
+        """
+        Returns the levels that won't have checks.
+
+        When level check slots are randomized, the chosen slots only depend on the full seed string. If a specific
+        generator instance is passed, it is re-seeded with the full seed string and used to choose the slots;
+        otherwise, a throwaway instance is used.
+        """
         max_level = self.max_level_checks
         if self.randomize_level_check_slots:
-            random.seed(self.full_rando_seed)
+            if rng is None:
+                rng = random.Random()
+            rng.seed(self.full_rando_seed)
             if max_level == 99:
-                level_checks = set(random.sample(range(2,100),23))
+                level_checks = set(rng.sample(range(2,100),23))
                 return [l for l in range(1,100) if l not in level_checks]
             elif max_level == 50:
-                level_checks = set(random.sample(range(2,51),23))
+                level_checks = set(rng.sample(range(2,51),23))
                 return [l for l in range(1,100) if l not in level_checks]
             elif max_level == 1:
                 return list(range(1, 100))
@@ -1,5 +1,7 @@
 import random
+from typing import Optional
 from Class.openkhmod import AttackEntriesOrganizer, ATKPObject
+from Class.randomUtils import rng_or_shared
 
 WEAK_MAX_DIFFERENCE = 0.3
 WEAK_MIN_DIFFERENCE = 0.0
@@ -16,7 +18,7 @@ OVERPOWERED_MIN_DIFFERENCE = 1.2
 CHAOS_MAX_DIFFERENCE = 6.0
 CHAOS_MIN_DIFFERENCE = 0.0
 
-LIST_OF_COMPANION_IDS = [
+LIST_OF_COMPANION_IDS = frozenset([
 	1698,
 	151,
 	152,
@@ -189,7 +191,7 @@ LIST_OF_COMPANION_IDS = [
 	1445,
 	883,
 	1210,
-]
+])
 KNOCBACK_LIST = [8, 11, 12]
 
 ALL_DAMAGE_PRESETS = {
@@ -235,7 +237,7 @@ ALL_MULTI_HIT_PRESETS = {
 
 #Randomizing element in all IDs can be painful against certain enemies like gargoyles.
 #These IDs can be excluded from having element randomized if enabled.
-SORA_BASE_ATTACK_IDS = [
+SORA_BASE_ATTACK_IDS = frozenset([
 	126,
 	127,
 	128,
@@ -247,10 +249,10 @@ SORA_BASE_ATTACK_IDS = [
 	133,
 	134,
 	926
-]
+])
 
 #Workaround for weird bug that doesn't let sora kill bosses for some reason
-SORA_IDS = [
+SORA_IDS = frozenset([
 	126,
 	127,
 	128,
@@ -499,10 +501,11 @@ SORA_IDS = [
 	1585,
 	886,
 	715,
-]
+])
 
 class atkpRandomizerClass:
-	def __init__(self, kill_boss, companion_damage):
+	def __init__(self, kill_boss, companion_damage, rng: Optional[random.Random] = None):
+		self.rng = rng_or_shared(rng)
 		self.companion_kill_boss = kill_boss
 		self.companion_deal_damage = companion_damage
 		self.DAMAGE_PRESETS = []
@@ -523,21 +526,21 @@ class atkpRandomizerClass:
 		for attack_entry in attack_entries:
 			attack_entry: ATKPObject
 			#Workaround
-			if SORA_IDS.__contains__(attack_entry.Id):
+			if attack_entry.Id in SORA_IDS:
 				attack_entry.Flags = "KillBoss"
 			if len(self.DAMAGE_PRESETS) != 0:
 				attack_entry.Power = max(min(int(round(self.randomize_power(attack_entry.Power))), 65535), 0)
 			if element:
 				if exclude_base_attack:
-					if not SORA_BASE_ATTACK_IDS.__contains__(attack_entry.Id):
+					if attack_entry.Id not in SORA_BASE_ATTACK_IDS:
 						attack_entry.Element = self.randomize_elements()
 				else: 
 					attack_entry.Element = self.randomize_elements()
 			if self.companion_deal_damage:
-				if LIST_OF_COMPANION_IDS.__contains__(attack_entry.Id):
+				if attack_entry.Id in LIST_OF_COMPANION_IDS:
 					attack_entry.EnemyReaction = self.randomize_companion_knockback_type()
 			if self.companion_kill_boss != 0:
-				if LIST_OF_COMPANION_IDS.__contains__(attack_entry.Id):
+				if attack_entry.Id in LIST_OF_COMPANION_IDS:
 					attack_entry.Flags = self.companion_kill_boss
 			if len(self.KNOCKBACK_AMOUNT_PRESETS) != 0:
 				attack_entry.KnockbackStrength1 = max(min(int(round(self.randomize_value(attack_entry.KnockbackStrength1, self.KNOCKBACK_AMOUNT_PRESETS[0], self.KNOCKBACK_AMOUNT_PRESETS[1]))), 32767), -32767)
@@ -552,29 +555,29 @@ class atkpRandomizerClass:
 
 	def randomize_value(self, value, max_difference, min_difference):
 		increase_value = False
-		if random.randint(0, 100) > 50:
+		if self.rng.randint(0, 100) > 50:
 			increase_value = True
 		if increase_value:
-			multiplier = 1.0 + random.uniform(min_difference, max_difference)
+			multiplier = 1.0 + self.rng.uniform(min_difference, max_difference)
 			return value * multiplier
 		else:
-			divisor = 1.0 + random.uniform(min_difference, max_difference)
+			divisor = 1.0 + self.rng.uniform(min_difference, max_difference)
 			return value / divisor
 	
 	def randomize_elements(self):
-		return random.randint(0, 5)
+		return self.rng.randint(0, 5)
 	
 	def randomize_on_hit(self):
-		return random.randint(0, 12)
+		return self.rng.randint(0, 12)
 	
 	def randomize_companion_knockback_type(self):
-		index = random.randint(0, 2)
+		index = self.rng.randint(0, 2)
 		return KNOCBACK_LIST[index]
 
 	def randomize_multi_hit(self, chance, minFrames, maxFrames, current_attack_entry: ATKPObject):
-		if random.randint(1, 100) > chance:
+		if self.rng.randint(1, 100) > chance:
 			return
-		current_attack_entry.Interval = random.randint(minFrames, maxFrames)
+		current_attack_entry.Interval = self.rng.randint(minFrames, maxFrames)
 	
 	# Because a lot of moves have either 0 revenge value or a high amount, randomization
 	# is handled by first determining if any change will happen, then by a flat value.
@@ -583,9 +586,9 @@ class atkpRandomizerClass:
 	# differences because the game would be kind of unplayable. (unless Chaos enabled)
 	def randomize_revenge_value(self, minValue, maxValue):
 		increase_value = False
-		if random.randint(0, 100) > 50:
+		if self.rng.randint(0, 100) > 50:
 			increase_value = True
-		num = random.randint(minValue, maxValue)
+		num = self.rng.randint(minValue, maxValue)
 		if not increase_value:
 			return -num
 		return num
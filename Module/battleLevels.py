@@ -1,27 +1,20 @@
 import math
 import random
+from typing import Optional
 
 from Class.exceptions import BackendException
 from Class.newLocationClass import KH2Location
+from Class.randomUtils import rng_or_shared
 from List.location import landofdragons, spaceparanoids, weaponslot, donaldbonus, goofybonus, starting, formlevel, \
     summonlevel, agrabah, disneycastle, hundredacrewood, olympuscoliseum, beastscastle, halloweentown, portroyal, \
     hollowbastion, pridelands, simulatedtwilighttown, twilighttown, worldthatneverwas
 from List.configDict import locationType, BattleLevelOption
-from Module.resources import resource_path
+from Module.binarytables import PatchedBinary, BATTLE_LEVELS
 
 
-def number_to_bytes(item):
-    # for byte1, find the most significant bits from the item Id
-    itemByte1 = item>>8
-    # for byte0, isolate the least significant bits from the item Id
-    itemByte0 = item & 0x00FF
-    return itemByte0,itemByte1
-
-def bytes_to_number(byte0, byte1=0):
-    return int(byte0)+int(byte1<<8)
-
 class BtlvViewer():
-    def __init__(self):
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng_or_shared(rng)
         self.worlds = [None,None,locationType.TT,None,locationType.HB,locationType.BC,locationType.OC,locationType.Agrabah,
                         locationType.LoD,locationType.HUNDREDAW,locationType.PL,locationType.Atlantica,locationType.DC,locationType.DC,
                         locationType.HT,None,locationType.PR,locationType.SP,locationType.TWTNW,None,None,None,None,None]
@@ -92,8 +85,7 @@ class BtlvViewer():
             self.visit_flags[locationType.SP] = [(17,0x147D01),(17,0x15FD79)]
             self.visit_flags[locationType.TWTNW] = [(18,0x157D79)]
         
-        with open(resource_path(btlv_file), "rb") as btlvBar:
-            self.binaryContent = bytearray(btlvBar.read())
+        self.btlv_file = btlv_file
         self._make_btlv_vanilla()
 
     def use_setting(
@@ -143,12 +135,11 @@ class BtlvViewer():
         list_ret = [self._interpret_flags(x) for x in self.visit_flags[world]]
         return list_ret
 
-    def write_modifications(self) -> bytearray:
-        for x in range(20):
-            offset = 8 + 32 * x
-            for y in range(8, 32):
-                self.binaryContent[offset + y] = number_to_bytes(self.flags[x][y - 8])[0]
-        return self.binaryContent
+    def write_modifications(self) -> bytes:
+        battle_levels = PatchedBinary(self.btlv_file).table(BATTLE_LEVELS)
+        for x, levels in enumerate(self.flags):
+            battle_levels.set(x, "levels", bytes(level & 0xFF for level in levels))
+        return battle_levels.binary.to_bytes()
 
     def _interpret_flags(self, flags_entry):
         battle_level_sum = 0
@@ -169,12 +160,7 @@ class BtlvViewer():
 
     def _make_btlv_vanilla(self):
         self.random_option = None
-        self.flags = []
-        for x in range(20):
-            offset = 8+32*x
-            self.flags.append([])
-            for y in range(8,32):
-                self.flags[-1].append(bytes_to_number(self.binaryContent[offset+y]))
+        self.flags = [list(battle_levels.levels) for battle_levels in PatchedBinary(self.btlv_file).table(BATTLE_LEVELS)]
     
     def _variance_btlv(self):
         level_range = self.battle_level_range
@@ -185,13 +171,13 @@ class BtlvViewer():
         for world, visit_flag_list in self.visit_flags.items():
             current_btlvs = self.get_battle_levels(world)
             for visit_number in range(len(visit_flag_list)):
-                btlv_change = random.randint(-level_range, level_range)
+                btlv_change = self.rng.randint(-level_range, level_range)
                 self._set_battle_level(world,visit_flag_list[visit_number][0],visit_number,current_btlvs[visit_number]+btlv_change)
 
     def _pure_random_btlv(self, btlv_minimum: int, btlv_maximum: int):
         for world, visit_flag_list in self.visit_flags.items():
             for visit_number in range(len(visit_flag_list)):
-                btlv_change = random.randint(btlv_minimum, btlv_maximum)
+                btlv_change = self.rng.randint(btlv_minimum, btlv_maximum)
                 self._set_battle_level(world, visit_flag_list[visit_number][0], visit_number, btlv_change)
 
     def _shuffle_btlv(self):
@@ -199,7 +185,7 @@ class BtlvViewer():
         for world, visit_flag_list in self.visit_flags.items():
             battle_level_list += self.get_battle_levels(world)
 
-        random.shuffle(battle_level_list)
+        self.rng.shuffle(battle_level_list)
 
         for world, visit_flag_list in self.visit_flags.items():
             for visit_number in range(len(visit_flag_list)):
@@ -0,0 +1,270 @@
+"""
+Struct-based access to the game's binary data tables that ship in static/ (drops, shops, synthesis, puzzles, and battle
+levels).
+
+Each file is read at most once per process and shared as immutable bytes. A seed works on a PatchedBinary, which reads
+straight from the shared bytes until the first edit and only then copies the file into its own buffer. A TableSchema
+describes where a table's fixed-size records are in a file and how each record is laid out, and BinaryTable reads and
+writes those records by field name (one at a time, or a field across many records at once).
+"""
+import struct
+import threading
+from collections import namedtuple
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional
+
+from Module.resources import resource_path
+
+_loaded: dict[str, bytes] = {}
+_loaded_lock = threading.Lock()
+
+
+def pristine_binary(relative_path: str) -> bytes:
+    """Returns the unmodified contents of the given binary file (for example, static/drops.bin)."""
+    try:
+        return _loaded[relative_path]
+    except KeyError:
+        pass
+    with _loaded_lock:
+        if relative_path not in _loaded:
+            with open(resource_path(relative_path), "rb") as binary_file:
+                _loaded[relative_path] = binary_file.read()
+        return _loaded[relative_path]
+
+
+class RecordLayout:
+    """
+    Layout of one fixed-size, little-endian record, as (field name, struct format) pairs. Padding and unknown bytes that
+    are never read use a None name and an "x" format.
+    """
+
+    def __init__(self, name: str, fields: list[tuple[Optional[str], str]]):
+        self.record_struct = struct.Struct("<" + "".join(field_format for _, field_format in fields))
+        self.size = self.record_struct.size
+        self.field_names = tuple(field_name for field_name, _ in fields if field_name is not None)
+        self.record_type = namedtuple(name, self.field_names)
+        # Field name to (offset within the record, struct for just that field)
+        self.fields: dict[str, tuple[int, struct.Struct]] = {}
+        offset = 0
+        for field_name, field_format in fields:
+            field_struct = struct.Struct("<" + field_format)
+            if field_name is not None:
+                self.fields[field_name] = (offset, field_struct)
+            offset += field_struct.size
+
+
+@dataclass(frozen=True)
+class TableSchema:
+    """Where a table of records is in its file: the layout of each record, the first record's offset, and the count."""
+    layout: RecordLayout
+    offset: int
+    count: int
+
+
+class PatchedBinary:
+    """One seed's (copy-on-write) edits to a shared binary file."""
+
+    def __init__(self, relative_path: str):
+        self.relative_path = relative_path
+        self._pristine = pristine_binary(relative_path)
+        self._patched: Optional[bytearray] = None
+
+    @property
+    def modified(self) -> bool:
+        return self._patched is not None
+
+    def readable(self) -> memoryview:
+        return memoryview(self._pristine if self._patched is None else self._patched)
+
+    def writable(self) -> bytearray:
+        if self._patched is None:
+            self._patched = bytearray(self._pristine)
+        return self._patched
+
+    def table(self, schema: TableSchema, offset: Optional[int] = None) -> "BinaryTable":
+        """Returns a view of the table described by the schema, optionally starting at a different offset."""
+        return BinaryTable(self, schema, schema.offset if offset is None else offset)
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.readable())
+
+
+class BinaryTable:
+    """Reads and writes the records of one table within a PatchedBinary."""
+
+    def __init__(self, binary: PatchedBinary, schema: TableSchema, offset: int):
+        self.binary = binary
+        self.layout = schema.layout
+        self.offset = offset
+        self.count = schema.count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[NamedTuple]:
+        return (self.record(index) for index in range(self.count))
+
+    def record_offset(self, index: int) -> int:
+        """Returns the offset within the file of the record at the index."""
+        if not 0 <= index < self.count:
+            raise IndexError(f"Record {index} is outside of the table ({self.count} records)")
+        return self.offset + index * self.layout.size
+
+    def record(self, index: int) -> NamedTuple:
+        values = self.layout.record_struct.unpack_from(self.binary.readable(), self.record_offset(index))
+        return self.layout.record_type._make(values)
+
+    def get(self, index: int, field_name: str) -> Any:
+        field_offset, field_struct = self.layout.fields[field_name]
+        return field_struct.unpack_from(self.binary.readable(), self.record_offset(index) + field_offset)[0]
+
+    def set(self, index: int, field_name: str, value: Any):
+        field_offset, field_struct = self.layout.fields[field_name]
+        field_struct.pack_into(self.binary.writable(), self.record_offset(index) + field_offset, value)
+
+    def replace(self, index: int, **values):
+        """Sets several fields of the record at the index."""
+        for field_name, value in values.items():
+            self.set(index, field_name, value)
+
+    def update_field(
+        self,
+        field_name: str,
+        update: Callable[[Any], Any],
+        indices: Optional[Iterable[int]] = None,
+    ) -> list[int]:
+        """
+        Replaces the field's value in each of the records at the indices (every record, if not given) with the result of
+        calling update with the current value. Returns the indices of the records whose value changed.
+        """
+        field_offset, field_struct = self.layout.fields[field_name]
+        readable = self.binary.readable()
+        changed: list[int] = []
+        writable: Optional[bytearray] = None
+        for index in range(self.count) if indices is None else indices:
+            position = self.record_offset(index) + field_offset
+            current = field_struct.unpack_from(readable, position)[0]
+            updated = update(current)
+            if updated != current:
+                if writable is None:
+                    # Until now this may have been reading the shared pristine bytes, so read from the seed's own copy
+                    writable = self.binary.writable()
+                    readable.release()
+                    readable = memoryview(writable)
+                field_struct.pack_into(writable, position, updated)
+                changed.append(index)
+        readable.release()
+        return changed
+
+    def set_field(self, field_name: str, value: Any, indices: Optional[Iterable[int]] = None) -> list[int]:
+        """Sets the field to the value in each of the records at the indices (every record, if not given)."""
+        return self.update_field(field_name, lambda _: value, indices)
+
+
+# static/drops.bin
+DROP_RATES = TableSchema(
+    RecordLayout("DropRate", [
+        ("id", "H"),
+        ("small_hp", "B"),
+        ("big_hp", "B"),
+        ("big_munny", "B"),
+        ("medium_munny", "B"),
+        ("small_munny", "B"),
+        ("small_mp", "B"),
+        ("big_mp", "B"),
+        ("small_drive", "B"),
+        ("big_drive", "B"),
+        (None, "x"),
+        ("item1", "H"),
+        ("item1_chance", "H"),
+        ("item2", "H"),
+        ("item2_chance", "H"),
+        ("item3", "H"),
+        ("item3_chance", "H"),
+    ]),
+    offset=8,
+    count=184,
+)
+
+# static/puzzle.bin
+PUZZLES = TableSchema(
+    RecordLayout("Puzzle", [
+        ("id", "B"),
+        (None, "x"),
+        ("name", "H"),
+        ("reward", "H"),
+        ("puzzle_name", "10s"),
+    ]),
+    offset=16,
+    count=6,
+)
+
+# static/synthesis.bin
+_synthesis_recipe_fields: list[tuple[Optional[str], str]] = [
+    ("id", "H"),
+    ("unlock_rank", "B"),
+    ("unknown", "B"),
+    ("reward", "H"),
+    ("upgraded_reward", "H"),
+]
+for _ingredient in range(1, 7):
+    _synthesis_recipe_fields.append((f"ingredient{_ingredient}", "H"))
+    _synthesis_recipe_fields.append((f"ingredient{_ingredient}_amount", "H"))
+SYNTHESIS_RECIPES = TableSchema(RecordLayout("SynthesisRecipe", _synthesis_recipe_fields), offset=16, count=30)
+
+# static/synthesis_reqs.bin
+SYNTHESIS_REQUIREMENTS = TableSchema(
+    RecordLayout("SynthesisRequirement", [
+        ("id", "H"),
+        ("reward", "H"),
+        ("reward_type", "B"),
+        ("material_type", "B"),
+        ("material_rank", "B"),
+        ("condition_type", "B"),
+        ("count_needed", "H"),
+        ("unlock_event_shop", "H"),
+    ]),
+    offset=16,
+    count=54,
+)
+
+# static/shop.bin is made up of several tables, with their counts and the valid items' offset in the header
+SHOP_HEADER = TableSchema(
+    RecordLayout("ShopHeader", [
+        ("magic", "4s"),
+        ("version", "H"),
+        ("shop_count", "H"),
+        ("inventory_count", "H"),
+        ("product_count", "H"),
+        ("valid_items_offset", "H"),
+        (None, "2x"),
+    ]),
+    offset=0,
+    count=1,
+)
+SHOP_INVENTORIES = TableSchema(
+    RecordLayout("ShopInventory", [
+        ("unlock_event", "H"),
+        ("product_count", "H"),
+        ("product_offset", "H"),
+        (None, "2x"),
+    ]),
+    offset=16 + 21 * 24,
+    count=38,
+)
+# Includes the unused space after the products, where more products can be added
+SHOP_PRODUCTS = TableSchema(RecordLayout("ShopProduct", [("item", "H")]), offset=16 + 21 * 24 + 38 * 8, count=868)
+# Starts at the header's valid_items_offset, and runs to the end of the file
+SHOP_VALID_ITEMS = TableSchema(RecordLayout("ShopValidItem", [("item", "H")]), offset=2560, count=848)
+
+# static/btlv.bin and static/goa_btlv.bin
+BATTLE_LEVELS = TableSchema(
+    RecordLayout("BattleLevels", [
+        ("id", "I"),
+        ("unknown", "I"),
+        # Battle level for each world index
+        ("levels", "24s"),
+    ]),
+    offset=8,
+    count=20,
+)
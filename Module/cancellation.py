@@ -0,0 +1,24 @@
+import threading
+
+from Class.exceptions import CancelledException
+
+
+class CancellationToken:
+    """
+    Lets one thread ask work running on another to stop. The work checks the token at points where it's safe to stop,
+    so it finishes whatever step it's in the middle of first.
+    """
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise CancelledException("Cancelled")
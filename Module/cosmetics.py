@@ -1,18 +1,21 @@
 import json
 import random
 from pathlib import Path
+from typing import Optional
 
 from Class import settingkey
 from Class.openkhmod import ModAsset, StrDict
+from Class.randomUtils import rng_or_shared
 from Class.seedSettings import SeedSettings
 from Module import appconfig, platformutils
 from Module.cosmeticsmods import music
+from Module.cosmeticsmods.customlibrary import custom_library
 from Module.cosmeticsmods.endingpic import EndingPictureRandomizer
 from Module.cosmeticsmods.field2d import CommandMenuRandomizer, RoomTransitionImageRandomizer
 from Module.cosmeticsmods.itempic import ItempicRandomizer
 from Module.cosmeticsmods.keyblade import KeybladeRandomizer, KeybladeRandomizerResult
 from Module.cosmeticsmods.texture import TextureRecolorSettings
-from Module.paths import walk_files_with_extension
+from Module.paths import with_caps_extensions
 
 
 class CustomCosmetics:
@@ -82,12 +85,14 @@ class CosmeticsMod:
             (custom_music_path / folder).mkdir(exist_ok=True)
 
     @staticmethod
-    def randomize_music(ui_settings: SeedSettings) -> tuple[list[ModAsset], dict[str, Path]]:
+    def randomize_music(
+        ui_settings: SeedSettings, rng: Optional[random.Random] = None
+    ) -> tuple[list[ModAsset], dict[str, Path]]:
         """
         Randomizes music, returning a list of assets to be added to the seed mod and a dictionary of which song was
         replaced by which replacement.
         """
-        return CosmeticsMod._get_music_assets(ui_settings)
+        return CosmeticsMod._get_music_assets(ui_settings, rng)
 
     @staticmethod
     def get_music_summary(settings: SeedSettings) -> dict[str, int]:
@@ -114,10 +119,13 @@ class CosmeticsMod:
         if settings.get(settingkey.MUSIC_RANDO_PC_INCLUDE_CUSTOM):
             custom_music_path = appconfig.read_custom_music_path()
             if custom_music_path is not None:
-                for category_dir in custom_music_path.iterdir():
-                    if category_dir.is_dir():
-                        category_songs = list(walk_files_with_extension(category_dir, ".scd"))
-                        add_songs(category_songs, suggested_category=category_dir.name)
+                library = custom_library(custom_music_path)
+                song_extensions = with_caps_extensions(".scd")
+                for category in library.folders():
+                    category_songs = [
+                        song.path for song in library.walk_files(category) if song.suffix in song_extensions
+                    ]
+                    add_songs(category_songs, suggested_category=category)
 
         extracted_data_path = appconfig.extracted_data_path()
         if extracted_data_path is not None:
@@ -169,7 +177,10 @@ class CosmeticsMod:
         return result
 
     @staticmethod
-    def _get_music_assets(settings: SeedSettings) -> tuple[list[ModAsset], dict[str, Path]]:
+    def _get_music_assets(
+        settings: SeedSettings, rng: Optional[random.Random] = None
+    ) -> tuple[list[ModAsset], dict[str, Path]]:
+        rng = rng_or_shared(rng)
         music_rando_enabled = settings.get(settingkey.MUSIC_RANDO_ENABLED_PC)
         if not music_rando_enabled:
             return [], {}
@@ -184,7 +195,7 @@ class CosmeticsMod:
         music_files = CosmeticsMod._collect_music_files(settings)
         for category, song_list in music_files.items():
             main_list = song_list.copy()
-            random.shuffle(main_list)
+            rng.shuffle(main_list)
             music_files_by_categories[category] = main_list
 
             backup_files_by_categories[category] = song_list
@@ -195,7 +206,7 @@ class CosmeticsMod:
         music_list_file_path = CosmeticsMod.bootstrap_music_list_file()
         with open(music_list_file_path, encoding="utf-8") as music_list_file:
             music_metadata: list[StrDict] = json.load(music_list_file)
-        random.shuffle(music_metadata)
+        rng.shuffle(music_metadata)
         for info in music_metadata:
             filename: str = info["filename"]
             title: str = info["title"]
@@ -203,7 +214,7 @@ class CosmeticsMod:
                 song_type.lower() for song_type in info["type"] if song_type.lower() in music_files_by_categories
             ]
             if len(types) > 0:
-                random.shuffle(types)
+                rng.shuffle(types)
 
                 for chosen_type in types:
                     songs_for_chosen_type = music_files_by_categories[chosen_type]
@@ -212,7 +223,7 @@ class CosmeticsMod:
                     # If duplicates are not allowed and we run out of replacements, more will end up un-randomized.
                     if len(songs_for_chosen_type) == 0 and allow_duplicates:
                         refill_list = backup_files_by_categories[chosen_type].copy()
-                        random.shuffle(refill_list)
+                        rng.shuffle(refill_list)
                         music_files_by_categories[chosen_type] = refill_list
                         songs_for_chosen_type = refill_list
 
@@ -245,7 +256,9 @@ class CosmeticsMod:
             (item_pictures_path / category.lower()).mkdir(exist_ok=True)
 
     @staticmethod
-    def randomize_keyblades(seed_settings: SeedSettings) -> KeybladeRandomizerResult:
+    def randomize_keyblades(
+        seed_settings: SeedSettings, rng: Optional[random.Random] = None
+    ) -> KeybladeRandomizerResult:
         """
         Randomizes keyblades, returning a result object containing various data needed to write the portions of the mod
         for the keyblades.
@@ -255,29 +268,30 @@ class CosmeticsMod:
             include_effects=seed_settings.get(settingkey.KEYBLADE_RANDO_INCLUDE_EFFECTS),
             allow_duplicate_replacement=seed_settings.get(settingkey.KEYBLADE_RANDO_ALLOW_DUPLICATES),
             replace_goa_keyblades=seed_settings.get(settingkey.KEYBLADE_RANDO_INCLUDE_GOA),
+            rng=rng,
         )
 
     @staticmethod
-    def randomize_field2d(seed_settings: SeedSettings) -> list[ModAsset]:
+    def randomize_field2d(seed_settings: SeedSettings, rng: Optional[random.Random] = None) -> list[ModAsset]:
         """Randomizes various field2d entries, returning a list of assets to be added to a mod."""
         assets: list[ModAsset] = []
 
         command_menu_choice = seed_settings.get(settingkey.COMMAND_MENU)
-        assets.extend(CommandMenuRandomizer(command_menu_choice).randomize_command_menus())
+        assets.extend(CommandMenuRandomizer(command_menu_choice, rng).randomize_command_menus())
 
         transition_choice = seed_settings.get(settingkey.ROOM_TRANSITION_IMAGES)
-        assets.extend(RoomTransitionImageRandomizer(transition_choice).randomize_room_transitions())
+        assets.extend(RoomTransitionImageRandomizer(transition_choice, rng).randomize_room_transitions())
 
         return assets
 
     @staticmethod
-    def randomize_itempics(seed_settings: SeedSettings) -> list[ModAsset]:
+    def randomize_itempics(seed_settings: SeedSettings, rng: Optional[random.Random] = None) -> list[ModAsset]:
         """Randomizes various itempic entries, returning a list of assets to be added to a mod."""
         setting = seed_settings.get(settingkey.ITEMPIC_RANDO)
-        return ItempicRandomizer.randomize_itempics(setting)
+        return ItempicRandomizer.randomize_itempics(setting, rng)
 
     @staticmethod
-    def randomize_end_screen(seed_settings: SeedSettings) -> list[ModAsset]:
+    def randomize_end_screen(seed_settings: SeedSettings, rng: Optional[random.Random] = None) -> list[ModAsset]:
         """Randomizes the ending screen, returning a list of assets to be added to a mod."""
         setting = seed_settings.get(settingkey.ENDPIC_RANDO)
-        return EndingPictureRandomizer.randomize_end_screen(setting)
+        return EndingPictureRandomizer.randomize_end_screen(setting, rng)
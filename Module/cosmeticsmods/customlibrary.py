@@ -0,0 +1,197 @@
+"""
+Index of the files in a custom music or custom visuals folder, so that the cosmetics randomizers (and the summaries in
+the UI) don't need to look through every file in the folder each time they're used.
+
+The index for each folder is saved in the cache folder and refreshed each time it's used. Refreshing only lists the
+directories that have been modified since they were indexed (adding, removing, or renaming anything in a directory
+changes the directory's modification time), so for an unchanged folder it comes down to checking the modification time
+of each directory. Replacing a file's contents doesn't change its directory, so the size and modification time recorded
+for each file can be out of date.
+
+Files and folders are listed in the same order os.walk and Path.iterdir would give them.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+_INDEX_VERSION = 1
+# A directory modified this recently may still be changing within the same modification time, so its listing is only
+# trusted until the next refresh
+_RECENTLY_MODIFIED_NS = 2_000_000_000
+
+
+@dataclass(frozen=True)
+class LibraryFile:
+    folder: Path
+    name: str
+    size: int
+    modified: int
+
+    @property
+    def path(self) -> Path:
+        return self.folder / self.name
+
+    @property
+    def suffix(self) -> str:
+        return os.path.splitext(self.name)[1]
+
+
+class CustomLibraryIndex:
+    """Index of the folders and files under one custom folder (the root)."""
+
+    def __init__(self, root: Path, index_path: Path):
+        self.root = root
+        self.index_path = index_path
+        # Number of directories whose contents have been listed (rather than taken from the index)
+        self.directories_listed = 0
+        # Path relative to the root ("" for the root itself) to the directory's modification time, the names of the
+        # folders in it, and the (name, size, modification time) of the files in it
+        self._directories: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path) as index_file:
+                index = json.load(index_file)
+            if index.get("version") == _INDEX_VERSION and index.get("root") == str(self.root):
+                self._directories = index["directories"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def _save(self):
+        index = {
+            "version": _INDEX_VERSION,
+            "root": str(self.root),
+            "directories": self._directories,
+        }
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.index_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "w") as temp_file:
+                json.dump(index, temp_file)
+            os.replace(temp_path, self.index_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def refresh(self) -> bool:
+        """Brings the index up to date with the folder, returning whether anything had changed."""
+        with self._lock:
+            directories: dict[str, dict[str, Any]] = {}
+            changed = self._refresh_directory("", directories, ancestors=frozenset())
+            if changed or directories.keys() != self._directories.keys():
+                self._directories = directories
+                self._save()
+                return True
+            return False
+
+    def _refresh_directory(
+            self,
+            relative: str,
+            directories: dict[str, dict[str, Any]],
+            ancestors: frozenset[tuple[int, int]],
+    ) -> bool:
+        path = self.root / relative
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        # A folder linked into one of its own subfolders would otherwise be indexed forever
+        identity = (stat.st_dev, stat.st_ino)
+        if identity in ancestors:
+            return False
+        ancestors = ancestors | {identity}
+
+        changed = False
+        listing = self._directories.get(relative)
+        if listing is None or listing["modified"] != stat.st_mtime_ns:
+            listing = self._list_directory(path, stat.st_mtime_ns)
+            changed = True
+        directories[relative] = listing
+
+        for folder in listing["folders"]:
+            if self._refresh_directory(f"{relative}/{folder}" if relative else folder, directories, ancestors):
+                changed = True
+        return changed
+
+    def _list_directory(self, path: Path, modified: Optional[int]) -> dict[str, Any]:
+        self.directories_listed += 1
+        folders: list[str] = []
+        files: list[list] = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            folders.append(entry.name)
+                        elif entry.is_file():
+                            file_stat = entry.stat()
+                            files.append([entry.name, file_stat.st_size, file_stat.st_mtime_ns])
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        if time.time_ns() - modified < _RECENTLY_MODIFIED_NS:
+            modified = None
+        return {"modified": modified, "folders": folders, "files": files}
+
+    def _listing(self, parts: tuple[str, ...]) -> tuple[str, dict[str, Any]]:
+        relative = "/".join(parts)
+        return relative, self._directories.get(relative, {"folders": [], "files": []})
+
+    def _library_files(self, relative: str, listing: dict[str, Any]) -> list[LibraryFile]:
+        folder_path = self.root / relative
+        return [LibraryFile(folder_path, name, size, modified) for name, size, modified in listing["files"]]
+
+    def folders(self, *parts: str) -> list[str]:
+        """Returns the names of the folders directly in the given folder (the root, if no parts are given)."""
+        with self._lock:
+            _, listing = self._listing(parts)
+            return list(listing["folders"])
+
+    def files(self, *parts: str) -> list[LibraryFile]:
+        """Returns the files directly in the given folder (the root, if no parts are given)."""
+        with self._lock:
+            relative, listing = self._listing(parts)
+            return self._library_files(relative, listing)
+
+    def walk_files(self, *parts: str) -> list[LibraryFile]:
+        """Returns all the files in the given folder (the root, if no parts are given) and its subfolders."""
+        result: list[LibraryFile] = []
+        with self._lock:
+            pending = ["/".join(parts)]
+            while len(pending) > 0:
+                relative = pending.pop()
+                listing = self._directories.get(relative)
+                if listing is None:
+                    continue
+                result.extend(self._library_files(relative, listing))
+                # Reversed, so that they're popped in order
+                for folder in reversed(listing["folders"]):
+                    pending.append(f"{relative}/{folder}" if relative else folder)
+        return result
+
+
+_indexes: dict[str, CustomLibraryIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def custom_library(root: Path) -> CustomLibraryIndex:
+    """Returns the index of the custom folder, brought up to date."""
+    root = Path(root).absolute()
+    root_key = str(root)
+    with _indexes_lock:
+        index = _indexes.get(root_key)
+        if index is None:
+            index_name = hashlib.sha1(root_key.encode()).hexdigest()[:16]
+            index = CustomLibraryIndex(root, Path("cache/custom-library").absolute() / f"{index_name}.json")
+            _indexes[root_key] = index
+    index.refresh()
+    return index
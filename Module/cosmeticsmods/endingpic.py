@@ -1,10 +1,12 @@
-import os
 import random
 from pathlib import Path
+from typing import Optional
 
 from Class.openkhmod import ModAsset, AssetPlatform
+from Class.randomUtils import rng_or_shared
 from List import configDict
 from Module import appconfig
+from Module.cosmeticsmods.customlibrary import custom_library
 
 
 class EndingPictureRandomizer:
@@ -68,8 +70,9 @@ class EndingPictureRandomizer:
         }
 
     @staticmethod
-    def randomize_end_screen(setting: str) -> list[ModAsset]:
+    def randomize_end_screen(setting: str, rng: Optional[random.Random] = None) -> list[ModAsset]:
         """Randomizes the ending screen, returning a list of assets to be added to a mod."""
+        rng = rng_or_shared(rng)
 
         assets: list[ModAsset] = []
         if setting == configDict.VANILLA:
@@ -84,7 +87,7 @@ class EndingPictureRandomizer:
                 setting = configDict.RANDOMIZE_IN_GAME_ONLY
             else:
                 # We're only choosing one in the end, so flip a coin to choose between in-game one or custom
-                coinflip = random.randint(0, 1)
+                coinflip = rng.randint(0, 1)
                 if coinflip == 0:
                     setting = configDict.RANDOMIZE_IN_GAME_ONLY
                 else:
@@ -92,7 +95,7 @@ class EndingPictureRandomizer:
 
         if setting == configDict.RANDOMIZE_IN_GAME_ONLY:
             for endpic_list in vanilla_by_region.values():
-                game_choice: str = random.choice(endpic_list)
+                game_choice: str = rng.choice(endpic_list)
                 assets.append(ModAsset.make_copy_asset(
                     game_files=endpic_list,
                     platform=AssetPlatform.PC,
@@ -101,7 +104,7 @@ class EndingPictureRandomizer:
                 ))
 
         if setting == configDict.RANDOMIZE_CUSTOM_ONLY and len(custom) > 0:
-            custom_choice: Path = random.choice(custom)
+            custom_choice: Path = rng.choice(custom)
             for endpic_list in vanilla_by_region.values():
                 assets.append(ModAsset.make_copy_asset(
                     game_files=endpic_list,
@@ -117,15 +120,10 @@ class EndingPictureRandomizer:
 
         custom_visuals_path = appconfig.read_custom_visuals_path()
         if custom_visuals_path is not None:
-            ending_pictures_path = custom_visuals_path / EndingPictureRandomizer.directory_name()
-            if ending_pictures_path.is_dir():
-                for root, dirs, files in os.walk(ending_pictures_path):
-                    root_path = Path(root)
-                    for file in files:
-                        name, extension = os.path.splitext(file)
-                        if extension.lower() == ".png":
-                            file_path = root_path / file
-                            result.append(file_path)
+            library = custom_library(custom_visuals_path)
+            for file in library.walk_files(EndingPictureRandomizer.directory_name()):
+                if file.suffix.lower() == ".png":
+                    result.append(file.path)
 
         return result
 
@@ -3,9 +3,11 @@ from pathlib import Path, PurePath
 from typing import Optional, Iterator
 
 from Class.openkhmod import ModAsset, AssetPlatform, ModSourceFile, AssetMethod
+from Class.randomUtils import rng_or_shared
 from List import configDict
 from Module import appconfig
-from Module.paths import walk_files_with_extension
+from Module.cosmeticsmods.customlibrary import custom_library
+from Module.paths import with_caps_extensions
 
 AGRABAH = "al0"
 BEAST_CASTLE = "bb0"
@@ -140,9 +142,10 @@ class CustomCommandMenu(ReplacementCommandMenu):
 
 class CommandMenuRandomizer:
 
-    def __init__(self, command_menu_choice: str):
+    def __init__(self, command_menu_choice: str, rng: Optional[random.Random] = None):
         super().__init__()
         self.command_menu_choice = command_menu_choice
+        self.rng = rng_or_shared(rng)
 
     @staticmethod
     def directory_name() -> str:
@@ -234,28 +237,25 @@ class CommandMenuRandomizer:
         if custom_visuals_path is None:
             return result
 
-        command_menus_path = custom_visuals_path / CommandMenuRandomizer.directory_name()
-        if not command_menus_path.is_dir():
-            return result
-
-        for command_menu_dir in command_menus_path.iterdir():
-            if command_menu_dir.is_dir():
-                original: Optional[Path] = None
-                remastered: Optional[Path] = None
-
-                for file in command_menu_dir.iterdir():
-                    extension = file.suffix
-                    if extension == ".2dd":
-                        original = file
-                    elif extension == ".dds" or extension == ".png":
-                        remastered = file
-
-                if original is not None:
-                    result.append(CustomCommandMenu(
-                        name=command_menu_dir.name,
-                        original_file=original,
-                        remastered_file=remastered,
-                    ))
+        library = custom_library(custom_visuals_path)
+        command_menus_folder = CommandMenuRandomizer.directory_name()
+        for command_menu_folder in library.folders(command_menus_folder):
+            original: Optional[Path] = None
+            remastered: Optional[Path] = None
+
+            for file in library.files(command_menus_folder, command_menu_folder):
+                extension = file.suffix
+                if extension == ".2dd":
+                    original = file.path
+                elif extension == ".dds" or extension == ".png":
+                    remastered = file.path
+
+            if original is not None:
+                result.append(CustomCommandMenu(
+                    name=command_menu_folder,
+                    original_file=original,
+                    remastered_file=remastered,
+                ))
 
         return result
 
@@ -270,9 +270,9 @@ class CommandMenuRandomizer:
             # This should hopefully be good enough for now without needing to add even more options.
             custom_menus = self._custom_command_menus()
             if len(custom_menus) > 0:
-                return [random.choice(custom_menus)]
+                return [self.rng.choice(custom_menus)]
             else:
-                return [random.choice(self._vanilla_command_menus(pc))]
+                return [self.rng.choice(self._vanilla_command_menus(pc))]
 
         elif command_menu_choice == configDict.RANDOMIZE_IN_GAME_ONLY:
             return self._vanilla_command_menus(pc)
@@ -299,7 +299,7 @@ class CommandMenuRandomizer:
         for index, old_menu in enumerate(self._supported_menu_list(pc)):
             if len(candidates) == 0:
                 candidates = replacement_list.copy()
-                random.shuffle(candidates)
+                self.rng.shuffle(candidates)
             menu_replacements[old_menu] = candidates.pop()
 
         return menu_replacements
@@ -334,9 +334,10 @@ class CommandMenuRandomizer:
 
 class RoomTransitionImageRandomizer:
 
-    def __init__(self, transition_choice: str):
+    def __init__(self, transition_choice: str, rng: Optional[random.Random] = None):
         super().__init__()
         self.transition_choice = transition_choice
+        self.rng = rng_or_shared(rng)
 
     @staticmethod
     def directory_name() -> str:
@@ -430,7 +431,7 @@ class RoomTransitionImageRandomizer:
         for index, old_transition in enumerate(supported_transitions):
             if len(candidates) == 0:
                 candidates = source_list.copy()
-                random.shuffle(candidates)
+                self.rng.shuffle(candidates)
             transition_replacements[old_transition] = candidates.pop()
 
         return transition_replacements
@@ -443,12 +444,11 @@ class RoomTransitionImageRandomizer:
         if custom_visuals_path is None:
             return result
 
-        room_transition_images_path = custom_visuals_path / RoomTransitionImageRandomizer.directory_name()
-        if not room_transition_images_path.is_dir():
-            return result
-
-        for file in walk_files_with_extension(room_transition_images_path, ".png"):
-            result[file.name] = file
+        image_extensions = with_caps_extensions(".png")
+        library = custom_library(custom_visuals_path)
+        for file in library.walk_files(RoomTransitionImageRandomizer.directory_name()):
+            if file.suffix in image_extensions:
+                result[file.path.name] = file.path
 
         return result
 
@@ -1,55 +1,133 @@
+from functools import cache
+from typing import Optional
+
 import numpy as np
 from numpy import ndarray
 
+# Which of (v, t, p, q) each of red, green, and blue come from for each hue sector, with a last sector for pixels with
+# no saturation (which are gray)
+_SECTOR_RGB_SOURCES = [
+    ("v", "t", "p"),
+    ("q", "v", "p"),
+    ("p", "v", "t"),
+    ("p", "q", "v"),
+    ("t", "p", "v"),
+    ("v", "p", "q"),
+    ("v", "v", "v"),
+]
+_GRAY_SECTOR = 6
+
+
+def _byte_mask(condition: ndarray) -> ndarray:
+    # 0xFF where the condition is True and 0x00 where it isn't, for picking between uint8 arrays with & and |. This
+    # doesn't branch per pixel the way np.where and np.select do, which matters for noisy textures.
+    return np.negative(condition.view(np.uint8))
+
+
+@cache
+def _hue_table() -> ndarray:
+    # The hue of every pixel, by which channel is the max (red, green, or blue) and how far below the max the other two
+    # channels are (in the order colorsys uses them). Worked out with the same arithmetic as colorsys.rgb_to_hsv, so the
+    # hues are exactly the same. The difference between the max and min channels is the larger of the two distances,
+    # and grays (no difference) have a hue of 0, which dividing by 1 instead of 0 gives.
+    first_distance, second_distance = np.meshgrid(np.arange(256.0), np.arange(256.0), indexing="ij")
+    diff = np.maximum(np.maximum(first_distance, second_distance), 1.0)
+    table = np.empty((3, 256, 256))
+    for max_channel, offset in enumerate([0.0, 2.0, 4.0]):
+        hue = (offset + first_distance / diff) - second_distance / diff
+        hue /= 6.0
+        # The hue is at least -1/6 and less than 1, so this is the same as % 1.0 but quicker
+        hue += hue < 0.0
+        table[max_channel] = hue
+    return table.reshape(-1)
+
+
+def rgb_to_hsv_channels(rgb: ndarray) -> tuple[ndarray, ndarray, ndarray]:
+    """
+    Returns the hue, saturation, and value of each pixel in an RGB(A) array of uints between 0 and 255, each as its own
+    (contiguous) array. Hue and saturation are between 0.0 and 1.0, and value is between 0.0 and 255.0.
+    """
+    # Translated from source of colorsys.rgb_to_hsv, giving exactly the same results. Everything that can be is worked
+    # out on the original uint8s, and the hue is looked up rather than worked out for each pixel.
+    r, g, b = (np.ascontiguousarray(rgb[..., channel]) for channel in range(3))
+    maxc8 = np.maximum(np.maximum(r, g), b)
+    diff8 = maxc8 - np.minimum(np.minimum(r, g), b)
+    maxc = maxc8.astype('float')
+    saturation = diff8.astype('float')
+    # Pixels with no difference (grays) have no saturation, which dividing by 1 instead of 0 gives
+    saturation /= np.maximum(maxc8, 1)
+
+    # red max: 0 + bc - gc, green max: 2 + rc - bc, blue max: 4 + gc - rc
+    red_max = _byte_mask(r == maxc8)
+    green_max = _byte_mask(g == maxc8) & ~red_max
+    blue_max = ~(red_max | green_max)
+    first = (b & red_max) | (r & green_max) | (g & blue_max)
+    second = (g & red_max) | (b & green_max) | (r & blue_max)
+    hue_index = ((green_max & 1) | (blue_max & 2)).astype(np.intp)
+    hue_index <<= 8
+    hue_index |= np.subtract(maxc8, first, out=first)
+    hue_index <<= 8
+    hue_index |= np.subtract(maxc8, second, out=second)
+    hue = np.take(_hue_table(), hue_index)
+    return hue, saturation, maxc
+
 
 def rgb_to_hsv(rgb: ndarray) -> ndarray:
-    # Translated from source of colorsys.rgb_to_hsv
     # r,g,b should be a numpy arrays with values between 0 and 255
     # rgb_to_hsv returns an array of floats between 0.0 and 1.0.
-    rgb = rgb.astype('float')
-    hsv = np.zeros_like(rgb)
+    hsv = np.empty(rgb.shape, dtype='float')
+    hsv[..., 0], hsv[..., 1], hsv[..., 2] = rgb_to_hsv_channels(rgb)
     # in case an RGBA array was passed, just copy the A channel
     hsv[..., 3:] = rgb[..., 3:]
-    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
-    maxc = np.max(rgb[..., :3], axis=-1)
-    minc = np.min(rgb[..., :3], axis=-1)
-    hsv[..., 2] = maxc
-    mask = maxc != minc
-    diff = (maxc - minc)[mask]
-    hsv[mask, 1] = diff / maxc[mask]
-    rc = np.zeros_like(r)
-    gc = np.zeros_like(g)
-    bc = np.zeros_like(b)
-    rc[mask] = (maxc - r)[mask] / diff
-    gc[mask] = (maxc - g)[mask] / diff
-    bc[mask] = (maxc - b)[mask] / diff
-    r_condition = (r == maxc)
-    g_condition = (g == maxc)
-    hsv[..., 0] = np.select(
-        [r_condition, g_condition], [bc - gc, 2.0 + rc - bc], default=4.0 + gc - rc)
-    hsv[..., 0] = (hsv[..., 0] / 6.0) % 1.0
     return hsv
 
 
+def hsv_channels_to_rgb(h: ndarray, s: ndarray, v: ndarray, alpha: Optional[ndarray] = None) -> ndarray:
+    """
+    Returns an array [..., 3] of uints between 0 and 255 from arrays of hue and saturation (between 0.0 and 1.0) and
+    value (between 0.0 and 255.0). If an alpha channel (uint8) is given, it's included as a fourth channel.
+    """
+    # Translated from source of colorsys.hsv_to_rgb, giving exactly the same results. Each of the candidates for the
+    # channels is converted to uint8 first, and then each channel is picked out of them by the pixel's hue sector.
+    h6 = h * 6.0
+    i = h6.astype('uint8')
+    f = np.subtract(h6, i, out=h6)
+    scratch = np.empty_like(f)
+    candidates = {"v": v.astype('uint8')}
+    # p = v * (1.0 - s)
+    np.subtract(1.0, s, out=scratch)
+    candidates["p"] = np.multiply(v, scratch, out=scratch).astype('uint8')
+    # q = v * (1.0 - s * f)
+    np.multiply(s, f, out=scratch)
+    np.subtract(1.0, scratch, out=scratch)
+    candidates["q"] = np.multiply(v, scratch, out=scratch).astype('uint8')
+    # t = v * (1.0 - s * (1.0 - f))
+    np.subtract(1.0, f, out=scratch)
+    np.multiply(s, scratch, out=scratch)
+    np.subtract(1.0, scratch, out=scratch)
+    candidates["t"] = np.multiply(v, scratch, out=scratch).astype('uint8')
+
+    sector = np.remainder(i, 6, out=i)
+    sector[s == 0.0] = _GRAY_SECTOR
+    channels = [np.zeros(h.shape, dtype='uint8') for _ in range(3)]
+    picked = np.empty(h.shape, dtype='uint8')
+    for sector_index, sources in enumerate(_SECTOR_RGB_SOURCES):
+        in_sector = _byte_mask(sector == sector_index)
+        for channel, source in zip(channels, sources):
+            channel |= np.bitwise_and(candidates[source], in_sector, out=picked)
+    if alpha is not None:
+        channels.append(alpha)
+    return np.stack(channels, axis=-1)
+
+
 def hsv_to_rgb(hsv: ndarray) -> ndarray:
-    # Translated from source of colorsys.hsv_to_rgb
     # h,s should be a numpy arrays with values between 0.0 and 1.0
     # v should be a numpy array with values between 0.0 and 255.0
     # hsv_to_rgb returns an array of uints between 0 and 255.
-    rgb = np.empty_like(hsv)
-    rgb[..., 3:] = hsv[..., 3:]
-    h, s, v = hsv[..., 0], hsv[..., 1], hsv[..., 2]
-    i = (h * 6.0).astype('uint8')
-    f = (h * 6.0) - i
-    p = v * (1.0 - s)
-    q = v * (1.0 - s * f)
-    t = v * (1.0 - s * (1.0 - f))
-    i = i % 6
-    conditions = [s == 0.0, i == 1, i == 2, i == 3, i == 4, i == 5]
-    rgb[..., 0] = np.select(conditions, [v, q, p, p, t, v], default=v)
-    rgb[..., 1] = np.select(conditions, [v, v, v, q, p, p], default=t)
-    rgb[..., 2] = np.select(conditions, [v, p, t, v, v, q], default=p)
-    return rgb.astype('uint8')
+    rgb = np.empty(hsv.shape, dtype='uint8')
+    rgb[..., :3] = hsv_channels_to_rgb(hsv[..., 0], hsv[..., 1], hsv[..., 2])
+    rgb[..., 3:] = hsv[..., 3:].astype('uint8')
+    return rgb
 
 
 def rgb_to_mask(rgb: ndarray) -> ndarray:
@@ -1,11 +1,13 @@
 import json
-import os
 import random
 from pathlib import Path
+from typing import Optional
 
 from Class.openkhmod import ModAsset, ModSourceFile, StrDict, AssetPlatform, AssetMethod
+from Class.randomUtils import rng_or_shared
 from List import configDict
 from Module import appconfig
+from Module.cosmeticsmods.customlibrary import custom_library
 
 
 class Itempic:
@@ -53,7 +55,8 @@ class ItempicRandomizer:
         return itempic_list_file_path
 
     @staticmethod
-    def randomize_itempics(setting: str) -> list[ModAsset]:
+    def randomize_itempics(setting: str, rng: Optional[random.Random] = None) -> list[ModAsset]:
+        rng = rng_or_shared(rng)
         if setting == configDict.VANILLA:
             return []
 
@@ -81,21 +84,21 @@ class ItempicRandomizer:
         backup_files_by_categories: dict[str, list[ModSourceFile]] = {}
         for category, replacements in replacements_by_category.items():
             backup_files_by_categories[category] = replacements.copy()
-            random.shuffle(replacements)
+            rng.shuffle(replacements)
 
         assets: list[ModAsset] = []
 
         itempic_list_file_path = ItempicRandomizer.bootstrap_itempic_file()
         with open(itempic_list_file_path, encoding="utf-8") as itempic_list_file:
             itempic_metadata: list[StrDict] = json.load(itempic_list_file)
-        random.shuffle(itempic_metadata)
+        rng.shuffle(itempic_metadata)
         for info in itempic_metadata:
             itempic_id: str = info["id"]
             types: list[str] = [
                 item_type.lower() for item_type in info["type"] if item_type.lower() in replacements_by_category
             ]
             if len(types) > 0:
-                random.shuffle(types)
+                rng.shuffle(types)
 
                 for chosen_type in types:
                     itempics_for_chosen_type = replacements_by_category.get(chosen_type, [])
@@ -103,7 +106,7 @@ class ItempicRandomizer:
                     # Unlike the music rando we'll just always allow duplicate replacements here to simplify
                     if len(itempics_for_chosen_type) == 0:
                         refill_list = backup_files_by_categories.get(chosen_type, []).copy()
-                        random.shuffle(refill_list)
+                        rng.shuffle(refill_list)
                         replacements_by_category[chosen_type] = refill_list
                         itempics_for_chosen_type = refill_list
 
@@ -475,24 +478,19 @@ class ItempicRandomizer:
 
         custom_visuals_path = appconfig.read_custom_visuals_path()
         if custom_visuals_path is not None:
-            item_pictures_path = custom_visuals_path / ItempicRandomizer.directory_name()
-            if item_pictures_path.is_dir():
-                for child in [str(category_file).lower() for category_file in os.listdir(item_pictures_path)]:
-                    child_path = item_pictures_path / child
-                    if child_path.is_dir():
-                        category_pics: list[Path] = []
-                        for root, dirs, files in os.walk(child_path):
-                            root_path = Path(root)
-                            for file in files:
-                                _, extension = os.path.splitext(file)
-                                if extension.lower() == ".dds" or extension.lower() == ".png":
-                                    file_path = root_path / file
-                                    category_pics.append(file_path)
-                        resolved_category = child
-                        if not categorize:
-                            resolved_category = "wild"
-                        if resolved_category not in result:
-                            result[resolved_category] = []
-                        result[resolved_category] += category_pics
+            library = custom_library(custom_visuals_path)
+            item_pictures_folder = ItempicRandomizer.directory_name()
+            for category_folder in library.folders(item_pictures_folder):
+                category_pics: list[Path] = []
+                for file in library.walk_files(item_pictures_folder, category_folder):
+                    extension = file.suffix.lower()
+                    if extension == ".dds" or extension == ".png":
+                        category_pics.append(file.path)
+                resolved_category = category_folder.lower()
+                if not categorize:
+                    resolved_category = "wild"
+                if resolved_category not in result:
+                    result[resolved_category] = []
+                result[resolved_category] += category_pics
 
         return result
@@ -11,8 +11,10 @@ from PIL import Image
 from Class.exceptions import GeneratorException
 from Class.openkhmod import AssetPlatform, BinarcMethod, ModAsset, ModBinarcSource, ModSourceFile, StrDict, \
     ObjectEntries
+from Class.randomUtils import rng_or_shared
 from List import configDict
 from Module import appconfig
+from Module.cosmeticsmods.customlibrary import custom_library
 from Module.cosmeticsmods.openkh import BinaryArchiver
 from Module.paths import child_with_extension, children_with_extension
 from Module.resources import resource_path
@@ -574,8 +576,15 @@ class KeybladeRandomizer:
         if custom_visuals_path is None:
             return []
 
-        custom_keys_path = custom_visuals_path / KeybladeRandomizer.directory_name()
-        return KeybladeRandomizer._collect_keyblades(custom_keys_path)
+        result: list[ReplacementKeyblade] = []
+        library = custom_library(custom_visuals_path)
+        keyblades_folder = KeybladeRandomizer.directory_name()
+        for keyblade_folder in library.folders(keyblades_folder):
+            for file in library.files(keyblades_folder, keyblade_folder):
+                if file.path.name == "keyblade.json":
+                    result.append(ReplacementKeyblade(keyblade_folder, file.path.parent, file.path))
+                    break
+        return result
 
     @staticmethod
     def randomize_keyblades(
@@ -583,7 +592,9 @@ class KeybladeRandomizer:
             include_effects: bool,
             allow_duplicate_replacement: bool,
             replace_goa_keyblades: bool,
+            rng: Optional[random.Random] = None,
     ) -> KeybladeRandomizerResult:
+        rng = rng_or_shared(rng)
         result = KeybladeRandomizerResult()
 
         if setting == configDict.VANILLA:
@@ -600,17 +611,17 @@ class KeybladeRandomizer:
 
         replacement_keys = replacement_keys.copy()
         backup_keys = replacement_keys.copy()
-        random.shuffle(replacement_keys)
+        rng.shuffle(replacement_keys)
 
         vanilla_keys = vanilla_keyblades()
-        random.shuffle(vanilla_keys)
+        rng.shuffle(vanilla_keys)
         for vanilla_key in vanilla_keys:
             vanilla_paths = VanillaKeybladePaths.for_vanilla_key(vanilla_key)
 
             if len(replacement_keys) == 0:
                 if allow_duplicate_replacement:
                     replacement_keys = backup_keys.copy()
-                    random.shuffle(replacement_keys)
+                    rng.shuffle(replacement_keys)
                 else:
                     break
 
@@ -654,12 +665,12 @@ class KeybladeRandomizer:
         add_on_variants = [KeybladeModelVariant.BASE, KeybladeModelVariant.NIGHTMARE, KeybladeModelVariant.TRON]
 
         add_on_keys = add_on_keyblades()
-        random.shuffle(add_on_keys)
+        rng.shuffle(add_on_keys)
         for add_on_key in add_on_keys:
             if len(replacement_keys) == 0:
                 if allow_duplicate_replacement:
                     replacement_keys = backup_keys.copy()
-                    random.shuffle(replacement_keys)
+                    rng.shuffle(replacement_keys)
                 else:
                     break
 
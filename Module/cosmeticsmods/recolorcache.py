@@ -0,0 +1,236 @@
+"""
+Cache of recolored textures, shared by every seed generated on this machine.
+
+Each recolored texture is stored under a key made from everything that went into it: the contents of the source texture,
+the recolor definitions applied to it (along with the contents of any mask files they use), and the output format. A
+manifest in the cache folder records each entry's size and content hash and when it was last used, as well as the
+content hashes of source files (so that unchanged files don't need to be hashed again).
+
+Once a recolor run is done, the least recently used entries are removed until the cache is back under its size cap.
+Entries used by that run are never removed, since the mod being generated still needs them.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+# Change this whenever recoloring starts producing different output for the same inputs
+RECOLOR_CACHE_VERSION = 1
+DEFAULT_MAX_CACHE_BYTES = 2 * 1024 * 1024 * 1024
+
+_MANIFEST_FILENAME = "manifest.json"
+_ENTRY_FILENAME_PATTERN = re.compile(r"([0-9a-f]{32})\.\w+")
+# Recolors that were stopped partway through leave temporary files behind (unless they're still being written)
+_STALE_TEMP_FILE_SECONDS = 24 * 60 * 60
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class RecolorCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    total_bytes: int
+
+
+class RecolorCache:
+    """Recolored textures in a cache folder, found by key. See the module description."""
+
+    def __init__(self, folder: Path, max_bytes: int = DEFAULT_MAX_CACHE_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Key to the entry's file name, size, modification time, content hash, and last used time
+        self._entries: dict[str, dict[str, Any]] = {}
+        # Path to the (size, modification time, content hash) it had when last hashed
+        self._file_hashes: dict[str, tuple[int, int, str]] = {}
+        self._used: set[str] = set()
+        self._removed: set[str] = set()
+        self._load()
+
+    def _read_manifest(self) -> dict[str, Any]:
+        try:
+            with open(self.folder / _MANIFEST_FILENAME) as manifest_file:
+                manifest = json.load(manifest_file)
+            if manifest.get("version") == RECOLOR_CACHE_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _load(self):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        manifest = self._read_manifest()
+        self._entries = manifest.get("entries", {})
+        self._file_hashes = {path: tuple(file_hash) for path, file_hash in manifest.get("files", {}).items()}
+
+        now = time.time()
+        for path in self.folder.iterdir():
+            if path.is_dir():
+                # Recolors from before there was a manifest are in a folder per model, and can't be safely reused
+                shutil.rmtree(path, ignore_errors=True)
+            elif path.name.startswith("."):
+                if now - path.stat().st_mtime > _STALE_TEMP_FILE_SECONDS:
+                    path.unlink(missing_ok=True)
+            else:
+                match = _ENTRY_FILENAME_PATTERN.fullmatch(path.name)
+                if match is not None and match.group(1) not in self._entries:
+                    # Finished by a run that didn't get to update the manifest (it was cancelled, or another process
+                    # wrote the manifest at the same time). Entries are only ever written under their key by renaming a
+                    # complete file into place, so these are safe to keep.
+                    self._add_entry(match.group(1), path, last_used=path.stat().st_mtime)
+
+    def file_hash(self, path: Path) -> str:
+        """Returns the content hash of a file, only reading the file if it has changed since it was last hashed."""
+        path_key = str(Path(path).absolute())
+        stat = os.stat(path_key)
+        known = self._file_hashes.get(path_key)
+        if known is not None and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+        file_hash = _file_sha256(Path(path_key))
+        self._file_hashes[path_key] = (stat.st_size, stat.st_mtime_ns, file_hash)
+        return file_hash
+
+    def key(
+            self,
+            source_path: Path,
+            recolor_data: Any,
+            dependency_paths: list[Path],
+            output_extension: str,
+    ) -> str:
+        """
+        Returns the key for recoloring the source texture as described by recolor_data (anything that can be written as
+        JSON), using the files at dependency_paths (mask files, for example), and saving it in the given format.
+        """
+        key_data = {
+            "version": RECOLOR_CACHE_VERSION,
+            "source": self.file_hash(source_path),
+            "recolor": recolor_data,
+            "dependencies": [self.file_hash(path) for path in dependency_paths],
+            "format": output_extension.lower(),
+        }
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode()).hexdigest()[:32]
+
+    def entry_path(self, key: str, output_extension: str) -> Path:
+        """Where the recolored texture for the key is (or should be) saved."""
+        return self.folder / f"{key}{output_extension.lower()}"
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """
+        Returns the path of the cached recolor for the key, or None if there isn't one. Entries whose file has gone
+        missing or changed since it was cached are removed.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            path = self.folder / entry["file"]
+            try:
+                stat = path.stat()
+                intact = stat.st_size == entry["size"] and stat.st_mtime_ns == entry["modified"]
+            except FileNotFoundError:
+                intact = False
+            if intact:
+                self.hits += 1
+                entry["last_used"] = time.time()
+                self._used.add(key)
+                return path
+            self._remove_entry(key)
+        self.misses += 1
+        return None
+
+    def add(self, key: str, path: Path):
+        """Adds a newly generated recolor (already saved at entry_path) under the key."""
+        self._add_entry(key, path, last_used=time.time())
+        self._used.add(key)
+
+    def _add_entry(self, key: str, path: Path, last_used: float):
+        stat = path.stat()
+        self._entries[key] = {
+            "file": path.name,
+            "size": stat.st_size,
+            "modified": stat.st_mtime_ns,
+            "sha256": _file_sha256(path),
+            "last_used": last_used,
+        }
+        self._removed.discard(key)
+
+    def _remove_entry(self, key: str):
+        entry = self._entries.pop(key)
+        (self.folder / entry["file"]).unlink(missing_ok=True)
+        self._removed.add(key)
+
+    def verify(self) -> int:
+        """Checks the content hash of every entry, removing any that don't match. Returns the number removed."""
+        corrupt = [
+            key for key, entry in self._entries.items()
+            if not (self.folder / entry["file"]).is_file() or _file_sha256(self.folder / entry["file"]) != entry["sha256"]
+        ]
+        for key in corrupt:
+            self._remove_entry(key)
+        return len(corrupt)
+
+    def finish(self, max_bytes: Optional[int] = None):
+        """
+        Removes the least recently used entries (other than the ones used since this cache was loaded) until the cache
+        is at most max_bytes (or the cache's own cap, if not given), and saves the manifest.
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        total_bytes = self.total_bytes()
+        evictable = sorted(
+            (key for key in self._entries if key not in self._used), key=lambda key: self._entries[key]["last_used"]
+        )
+        for key in evictable:
+            if total_bytes <= max_bytes:
+                break
+            total_bytes -= self._entries[key]["size"]
+            self._remove_entry(key)
+            self.evictions += 1
+        self._save()
+
+    def _save(self):
+        # Another process may have added entries since this one loaded the manifest
+        for key, entry in self._read_manifest().get("entries", {}).items():
+            if key not in self._entries and key not in self._removed and (self.folder / entry["file"]).is_file():
+                self._entries[key] = entry
+
+        manifest = {
+            "version": RECOLOR_CACHE_VERSION,
+            "entries": self._entries,
+            "files": self._file_hashes,
+        }
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.folder, prefix=".manifest-", suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "w") as temp_file:
+                json.dump(manifest, temp_file)
+            os.replace(temp_path, self.folder / _MANIFEST_FILENAME)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def total_bytes(self) -> int:
+        return sum(entry["size"] for entry in self._entries.values())
+
+    def stats(self) -> RecolorCacheStats:
+        return RecolorCacheStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            entries=len(self._entries),
+            total_bytes=self.total_bytes(),
+        )
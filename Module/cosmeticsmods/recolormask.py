@@ -0,0 +1,186 @@
+"""
+Masks of the areas of a texture to recolor, as bool ndarray [y, x] where the value is True for any pixels that are part
+of the mask.
+
+Mask files ship as gzipped text: a "y,x" first line, and then a line for each row where any character other than a space
+is part of the mask. These are small, but slow to decode, so each one is converted (once) into a packed-bit file in the
+mask cache folder: a header, and then the rows of the mask packed with np.packbits. Packed files are memory-mapped when
+read. On top of that, MaskCache keeps every mask it has read for the rest of the process, keyed by the mask file's path
+and modification time.
+"""
+import glob
+import gzip
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from numpy import ndarray
+
+# magic, y dimension, x dimension
+_PACKED_HEADER = struct.Struct("<4sII")
+_PACKED_MAGIC = b"KHMK"
+PACKED_MASK_EXTENSION = ".pmask"
+
+
+@dataclass(frozen=True)
+class PackedMask:
+    """A mask with 8 pixels to a byte. Each row is padded out to a whole number of bytes."""
+    bits: ndarray
+    x_dimension: int
+
+    @staticmethod
+    def pack(mask: ndarray) -> "PackedMask":
+        return PackedMask(np.packbits(mask, axis=1), mask.shape[1])
+
+    def unpack(self) -> ndarray:
+        # unpackbits only gives 0s and 1s, which can be viewed as bools without a copy
+        return np.unpackbits(self.bits, axis=1, count=self.x_dimension).view(bool)
+
+
+def read_text_mask(mask_file_path: Path) -> ndarray:
+    """Decodes a (gzipped text) mask file."""
+    with gzip.open(mask_file_path) as mask_file:
+        first_line = mask_file.readline().decode()
+        y_dimension_str, x_dimension_str = first_line.split(",")
+        y_dimension = int(y_dimension_str)
+        x_dimension = int(x_dimension_str)
+        rows = mask_file.read().split(b"\n")[:y_dimension]
+    pixels = b"".join(row[:x_dimension] for row in rows)
+    return np.frombuffer(pixels, dtype=np.uint8).reshape((y_dimension, x_dimension)) != ord(" ")
+
+
+def write_packed_mask(packed_mask_path: Path, mask: ndarray):
+    """Writes the mask as a packed-bit file. The file is written under a temporary name and then renamed into place."""
+    packed = PackedMask.pack(mask)
+    y_dimension, x_dimension = mask.shape
+    file_descriptor, temp_path = tempfile.mkstemp(dir=packed_mask_path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "wb") as temp_file:
+            temp_file.write(_PACKED_HEADER.pack(_PACKED_MAGIC, y_dimension, x_dimension))
+            temp_file.write(packed.bits.tobytes())
+        os.replace(temp_path, packed_mask_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def is_packed_mask_file(mask_file_path: Path) -> bool:
+    with open(mask_file_path, "rb") as mask_file:
+        return mask_file.read(len(_PACKED_MAGIC)) == _PACKED_MAGIC
+
+
+def read_packed_mask(packed_mask_path: Path) -> PackedMask:
+    """Memory-maps a packed-bit mask file."""
+    with open(packed_mask_path, "rb") as packed_file:
+        magic, y_dimension, x_dimension = _PACKED_HEADER.unpack(packed_file.read(_PACKED_HEADER.size))
+    if magic != _PACKED_MAGIC:
+        raise ValueError(f"{packed_mask_path} is not a packed mask file")
+    bits = np.memmap(
+        packed_mask_path,
+        dtype=np.uint8,
+        mode="r",
+        offset=_PACKED_HEADER.size,
+        shape=(y_dimension, (x_dimension + 7) // 8),
+    )
+    return PackedMask(bits, x_dimension)
+
+
+class MaskCache:
+    """
+    Process-wide cache of masks, keyed by the mask file's path and modification time. Text mask files are converted into
+    packed-bit files in packed_folder the first time they're read (by any process), and those are read from then on.
+    Mask files that are already packed are read directly.
+    """
+
+    def __init__(self, packed_folder: Path):
+        self.packed_folder = packed_folder
+        self.hits = 0
+        self.misses = 0
+        # Path to the (modification time, packed mask) it had when read
+        self._masks: dict[str, tuple[int, PackedMask]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, mask_file_path: Path) -> ndarray:
+        """Returns the mask in the given mask file (in either format)."""
+        return self.packed(mask_file_path).unpack()
+
+    def packed(self, mask_file_path: Path) -> PackedMask:
+        mask_file_path = Path(mask_file_path).absolute()
+        path_key = str(mask_file_path)
+        modified = os.stat(mask_file_path).st_mtime_ns
+        with self._lock:
+            cached = self._masks.get(path_key)
+            if cached is not None and cached[0] == modified:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        if is_packed_mask_file(mask_file_path):
+            packed = read_packed_mask(mask_file_path)
+        else:
+            packed_mask_path = self.packed_mask_path(mask_file_path, modified)
+            if not packed_mask_path.is_file():
+                self.convert(mask_file_path, packed_mask_path)
+            packed = read_packed_mask(packed_mask_path)
+
+        with self._lock:
+            self._masks[path_key] = (modified, packed)
+        return packed
+
+    def packed_mask_path(self, mask_file_path: Path, modified: int) -> Path:
+        """
+        Where the text mask file is converted to. Including the modification time means that a packed file is never
+        replaced (which isn't possible on Windows while it's memory-mapped); an edited mask file gets a new one instead.
+        """
+        return self.packed_folder / f"{self._packed_mask_prefix(mask_file_path)}{modified}{PACKED_MASK_EXTENSION}"
+
+    @staticmethod
+    def _packed_mask_prefix(mask_file_path: Path) -> str:
+        path_digest = hashlib.sha1(str(mask_file_path).encode()).hexdigest()[:12]
+        return f"{mask_file_path.stem}-{path_digest}-"
+
+    def convert(self, mask_file_path: Path, packed_mask_path: Path):
+        """
+        Converts the text mask file into a packed-bit file at packed_mask_path, and removes the conversions of earlier
+        versions of the mask file.
+        """
+        packed_mask_path.parent.mkdir(parents=True, exist_ok=True)
+        write_packed_mask(packed_mask_path, read_text_mask(mask_file_path))
+
+        earlier_pattern = f"{glob.escape(self._packed_mask_prefix(mask_file_path))}*{PACKED_MASK_EXTENSION}"
+        for earlier_path in packed_mask_path.parent.glob(earlier_pattern):
+            if earlier_path != packed_mask_path:
+                try:
+                    earlier_path.unlink()
+                except OSError:
+                    # Still memory-mapped (on Windows), by this process or another one. It's removed by a later
+                    # conversion instead.
+                    pass
+
+    def convert_all(self, folder: Path) -> int:
+        """
+        Converts every text mask file (*.mask) in the folder and its subfolders that hasn't been converted yet, so that
+        none need converting while recoloring. Returns the number converted.
+        """
+        converted = 0
+        for mask_file_path in sorted(Path(folder).absolute().rglob("*.mask")):
+            if is_packed_mask_file(mask_file_path):
+                continue
+            packed_mask_path = self.packed_mask_path(mask_file_path, os.stat(mask_file_path).st_mtime_ns)
+            if not packed_mask_path.is_file():
+                self.convert(mask_file_path, packed_mask_path)
+                converted += 1
+        return converted
+
+    def clear(self):
+        with self._lock:
+            self._masks.clear()
+
+
+# Shared by every recolor in this process
+SHARED_MASK_CACHE = MaskCache(Path("cache/recolor-masks").absolute())
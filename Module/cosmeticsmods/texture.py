@@ -1,8 +1,7 @@
-import gzip
+import multiprocessing
 import os
 import random
-import shutil
-import string
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 from pathlib import Path, PurePath
 from typing import Any, Optional, Callable
 
@@ -13,19 +12,23 @@ from numpy import ndarray
 
 from Class import settingkey
 from Class.openkhmod import ModAsset, StrDict, AssetPlatform
+from Class.randomUtils import rng_or_shared
 from Class.seedSettings import SeedSettings
 from Module import version, appconfig
-from Module.cosmeticsmods.image import rgb_to_hsv, hsv_to_rgb
+from Module.cancellation import CancellationToken
+from Module.cosmeticsmods.image import rgb_to_hsv_channels, hsv_channels_to_rgb
+from Module.cosmeticsmods.recolorcache import RecolorCache
+from Module.cosmeticsmods.recolormask import SHARED_MASK_CACHE
 from Module.resources import resource_path
 
 VANILLA = "vanilla"
 RANDOM = "random"
-_HUE_INDEX = 0
-_SATURATION_INDEX = 1
-_VALUE_INDEX = 2
 _ALPHA_INDEX = 3
 
 MaskCondition = Callable[[tuple[int, int]], bool]
+# Called with (finished, total) as texture recolor jobs finish
+RecolorProgress = Callable[[int, int], None]
+# Called with either a single color component or an array of them (giving an array of results)
 ColorCondition = Callable[[Optional[float]], bool]
 
 # In most cases, the difference between 90-180 is pretty minimal (various degrees of blue-green), and including all of
@@ -67,12 +70,24 @@ class HsvaConditions:
             and self.value_condition(value) \
             and self.alpha_condition(alpha)
 
+    def matching_pixels(self, hues: ndarray, saturations: ndarray, values: ndarray, alphas: ndarray) -> ndarray:
+        """Returns an array that's True for each pixel whose color components match."""
+        result = self.hue_condition(hues) \
+            & self.saturation_condition(saturations) \
+            & self.value_condition(values) \
+            & self.alpha_condition(alphas)
+        if np.ndim(result) == 0:
+            # Only the default conditions, which don't look at the individual pixels
+            return np.full(hues.shape, bool(result))
+        return result
+
 
 class PixelMatchingConditions:
     """Conditions for matching pixels."""
 
     def __init__(self, masks: list[Optional[ndarray]], hsva_conditions: Optional[HsvaConditions]):
         super().__init__()
+        self.masks = masks
         self.mask_conditions: list[Optional[MaskCondition]] = []
         for mask in masks:
             self.mask_conditions.append(_make_mask_condition(mask))
@@ -101,6 +116,33 @@ class PixelMatchingConditions:
             else:
                 return hsva_conditions.matches(hue=hue, saturation=saturation, value=value, alpha=alpha)
 
+    def matching_pixels(
+            self,
+            group_index: int,
+            hues: ndarray,
+            saturations: ndarray,
+            values: ndarray,
+            alphas: ndarray,
+    ) -> ndarray:
+        """
+        Returns an array [x, y] that's True for each pixel that matches, the same as calling matches for every pixel.
+        """
+        mask: Optional[ndarray] = None
+        if group_index in range(len(self.masks)):
+            mask = self.masks[group_index]
+        if mask is not None:
+            x_dimension, y_dimension = hues.shape
+            mask_x_dimension, mask_y_dimension = mask.shape
+            if mask_x_dimension < x_dimension or mask_y_dimension < y_dimension:
+                raise IndexError(f"Mask of size {mask.shape} is smaller than the image ({hues.shape})")
+            return mask[:x_dimension, :y_dimension].astype(bool)
+        else:
+            hsva_conditions = self.hsva_conditions
+            if hsva_conditions is None:
+                return np.zeros(hues.shape, dtype=bool)
+            else:
+                return hsva_conditions.matching_pixels(hues=hues, saturations=saturations, values=values, alphas=alphas)
+
 
 class RecolorDefinition:
     """Defines how to recolor a portion of an image."""
@@ -199,46 +241,36 @@ def make_matching_conditions(
 
 def recolor_image(rgb_array: ndarray, recolor_definitions: list[RecolorDefinition], group_index: int) -> ndarray:
     """Applies recoloring(s) configured in recolor_definitions to the image represented by rgb_array"""
-    hsv_array = rgb_to_hsv(rgb_array)
-    
-    hues = hsv_array[..., _HUE_INDEX]
-    saturations = hsv_array[..., _SATURATION_INDEX]
-    values = hsv_array[..., _VALUE_INDEX]
-    alphas = hsv_array[..., _ALPHA_INDEX]
-
-    x_dimension, y_dimension, _ = hsv_array.shape
-    for x in range(x_dimension):
-        for y in range(y_dimension):
-            hue: Optional[float] = hues[x, y]
-            saturation: Optional[float] = saturations[x, y]
-            value: Optional[float] = values[x, y]
-            alpha: Optional[float] = alphas[x, y]
-            for recolor_definition in recolor_definitions:
-                matches = recolor_definition.conditions.matches(
-                    x=x,
-                    y=y,
-                    group_index=group_index,
-                    hue=hue,
-                    saturation=saturation,
-                    value=value,
-                    alpha=alpha,
-                )
-                if matches:
-                    hues[x, y] = recolor_definition.new_hue
-
-                    new_saturation = recolor_definition.new_saturation
-                    if new_saturation is not None:
-                        saturations[x, y] = new_saturation
-
-                    values[x, y] += recolor_definition.value_offset
-
-                    break
-
-    hsv_array[..., _HUE_INDEX] = hues
-    hsv_array[..., _SATURATION_INDEX] = saturations
-    hsv_array[..., _VALUE_INDEX] = values
-
-    return hsv_to_rgb(hsv_array)
+    hues, saturations, values = rgb_to_hsv_channels(rgb_array)
+    alphas = rgb_array[..., _ALPHA_INDEX]
+
+    # Every definition is matched against the original colors before any are recolored. A pixel matching more than one
+    # definition is recolored by the first one.
+    matching_pixels: list[ndarray] = [
+        recolor_definition.conditions.matching_pixels(
+            group_index=group_index,
+            hues=hues,
+            saturations=saturations,
+            values=values,
+            alphas=alphas,
+        )
+        for recolor_definition in recolor_definitions
+    ]
+    unmatched = np.ones(hues.shape, dtype=bool)
+    for recolor_definition, matches in zip(recolor_definitions, matching_pixels):
+        selected = matches & unmatched
+        unmatched &= ~matches
+
+        np.copyto(hues, recolor_definition.new_hue, where=selected)
+
+        new_saturation = recolor_definition.new_saturation
+        if new_saturation is not None:
+            np.copyto(saturations, new_saturation, where=selected)
+
+        if recolor_definition.value_offset != 0.0:
+            np.add(values, recolor_definition.value_offset, out=values, where=selected)
+
+    return hsv_channels_to_rgb(hues, saturations, values, alpha=alphas)
 
 
 class TextureRecolorSettings:
@@ -277,11 +309,165 @@ class TextureRecolorSettings:
         TextureRecolorSettings.texture_recolors_presets_folder().mkdir(parents=True, exist_ok=True)
 
 
+class RecolorJob:
+    """
+    One texture to recolor: the vanilla image, the recolors to apply to it, and where to save the result. Only holds
+    plain data (the pending recolors rather than their conditions) so that it can be sent to a worker process.
+    """
+
+    def __init__(
+            self,
+            source_path: Path,
+            pending_recolors: list[PendingRecolor],
+            group_index: int,
+            destination_path: Path,
+    ):
+        super().__init__()
+        self.source_path = source_path
+        self.pending_recolors = pending_recolors
+        self.group_index = group_index
+        self.destination_path = destination_path
+
+    def recolor_definitions(self, conditions_loader: "TextureConditionsLoader") -> list[RecolorDefinition]:
+        result: list[RecolorDefinition] = []
+        for pending_recolor in self.pending_recolors:
+            conditions = conditions_loader.conditions_from_colorable_area(
+                model_id=pending_recolor.model_id,
+                area_id=pending_recolor.area_id,
+                colorable_area=pending_recolor.colorable_area
+            )
+            result.append(RecolorDefinition(
+                conditions=conditions,
+                new_hue=pending_recolor.new_hue,
+                new_saturation=pending_recolor.new_saturation,
+                value_offset=pending_recolor.value_offset,
+            ))
+        return result
+
+    def run(self, conditions_loader: "TextureConditionsLoader") -> Path:
+        """Decodes, recolors, and encodes the texture, returning the destination path."""
+        destination_path = self.destination_path
+        destination_path.parent.mkdir(parents=True, exist_ok=True)
+
+        if version.debug_mode():
+            print(f"Generating texture recolor for {destination_path}")
+
+        with Image.open(self.source_path) as source_image:
+            image_array = np.array(source_image.convert("RGBA"))
+        recolored_array = recolor_image(image_array, self.recolor_definitions(conditions_loader), self.group_index)
+
+        # The destination path is how an already generated recolor is found again, so a partially written one (from a
+        # job that was stopped partway through) must never end up there
+        temp_path = destination_path.with_name(f".{destination_path.stem}-{os.getpid()}{destination_path.suffix}")
+        try:
+            Image.fromarray(recolored_array, "RGBA").save(temp_path)
+            os.replace(temp_path, destination_path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        return destination_path
+
+
+# Each worker process keeps its own cache of loaded conditions (and the masks they use)
+_worker_conditions_loader: Optional["TextureConditionsLoader"] = None
+
+
+def _run_recolor_job_in_worker(job: RecolorJob) -> Path:
+    global _worker_conditions_loader
+    if _worker_conditions_loader is None:
+        _worker_conditions_loader = TextureConditionsLoader()
+    return job.run(_worker_conditions_loader)
+
+
+class RecolorJobScheduler:
+    """
+    Runs texture recolor jobs across worker processes (one per CPU, unless max_workers is given).
+
+    The progress callback (if any) is called with (finished, total) each time a job finishes. The cancellation token
+    (if any) is checked between jobs: once cancelled, jobs that haven't started yet are dropped, the ones already
+    running are allowed to finish, and a CancelledException is raised. If a job fails, the same happens and its error is
+    raised instead. With a single worker, or when already running in a worker process (generating a batch of seeds, for
+    example), the jobs are run one after another in this process.
+    """
+
+    # How often to check for cancellation while waiting on running jobs
+    _CANCELLATION_POLL_SECONDS = 0.1
+
+    def __init__(
+            self,
+            conditions_loader: "TextureConditionsLoader",
+            max_workers: Optional[int] = None,
+            cancellation: Optional[CancellationToken] = None,
+            progress: Optional[RecolorProgress] = None,
+    ):
+        super().__init__()
+        self.conditions_loader = conditions_loader
+        self.max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self.cancellation = cancellation
+        self.progress = progress
+
+    def run(self, jobs: list[RecolorJob]) -> list[Path]:
+        """Runs the jobs, returning their destination paths in the same order as the jobs."""
+        workers = min(self.max_workers, len(jobs))
+        if workers <= 1 or multiprocessing.parent_process() is not None:
+            return self._run_serially(jobs)
+        else:
+            return self._run_in_pool(jobs, workers)
+
+    def _check_cancelled(self):
+        if self.cancellation is not None:
+            self.cancellation.raise_if_cancelled()
+
+    def _job_finished(self, finished: int, total: int):
+        if self.progress is not None:
+            self.progress(finished, total)
+
+    def _run_serially(self, jobs: list[RecolorJob]) -> list[Path]:
+        results: list[Path] = []
+        for job in jobs:
+            self._check_cancelled()
+            results.append(job.run(self.conditions_loader))
+            self._job_finished(len(results), len(jobs))
+        return results
+
+    def _run_in_pool(self, jobs: list[RecolorJob], workers: int) -> list[Path]:
+        results: list[Optional[Path]] = [None] * len(jobs)
+        finished = 0
+        # Only a few jobs are handed to the pool at a time, so that cancelling doesn't have to wait on a long queue
+        next_job = 0
+        running: dict[Future, int] = {}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            try:
+                while finished < len(jobs):
+                    self._check_cancelled()
+                    while next_job < len(jobs) and len(running) < workers * 2:
+                        running[executor.submit(_run_recolor_job_in_worker, jobs[next_job])] = next_job
+                        next_job += 1
+                    done, _ = wait(running, timeout=self._CANCELLATION_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[running.pop(future)] = future.result()
+                        finished += 1
+                        self._job_finished(finished, len(jobs))
+            except BaseException:
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+        return results
+
+
 class TextureRecolorizer:
 
-    def __init__(self, settings: SeedSettings):
+    def __init__(
+            self,
+            settings: SeedSettings,
+            rng: Optional[random.Random] = None,
+            cancellation: Optional[CancellationToken] = None,
+            progress: Optional[RecolorProgress] = None,
+    ):
         super().__init__()
         self.settings = settings
+        self.rng = rng_or_shared(rng)
+        self.cancellation = cancellation
+        self.progress = progress
         self.recolor_settings = TextureRecolorSettings(settings.get(settingkey.TEXTURE_RECOLOR_SETTINGS))
 
     @staticmethod
@@ -309,18 +495,7 @@ class TextureRecolorizer:
         """
         Decodes a mask file into ndarray [y, x] where the value is True for any pixels that are part of the mask.
         """
-        with gzip.open(mask_file_path) as mask_file:
-            first_line = mask_file.readline().decode()
-            y_dimension_str, x_dimension_str = first_line.split(",")
-            y_dimension = int(y_dimension_str)
-            x_dimension = int(x_dimension_str)
-            mask = np.zeros((y_dimension, x_dimension), dtype="bool")
-            for y in range(y_dimension):
-                line = mask_file.readline().decode()
-                for x in range(x_dimension):
-                    if line[x] != ' ':
-                        mask[y, x] = True
-            return mask
+        return SHARED_MASK_CACHE.load(mask_file_path)
 
     def recolor_textures(self) -> list[ModAsset]:
         """Returns a list of mod assets (if any) that recolor textures based on settings."""
@@ -339,10 +514,8 @@ class TextureRecolorizer:
             print("Could not find any recolor templates - not recoloring textures")
             return assets
 
-        recolors_cache_folder = Path("cache/texture-recolors").absolute()
-        if recolors_cache_folder.is_dir():
-            if not self.settings.get(settingkey.RECOLOR_TEXTURES_KEEP_CACHE):
-                shutil.rmtree(recolors_cache_folder)
+        recolor_cache = RecolorCache(Path("cache/texture-recolors").absolute())
+        keep_cache: bool = self.settings.get(settingkey.RECOLOR_TEXTURES_KEEP_CACHE)
 
         compress_textures: bool = self.settings.get(settingkey.RECOLOR_TEXTURES_COMPRESS)
         include_extra_textures: bool = self.settings.get(settingkey.RECOLOR_TEXTURES_INCLUDE_EXTRAS)
@@ -351,35 +524,26 @@ class TextureRecolorizer:
 
         import time    
         start_time = time.perf_counter_ns()
-        pooled_job_data = []
+        recolor_jobs: list[RecolorJob] = []
+        recolor_job_keys: list[str] = []
 
         for model in recolorable_models:
             model_id: str = model["id"]
 
             model_version: int = model.get("version", 1)
-            model_version_suffix = ""
-            if model_version > 1:
-                model_version_suffix = f"-v{model_version}"
-
-            available_image_group_ids: list[str] = _available_group_ids()
-            model_cache_folder = recolors_cache_folder / model_id
 
             for recolor in model["recolors"]:
                 colorable_areas: list[StrDict] = recolor["colorable_areas"]
 
                 pending_recolors: list[PendingRecolor] = []
-                chosen_filename_hues: list[str] = []
 
                 for colorable_area in colorable_areas:
                     area_id: str = colorable_area["id"]
 
                     chosen_hue = self._choose_hue(model_id=model_id, area_id=area_id, colorable_area=colorable_area)
                     if chosen_hue < 0:  # Keep it vanilla
-                        chosen_filename_hues.append("v")
                         continue
 
-                    chosen_filename_hues.append(str(chosen_hue))
-
                     pending_recolor = PendingRecolor(
                         model_id=model_id,
                         area_id=area_id,
@@ -392,9 +556,6 @@ class TextureRecolorizer:
 
                 image_groups: list[StrDict] = recolor["image_groups"]
                 for index, image_group in enumerate(image_groups):
-                    # Each group gets a unique ID
-                    group_id = available_image_group_ids.pop(0)
-
                     group_images: list[PurePath]
                     if image_group["required"] or include_extra_textures:
                         group_images = [PurePath(image) for image in image_group["images"]]
@@ -403,7 +564,6 @@ class TextureRecolorizer:
 
                     if len(pending_recolors) == 0:
                         # Everything was vanilla for this group, can save a little time and space by doing nothing
-                        # (but we still need the pop above to make sure the group IDs still line up)
                         continue
 
                     # Safeguard and make sure there's at least one of the original images in the group present
@@ -418,14 +578,31 @@ class TextureRecolorizer:
                         print(f"Could not find one of the vanilla images to recolor for {model_id}, skipping")
                         continue
 
-                    combined_hues = "-".join(chosen_filename_hues)
-
                     cached_extension = group_images[0].suffix
                     if compress_textures:
                         cached_extension = ".png"
 
-                    destination_name = f"{model_id}{model_version_suffix}-{group_id}-{combined_hues}{cached_extension}"
-                    destination_path = model_cache_folder / destination_name
+                    recolor_key = recolor_cache.key(
+                        source_path=original_image_path,
+                        recolor_data=_recolor_key_data(model_id, model_version, index, pending_recolors),
+                        dependency_paths=_mask_file_paths(pending_recolors),
+                        output_extension=cached_extension,
+                    )
+                    destination_path = recolor_cache.lookup(recolor_key)
+                    if destination_path is not None:
+                        if version.debug_mode():
+                            print(f"Already generated texture recolor for {model_id} at {destination_path}")
+                    else:
+                        destination_path = recolor_cache.entry_path(recolor_key, cached_extension)
+                        # The full RecolorDefinitions aren't created until the job runs. This allows us to avoid the
+                        # overhead of loading mask files for textures that were already generated.
+                        recolor_jobs.append(RecolorJob(
+                            source_path=original_image_path,
+                            pending_recolors=pending_recolors,
+                            group_index=index,
+                            destination_path=destination_path,
+                        ))
+                        recolor_job_keys.append(recolor_key)
 
                     assets.append(ModAsset.make_copy_asset(
                         game_files=group_images,
@@ -433,53 +610,22 @@ class TextureRecolorizer:
                         source_file=destination_path,
                     ))
 
-                    if destination_path.is_file():
-                        if version.debug_mode():
-                            print(f"Already generated texture recolor for {destination_path}")
-                        continue
-
-                    # We deliberately delay creating the full RecolorDefinitions until we know for sure we will need
-                    # them. This allows us to avoid the overhead of loading mask files as long as possible.
-                    recolor_definitions: list[RecolorDefinition] = []
-                    for pending_recolor in pending_recolors:
-                        conditions = conditions_loader.conditions_from_colorable_area(
-                            model_id=pending_recolor.model_id,
-                            area_id=pending_recolor.area_id,
-                            colorable_area=pending_recolor.colorable_area
-                        )
-                        recolor_definitions.append(RecolorDefinition(
-                            conditions=conditions,
-                            new_hue=pending_recolor.new_hue,
-                            new_saturation=pending_recolor.new_saturation,
-                            value_offset=pending_recolor.value_offset,
-                        ))
-
-                    pooled_job_data.append((original_image_path, recolor_definitions, index, destination_path))
-
-        # original_image_path, recolor_definitions, group_index, destination_path
-        for arg_tuple in pooled_job_data:
-            # def recolor_wrapper(arg_tuple):
-            # Use the found image in the group as the canonical representation
-            original_image_path = arg_tuple[0]
-            recolor_definitions = arg_tuple[1]
-            index = arg_tuple[2]
-            destination_path = arg_tuple[3]
-
-            destination_path.parent.mkdir(parents=True, exist_ok=True)
-
-            if version.debug_mode():
-                print(f"Generating texture recolor for {destination_path}")
-
-            image_array = np.array(Image.open(original_image_path).convert("RGBA"))
-            recolored_array = recolor_image(image_array, recolor_definitions, group_index=index)
-            Image.fromarray(recolored_array, "RGBA").save(destination_path)
-
-        # TODO(zaktherobot) Threading disables ability to preemptively stop
-        # with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
-        #     executor.map(recolor_wrapper,pooled_job_data)
+        scheduler = RecolorJobScheduler(
+            conditions_loader,
+            cancellation=self.cancellation,
+            progress=self.progress,
+        )
+        try:
+            for recolor_key, destination_path in zip(recolor_job_keys, scheduler.run(recolor_jobs)):
+                recolor_cache.add(recolor_key, destination_path)
+        finally:
+            # Without keeping the cache, only the textures for this mod are kept
+            recolor_cache.finish(max_bytes=None if keep_cache else 0)
 
         end_time = time.perf_counter_ns()
         print(f"Total Time {(end_time-start_time)/1e9} s")
+        if version.debug_mode():
+            print(f"Texture recolor cache: {recolor_cache.stats()}")
 
         return assets
 
@@ -493,9 +639,9 @@ class TextureRecolorizer:
             if "new_saturation" in colorable_area:
                 # Want to leave the opportunity there for it to "roll vanilla" which wouldn't otherwise be possible
                 # with the application of a new saturation
-                return random.choice([-1] + available_random_hues)
+                return self.rng.choice([-1] + available_random_hues)
             else:
-                return random.choice(available_random_hues)
+                return self.rng.choice(available_random_hues)
         else:
             return int(area_setting)
 
@@ -512,30 +658,53 @@ def _hue_in_range_condition(hue_start: float, hue_end: float) -> ColorCondition:
     start_ratio = hue_start / 360.0
     end_ratio = hue_end / 360.0
     if start_ratio > end_ratio:
-        return lambda hue_value: hue_value >= start_ratio or hue_value <= end_ratio
+        return lambda hue_value: (hue_value >= start_ratio) | (hue_value <= end_ratio)
     else:
-        return lambda hue_value: start_ratio <= hue_value <= end_ratio
+        return lambda hue_value: (start_ratio <= hue_value) & (hue_value <= end_ratio)
 
 
 def _saturation_in_range_condition(saturation_start: float, saturation_end: float) -> ColorCondition:
     start_ratio = saturation_start / 100.0
     end_ratio = saturation_end / 100.0
-    return lambda saturation_value: start_ratio <= saturation_value <= end_ratio
+    return lambda saturation_value: (start_ratio <= saturation_value) & (saturation_value <= end_ratio)
 
 
 def _value_in_range_condition(value_start: float, value_end: float) -> ColorCondition:
     # Of note: looks like value isn't a 0-1 like the others, just seems to go 0-256?
     adjusted_start = value_start / 100.0 * 256.0
     adjusted_end = value_end / 100.0 * 256.0
-    return lambda value_value: adjusted_start <= value_value <= adjusted_end
-
-
-def _available_group_ids() -> list[str]:
-    # Gives us a-z, aa-az, ba-bz, and so on - should be more than enough
-    ascii_characters = string.ascii_lowercase
-    result: list[str] = [c for c in ascii_characters]
-    for c in ascii_characters:
-        result.extend(f"{c}{c2}" for c2 in ascii_characters)
+    return lambda value_value: (adjusted_start <= value_value) & (value_value <= adjusted_end)
+
+
+def _recolor_key_data(
+        model_id: str,
+        model_version: int,
+        group_index: int,
+        pending_recolors: list[PendingRecolor]
+) -> StrDict:
+    return {
+        "model": model_id,
+        "model_version": model_version,
+        "group_index": group_index,
+        "areas": [
+            {
+                "colorable_area": pending_recolor.colorable_area,
+                "new_hue": pending_recolor.new_hue,
+                "new_saturation": pending_recolor.new_saturation,
+                "value_offset": pending_recolor.value_offset,
+            }
+            for pending_recolor in pending_recolors
+        ],
+    }
+
+
+def _mask_file_paths(pending_recolors: list[PendingRecolor]) -> list[Path]:
+    result: list[Path] = []
+    for pending_recolor in pending_recolors:
+        for mask_file_str in pending_recolor.colorable_area.get("mask_files", []):
+            mask_file_path = Path(resource_path(mask_file_str))
+            if mask_file_path.is_file():
+                result.append(mask_file_path)
     return result
 
 
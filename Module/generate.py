@@ -1,78 +1,223 @@
-from typing import List
+import io
+import random
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, List, Optional, TypeVar
 
-from Class.exceptions import RandomizerExceptions
-from Class.randomUtils import random_seed_name
-from Class.seedSettings import ExtraConfigurationData
+from Class.exceptions import GeneratorException, HintException, RandomizerExceptions, SettingsException
+from Class.newLocationClass import KH2Location
+from Class.randomUtils import random_seed_name, unseeded_rng
+from Class.seedSettings import ExtraConfigurationData, SeedSettings
 from Module.RandomizerSettings import RandomizerSettings
-from Module.hints import Hints
+from Module.cancellation import CancellationToken
+from Module.hints import Hints, HintData
 from Module.multiworld import MultiWorld, MultiWorldConfig
 from Module.newRandomize import Randomizer
 from Module.seedEvaluation import LocationInformedSeedValidator
-from Module.zipper import SeedZip, SeedZipResult
+from Module.seedshare import SharedSeed
+from Module.spoilerLog import SpoilerLog
+from Module.tourneySpoiler import TourneySeedSaver
+from Module.version import LOCAL_UI_VERSION
+from Module.zipper import SeedZip, SeedZipResult, ZipOutput
 
+T = TypeVar("T")
 
-def generateSeed(
-    settings: RandomizerSettings, extra_data: ExtraConfigurationData
-) -> SeedZipResult:
-    last_errors = []
-    for attempt in range(50):
-        newSeedValidation = LocationInformedSeedValidator()
+
+class GenerationPhase(Enum):
+    PLACEMENT = "Item placement"
+    VALIDATION = "Seed validation"
+    HINTS = "Hints"
+    OUTPUT = "Seed output"
+
+
+# What to suggest when generation gives up after failing in a given phase
+_INFEASIBLE_ADVICE: dict[GenerationPhase, str] = {
+    GenerationPhase.PLACEMENT: "Try loosening the item placement settings (item depths, chain logic, or the number of "
+                               "enabled worlds and locations).",
+    GenerationPhase.VALIDATION: "Try loosening the item placement settings or the item accessibility setting.",
+    GenerationPhase.HINTS: "Try a different hint system or fewer hintable items.",
+    GenerationPhase.OUTPUT: "Try turning off boss/enemy randomization or custom cosmetics.",
+}
+
+
+@dataclass
+class PhaseStats:
+    """Attempt counts, failures, and total time spent in one phase of generation."""
+    attempts: int = 0
+    failures: int = 0
+    seconds: float = 0.0
+    failure_reasons: Counter = field(default_factory=Counter)
+
+
+class GenerationReport:
+    """Per-phase statistics for the generation of one seed, including any failed attempts."""
+
+    def __init__(self):
+        self.phases: dict[GenerationPhase, PhaseStats] = {phase: PhaseStats() for phase in GenerationPhase}
+        self.seed_attempts = 0
+        self.aborted_early = False
+
+    def summary(self) -> str:
+        lines = [f"Seed attempts: {self.seed_attempts}"]
+        for phase, stats in self.phases.items():
+            if stats.attempts == 0:
+                continue
+            lines.append(f"{phase.value}: {stats.attempts} attempts, {stats.failures} failed, {stats.seconds:.2f}s")
+            for reason, count in stats.failure_reasons.most_common(3):
+                lines.append(f"    {count}x {reason}")
+        return "\n".join(lines)
+
+
+def _failure_reason(error: Exception) -> str:
+    return " / ".join([str(error)] + getattr(error, "__notes__", []))
+
+
+class SeedGenerator:
+    """
+    Generates one seed, retrying with a new seed name when an attempt fails.
+
+    Hints are re-rolled on their own (up to max_hint_attempts times) before giving up on an attempt, since hint
+    generation doesn't change the item placement. A SettingsException can't be fixed by another seed name, so
+    generation stops at the first one. Otherwise, the failure that came up most is raised once every attempt has failed,
+    with a summary of the failures and a suggestion for what to change added to it as notes.
+    Per-phase attempt counts and timings are recorded into the report. The cancellation token (if any) is checked before
+    each phase.
+    """
+
+    def __init__(
+        self,
+        settings: RandomizerSettings,
+        verbose: bool = True,
+        max_attempts: int = 50,
+        max_hint_attempts: int = 3,
+        report: Optional[GenerationReport] = None,
+        cancellation: Optional[CancellationToken] = None,
+    ):
+        self.settings = settings
+        self.verbose = verbose
+        self.max_attempts = max_attempts
+        self.max_hint_attempts = max_hint_attempts
+        self.report = report if report is not None else GenerationReport()
+        self.cancellation = cancellation
+        # how each failed attempt ended up failing, as (phase, reason, error)
+        self._failures: list[tuple[GenerationPhase, str, Exception]] = []
+        self._last_failure: Optional[tuple[GenerationPhase, str, Exception]] = None
+
+    def generate(self, output: Callable[[Randomizer, dict[KH2Location, int], HintData, random.Random], T]) -> T:
+        settings = self.settings
+        for attempt in range(self.max_attempts):
+            self.report.seed_attempts += 1
+            rng = settings.create_seeded_rng()
+            validator = LocationInformedSeedValidator(rng)
+            try:
+                randomizer = self._run_phase(
+                    GenerationPhase.PLACEMENT, lambda: Randomizer(settings, attempt_number=attempt, rng=rng)
+                )
+                location_spheres = self._run_phase(
+                    GenerationPhase.VALIDATION, lambda: validator.validate_seed(settings, randomizer, self.verbose)
+                )
+                hints = self._generate_hints(randomizer, rng)
+                return self._run_phase(GenerationPhase.OUTPUT, lambda: output(randomizer, location_spheres, hints, rng))
+            except RandomizerExceptions as e:
+                self._failures.append(self._last_failure)
+                if isinstance(e, SettingsException):
+                    # The same settings fail the same way whatever the seed name is
+                    self.report.aborted_early = True
+                    e.add_note(_INFEASIBLE_ADVICE[self._last_failure[0]])
+                    raise
+                settings.random_seed = random_seed_name(rng)
+                settings.create_full_seed_string()
+                continue
+        raise self._most_common_failure()
+
+    def _run_phase(self, phase: GenerationPhase, action: Callable[[], T]) -> T:
+        if self.cancellation is not None:
+            self.cancellation.raise_if_cancelled()
+        stats = self.report.phases[phase]
+        stats.attempts += 1
+        start = time.perf_counter()
         try:
-            randomizer = Randomizer(settings,attempt_number=attempt)
-            location_spheres = newSeedValidation.validate_seed(
-                settings, randomizer
-            )
-            # hints = Hints.generate_hints(randomizer, settings)
-            hints = Hints.generate_hints_v2(randomizer, settings)
-            zipper = SeedZip(
-                settings, randomizer, hints, extra_data, location_spheres
-            )
-            return zipper.create_zip()
+            return action()
         except RandomizerExceptions as e:
-            settings.random_seed = random_seed_name()
-            settings.create_full_seed_string()
-            last_errors.append(e)
-            continue
-    raise max(set(last_errors), key=last_errors.count)
+            reason = _failure_reason(e)
+            stats.failures += 1
+            stats.failure_reasons[reason] += 1
+            self._last_failure = (phase, reason, e)
+            raise
+        finally:
+            stats.seconds += time.perf_counter() - start
+
+    def _generate_hints(self, randomizer: Randomizer, rng: random.Random) -> HintData:
+        for hint_attempt in range(self.max_hint_attempts):
+            try:
+                return self._run_phase(
+                    GenerationPhase.HINTS, lambda: Hints.generate_hints_v2(randomizer, self.settings, rng)
+                )
+            except HintException:
+                if hint_attempt == self.max_hint_attempts - 1:
+                    raise
+
+    def _most_common_failure(self) -> Exception:
+        failure_counts = Counter((phase, reason) for phase, reason, _ in self._failures)
+        (most_common_phase, most_common_reason), _ = failure_counts.most_common(1)[0]
+        error = next(
+            error for phase, reason, error in reversed(self._failures)
+            if phase == most_common_phase and reason == most_common_reason
+        )
+        error.add_note(f"All {len(self._failures)} attempts failed:")
+        for (phase, reason), count in failure_counts.most_common(3):
+            error.add_note(f"    {count}x {phase.value}: {reason}")
+        error.add_note(_INFEASIBLE_ADVICE[most_common_phase])
+        return error
+
+
+def generateSeed(
+    settings: RandomizerSettings,
+    extra_data: ExtraConfigurationData,
+    report: Optional[GenerationReport] = None,
+    output: Optional[ZipOutput] = None,
+    cancellation: Optional[CancellationToken] = None,
+) -> SeedZipResult:
+    def create_zip(randomizer: Randomizer, location_spheres, hints, rng: random.Random) -> SeedZipResult:
+        zipper = SeedZip(settings, randomizer, hints, extra_data, location_spheres, rng=rng)
+        return zipper.create_zip(output, cancellation=cancellation)
+
+    return SeedGenerator(settings, report=report, cancellation=cancellation).generate(create_zip)
 
 def generateSeedCLI(
-    settings: RandomizerSettings, extra_data: ExtraConfigurationData
-) -> str:
-    last_error = None
-    for attempt in range(50):
-        newSeedValidation = LocationInformedSeedValidator()
-        try:
-            randomizer = Randomizer(settings, attempt_number=attempt)
-            location_spheres = newSeedValidation.validate_seed(
-                settings, randomizer, False
-            )
-            # hints = Hints.generate_hints(randomizer, settings)
-            hints = Hints.generate_hints_v2(randomizer, settings)
-            zipper = SeedZip(
-                settings, randomizer, hints, extra_data, location_spheres
-            )
-            return zipper.make_spoiler_without_zip()
-        except RandomizerExceptions as e:
-            settings.random_seed = random_seed_name()
-            settings.create_full_seed_string()
-            last_error = e
-            continue
-    raise last_error
+    settings: RandomizerSettings, extra_data: ExtraConfigurationData, report: Optional[GenerationReport] = None
+) -> SpoilerLog:
+    def create_spoiler(randomizer: Randomizer, location_spheres, hints, rng: random.Random) -> SpoilerLog:
+        zipper = SeedZip(settings, randomizer, hints, extra_data, location_spheres, rng=rng)
+        return zipper.make_spoiler_without_zip()
+
+    return SeedGenerator(settings, verbose=False, report=report).generate(create_spoiler)
 
 
 def generateMultiWorldSeed(
-    settingsSet: List[RandomizerSettings], extra_data: ExtraConfigurationData
+    settingsSet: List[RandomizerSettings],
+    extra_data: ExtraConfigurationData,
+    outputs: Optional[List[ZipOutput]] = None,
+    cancellation: Optional[CancellationToken] = None,
 ) -> list[SeedZipResult]:
     newSeedValidation = LocationInformedSeedValidator()
     randomizers = []
     unreachables = []
     last_error = None
+    rng = None
 
     for player_settings in settingsSet:
         for attempt in range(50):
+            if cancellation is not None:
+                cancellation.raise_if_cancelled()
+            rng = player_settings.create_seeded_rng()
             try:
                 last_error = None
-                randomizer = Randomizer(player_settings)
+                randomizer = Randomizer(player_settings, rng=rng)
                 unreachable = newSeedValidation.validate_seed(
                     player_settings, randomizer
                 )
@@ -81,7 +226,7 @@ def generateMultiWorldSeed(
 
                 break
             except RandomizerExceptions as e:
-                player_settings.random_seed = random_seed_name()
+                player_settings.random_seed = random_seed_name(rng)
                 player_settings.create_full_seed_string()
                 last_error = e
                 continue
@@ -89,16 +234,135 @@ def generateMultiWorldSeed(
             raise last_error
 
     # each individual randomization is done and valid, now we can mix the item pools
-    m = MultiWorld(randomizers, MultiWorldConfig(settingsSet[0]))
+    # (the rest of the choices continue from the last player's generator)
+    m = MultiWorld(randomizers, MultiWorldConfig(settingsSet[0]), rng)
 
+    if outputs is None:
+        outputs = [None] * len(settingsSet)
     seed_outputs: list[SeedZipResult] = []
-    for settings, randomizer, unreachable in zip(
-        settingsSet, randomizers, unreachables
+    for settings, randomizer, unreachable, output in zip(
+        settingsSet, randomizers, unreachables, outputs
     ):
-        hints = Hints.generate_hints_v2(randomizer, settings)
+        hints = Hints.generate_hints_v2(randomizer, settings, rng)
         zipper = SeedZip(
-            settings, randomizer, hints, extra_data, unreachable, m.multi_output
+            settings, randomizer, hints, extra_data, unreachable, m.multi_output, rng
         )
-        seed_outputs.append(zipper.create_zip())
+        seed_outputs.append(zipper.create_zip(output, cancellation=cancellation))
 
     return seed_outputs
+
+
+@dataclass(frozen=True)
+class BatchSeed:
+    """A seed generated as part of a batch."""
+    share_string: str
+    settings: RandomizerSettings
+    zip_data: Optional[io.BytesIO]
+    spoiler_log: Optional[SpoilerLog]
+    enemy_log: Optional[str]
+
+
+def _generate_batch_seed(
+    settings: RandomizerSettings, extra_data: ExtraConfigurationData, make_zip: bool, keep_zip: bool
+) -> tuple[RandomizerSettings, Optional[io.BytesIO], Optional[SpoilerLog], Optional[str]]:
+    # Runs in a worker process. The settings are handed back since generation may have changed the seed name.
+    if not make_zip:
+        spoiler_log = generateSeedCLI(settings, extra_data)
+        return settings, None, spoiler_log, None
+    elif keep_zip:
+        zip_data, spoiler_log, enemy_log = generateSeed(settings, extra_data)
+        return settings, zip_data, spoiler_log, enemy_log
+    else:
+        # The zip still has to be made (the boss/enemy spoilers come from making it), but it's thrown away as it's
+        # written rather than sent back
+        with tempfile.TemporaryFile(prefix="kh2rando-", suffix=".zip") as zip_file:
+            _, spoiler_log, enemy_log = generateSeed(settings, extra_data, output=zip_file)
+        return settings, None, spoiler_log, enemy_log
+
+
+def generate_batch(
+    settings_template: SeedSettings,
+    count: int,
+    workers: Optional[int] = None,
+    extra_data: Optional[ExtraConfigurationData] = None,
+    seed_names: Optional[list[str]] = None,
+    saver: Optional[TourneySeedSaver] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    make_zips: bool = True,
+    keep_zips: bool = True,
+) -> list[BatchSeed]:
+    """
+    Generates a batch of tourney seeds that all use the given settings, spread across worker processes.
+
+    If no seed names are given, random ones are chosen. See generate_batch_from_settings for the rest.
+    """
+    if seed_names is None:
+        seed_names = [random_seed_name(unseeded_rng) for _ in range(count)]
+    elif len(seed_names) != count:
+        raise GeneratorException(f"Expected {count} seed names but got {len(seed_names)}")
+    if extra_data is None:
+        extra_data = ExtraConfigurationData(platform="PC", tourney=True, custom_cosmetics_executables=[])
+
+    settings_string = settings_template.settings_string()
+    batch: list[tuple[str, RandomizerSettings]] = []
+    for seed_name in seed_names:
+        shared_seed = SharedSeed(
+            generator_version=LOCAL_UI_VERSION,
+            seed_name=seed_name,
+            spoiler_log=False,
+            settings_string=settings_string,
+            tourney_gen=True,
+        )
+        share_string = shared_seed.to_share_string()
+        settings = RandomizerSettings(seed_name, False, LOCAL_UI_VERSION, settings_template, share_string)
+        batch.append((share_string, settings))
+
+    return generate_batch_from_settings(batch, extra_data, workers, saver, progress, make_zips, keep_zips)
+
+
+def generate_batch_from_settings(
+    batch: list[tuple[str, RandomizerSettings]],
+    extra_data: ExtraConfigurationData,
+    workers: Optional[int] = None,
+    saver: Optional[TourneySeedSaver] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    make_zips: bool = True,
+    keep_zips: bool = True,
+) -> list[BatchSeed]:
+    """
+    Generates each (share string, settings) pair of the batch, spread across worker processes.
+
+    Without make_zips, only the spoiler logs are made (with no boss/enemy spoilers). Without keep_zips, the zips are
+    made but not kept, so each seed's zip_data is None.
+
+    Finished seeds are handed to the saver (if any) and reported to the progress callback as (finished, total). This
+    happens in batch order, so the results are the same as generating the seeds one after another. A single worker
+    generates the seeds in this process instead. If any seed can't be generated, the seeds that haven't started yet are
+    cancelled and the error is raised.
+    """
+    results: list[BatchSeed] = []
+
+    def finish(share_string: str, outputs: tuple):
+        finished_settings, zip_data, spoiler_log, enemy_log = outputs
+        results.append(BatchSeed(share_string, finished_settings, zip_data, spoiler_log, enemy_log))
+        if saver is not None:
+            saver.add_seed(share_string, finished_settings, spoiler_log)
+        if progress is not None:
+            progress(len(results), len(batch))
+
+    if workers == 1:
+        for share_string, settings in batch:
+            finish(share_string, _generate_batch_seed(settings, extra_data, make_zips, keep_zips))
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_generate_batch_seed, settings, extra_data, make_zips, keep_zips) for _, settings in batch
+        ]
+        try:
+            for (share_string, _), future in zip(batch, futures):
+                finish(share_string, future.result())
+        except BaseException:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    return results
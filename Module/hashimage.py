@@ -1,10 +1,20 @@
 import io
+import threading
+from collections import OrderedDict
 from pathlib import Path
 
 from PIL import Image
 
 from Module.resources import resource_path
 
+# Most recently generated images kept, by (icon names, use_bitmap)
+MAX_CACHED_HASH_IMAGES = 64
+
+# Decoded icons, by (icon name, use_bitmap), kept for the life of the process
+_icons: dict[tuple[str, bool], Image.Image] = {}
+_hash_images: OrderedDict[tuple[tuple[str, ...], bool], bytes] = OrderedDict()
+_lock = threading.Lock()
+
 
 def seed_hash_icon_path(icon_name: str, use_bitmap: bool = False) -> Path:
     icon_dir = Path(resource_path("static/icons/seed-hash-icons")).absolute()
@@ -14,43 +24,63 @@ def seed_hash_icon_path(icon_name: str, use_bitmap: bool = False) -> Path:
         return icon_dir / f"{icon_name}.png"
 
 
+def _seed_hash_icon(icon_name: str, use_bitmap: bool) -> Image.Image:
+    # Only called with the lock held
+    key = (icon_name, use_bitmap)
+    icon = _icons.get(key)
+    if icon is None:
+        with Image.open(seed_hash_icon_path(icon_name, use_bitmap)) as icon_file:
+            icon_file.load()
+            icon = icon_file.copy()
+        _icons[key] = icon
+    return icon
+
+
 def generate_seed_hash_image(icon_names: list[str], use_bitmap: bool) -> bytes:
     """
     Generates an image of the seed hash given a list of seed hash icon names. If use_bitmap is True, the image will
     have a black background and be returned as a bitmap. If use_bitmap is False, the image will have a transparent
     background and be returned as a PNG.
-    """
 
-    icon_paths: list[Path] = [seed_hash_icon_path(icon_name, use_bitmap) for icon_name in icon_names]
+    The same seed hash is usually asked for more than once (for the seed's zip and for a tourney seed list, for
+    example), so recently generated images are cached, as are the decoded icons.
+    """
+    key = (tuple(icon_names), use_bitmap)
+    with _lock:
+        image_data = _hash_images.get(key)
+        if image_data is not None:
+            _hash_images.move_to_end(key)
+            return image_data
 
-    # Adapted from https://stackoverflow.com/a/30228308
-    images = [Image.open(x) for x in icon_paths]
-    widths, heights = zip(*(i.size for i in images))
+        # Adapted from https://stackoverflow.com/a/30228308
+        images = [_seed_hash_icon(icon_name, use_bitmap) for icon_name in icon_names]
+        widths, heights = zip(*(i.size for i in images))
 
-    total_width = sum(widths)
-    max_height = max(heights)
+        total_width = sum(widths)
+        max_height = max(heights)
 
-    if use_bitmap:
-        stitched_image = Image.new('RGB', (total_width, max_height))
-    else:
-        stitched_image = Image.new('RGBA', (total_width, max_height))
+        if use_bitmap:
+            stitched_image = Image.new('RGB', (total_width, max_height))
+        else:
+            stitched_image = Image.new('RGBA', (total_width, max_height))
 
-    x_offset = 0
-    for image in images:
-        stitched_image.paste(image, (x_offset, 0))
-        x_offset += image.size[0]
+        x_offset = 0
+        for image in images:
+            stitched_image.paste(image, (x_offset, 0))
+            x_offset += image.size[0]
 
-    image_file = io.BytesIO()
-    if use_bitmap:
-        stitched_image.save(image_file, 'BMP')
-    else:
-        stitched_image.save(image_file, 'PNG')
+        image_file = io.BytesIO()
+        if use_bitmap:
+            stitched_image.save(image_file, 'BMP')
+        else:
+            stitched_image.save(image_file, 'PNG')
 
-    image_data = image_file.getvalue()
+        image_data = image_file.getvalue()
 
-    for image in images:
-        image.close()
-    image_file.close()
-    stitched_image.close()
+        image_file.close()
+        stitched_image.close()
 
-    return image_data
+        _hash_images[key] = image_data
+        while len(_hash_images) > MAX_CACHED_HASH_IMAGES:
+            _hash_images.popitem(last=False)
+        return image_data
@@ -190,7 +190,16 @@ class Hints:
             all_possible_independent_hints.pop()
 
     @staticmethod
-    def generate_hints_v2(randomizer: Randomizer, settings: RandomizerSettings) -> HintData:
+    def generate_hints_v2(
+        randomizer: Randomizer, settings: RandomizerSettings, rng: Optional[random.Random] = None
+    ) -> HintData:
+        """
+        Generates the hint data for the given randomizer.
+
+        Random choices are drawn from the given generator instance, or from the randomizer's own instance by default.
+        """
+        if rng is None:
+            rng = randomizer.rng
         # this list is meant to disallow worlds from being hinted, since they will never have hintable items
         exclude_list = HintUtils.update_disabled_worlds_on_tracker(settings)
         location_item_tuples = HintUtils.convert_item_assignment_to_tuple(
@@ -239,7 +248,7 @@ class Hints:
             if common_tracker_data.progression_settings is not None:
                 world_list = list(hint_datas[hint_data_index]["world"].keys())
                 world_list = [w for w in world_list if w in hintable_worlds]
-                random.shuffle(world_list)
+                rng.shuffle(world_list)
                 hint_datas[hint_data_index]["world_order"] = world_list
             hint_data_index+=1
         if HintType.JSMARTEE in generate_hint_type_list:
@@ -251,11 +260,11 @@ class Hints:
                 jsmartee_data.append(JsmarteeHintData(world_items, world))
             if common_tracker_data.progression_settings is not None:
                 hint_datas[hint_data_index]["Reports"] = HintUtils.jsmartee_progression_hints(
-                    world_items, jsmartee_data
+                    world_items, jsmartee_data, rng=rng
                 )
             else:
                 hint_datas[hint_data_index]["Reports"] = HintUtils.jsmartee_hint_report_assignment(
-                    settings, world_items, jsmartee_data
+                    settings, world_items, jsmartee_data, rng=rng
                 )
             hint_data_index+=1
         if HintType.POINTS in generate_hint_type_list:
@@ -265,7 +274,7 @@ class Hints:
             if common_tracker_data.progression_settings is not None:
                 world_list = list(hint_datas[hint_data_index]["world"].keys())
                 world_list = [w for w in world_list if w in hintable_worlds]
-                random.shuffle(world_list)
+                rng.shuffle(world_list)
                 hint_datas[hint_data_index]["world_order"] = world_list
             point_data = []
             for world in hintable_worlds:
@@ -278,7 +287,7 @@ class Hints:
             # If _no_ item types are chosen to be reveal-able, we just skip doing the report assignment altogether.
             if len(settings.spoiler_reveal_checks) > 0:
                 hint_datas[hint_data_index]["Reports"] = HintUtils.point_hint_report_assignment(
-                    settings, world_items, point_data
+                    settings, world_items, point_data, rng=rng
                 )
 
             hint_data_index += 1
@@ -289,7 +298,7 @@ class Hints:
             hint_datas[hint_data_index]["reveal_data"] = world_items.revealed_item_ids_to_names()
             hint_datas[hint_data_index]["aux_data"] = world_items.item_ids_to_names()
             hint_datas[hint_data_index]["Reports"] = HintUtils.spoiler_hint_assignment(
-                settings, common_tracker_data, world_items, hintable_worlds
+                settings, common_tracker_data, world_items, hintable_worlds, rng=rng
             )
             hint_data_index+=1
         if HintType.PATH in generate_hint_type_list:
@@ -304,6 +313,7 @@ class Hints:
                 path_data,
                 common_tracker_data,
                 hintable_worlds,
+                rng=rng,
             )
             hint_data_index+=1
         if HintType.DISABLED in generate_hint_type_list:
@@ -360,7 +370,7 @@ class Hints:
                 player2_world_order = list(reversed(player1_world_order))
             elif common_tracker_data.coop_hint_type == "random":
                 player2_world_order = list(player1_world_order)
-                random.shuffle(player2_world_order)
+                rng.shuffle(player2_world_order)
             else:
                 raise SettingsException("Unknown coop hint type")
 
@@ -5,6 +5,12 @@ from List.inventory.growth import GrowthType
 from List.inventory.item import InventoryItem
 from List.location.graph import RequirementFunction
 
+_growth_ids_by_type: dict[GrowthType, list[int]] = {}
+for _growth in growth.all_growth():
+    _growth_ids_by_type.setdefault(_growth.growth_type, []).append(_growth.id)
+
+_visit_unlock_ids = [u.id for u in storyunlock.all_story_unlocks()]
+
 
 class ItemPlacementHelpers:
 
@@ -26,12 +32,7 @@ class ItemPlacementHelpers:
 
     @staticmethod
     def count_growth(inventory: list[int], growth_type: GrowthType) -> int:
-        ids = [item.id for item in growth.all_growth() if item.growth_type == growth_type]
-        count = 0
-        for item in inventory:
-            if item in ids:
-                count += 1
-        return count
+        return sum(inventory.count(item_id) for item_id in _growth_ids_by_type.get(growth_type, []))
 
     @staticmethod
     def need_growths(inventory: list[int]) -> bool:
@@ -330,9 +331,8 @@ class ItemPlacementHelpers:
 
     @staticmethod
     def get_number_visit_unlocks(inventory: list[int]) -> int:
-        visit_unlock_ids = [u.id for u in storyunlock.all_story_unlocks()]
         running_total = 0
-        for id in visit_unlock_ids:
+        for id in _visit_unlock_ids:
             running_total+=inventory.count(id)
         return running_total
 
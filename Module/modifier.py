@@ -1,9 +1,10 @@
 import random
 from collections import Counter
-from typing import Callable
+from typing import Callable, Optional
 
 from Class.exceptions import GeneratorException, SettingsException
 from Class.itemClass import KH2Item
+from Class.randomUtils import rng_or_shared
 from List.configDict import LevelUpStatBonus, AbilityPoolOption
 from List.inventory import growth, ability, storyunlock, magic
 from List.inventory.growth import GrowthAbility, GrowthType
@@ -15,7 +16,7 @@ class SeedModifier:
     @staticmethod
     def ability_list_modifier(
         option: AbilityPoolOption,
-    ) -> Callable[[list[KH2Item], list[KH2Item]], list[KH2Item]]:
+    ) -> Callable[..., list[KH2Item]]:
         if option == AbilityPoolOption.DEFAULT:
             return SeedModifier.default_ability_pool
         elif option == AbilityPoolOption.RANDOMIZE:
@@ -29,14 +30,15 @@ class SeedModifier:
 
     @staticmethod
     def default_ability_pool(
-        action: list[KH2Item], support: list[KH2Item]
+        action: list[KH2Item], support: list[KH2Item], rng: Optional[random.Random] = None
     ) -> list[KH2Item]:
         return action + support
 
     @staticmethod
     def random_ability_pool(
-        action: list[KH2Item], support: list[KH2Item]
+        action: list[KH2Item], support: list[KH2Item], rng: Optional[random.Random] = None
     ) -> list[KH2Item]:
+        rng = rng_or_shared(rng)
         randomizable_list = action + support
         randomizable_dict: dict[str, KH2Item] = {i.Name: i for i in randomizable_list}
         possible_abilities = list(
@@ -49,7 +51,7 @@ class SeedModifier:
         possible_abilities.sort()
         random_ability_pool = []
         for _ in range(len(randomizable_list) - 2):
-            choice: str = random.choice(possible_abilities)
+            choice: str = rng.choice(possible_abilities)
             random_ability_pool.append(randomizable_dict[choice])
             # Limit only 1 of each action ability in the pool, to make it more interesting
             if choice in [i.Name for i in action]:
@@ -62,8 +64,9 @@ class SeedModifier:
 
     @staticmethod
     def random_support_ability_pool(
-        action: list[KH2Item], support: list[KH2Item]
+        action: list[KH2Item], support: list[KH2Item], rng: Optional[random.Random] = None
     ) -> list[KH2Item]:
+        rng = rng_or_shared(rng)
         randomizable_list = support
         randomizable_dict: dict[str, KH2Item] = {i.Name: i for i in randomizable_list}
         possible_abilities = list(
@@ -76,7 +79,7 @@ class SeedModifier:
         possible_abilities.sort()
         random_ability_pool = []
         for _ in range(len(randomizable_list) - 2):
-            choice: str = random.choice(possible_abilities)
+            choice: str = rng.choice(possible_abilities)
             random_ability_pool.append(randomizable_dict[choice])
 
         # Make sure there is one OM and one SC so the tracker behaves
@@ -86,8 +89,9 @@ class SeedModifier:
 
     @staticmethod
     def random_stackable_ability_pool(
-        action: list[KH2Item], support: list[KH2Item]
+        action: list[KH2Item], support: list[KH2Item], rng: Optional[random.Random] = None
     ) -> list[KH2Item]:
+        rng = rng_or_shared(rng)
         stackable_abilities = [
             ability.ComboPlus.name,
             ability.AirComboPlus.name,
@@ -126,7 +130,7 @@ class SeedModifier:
         for unique_ability in unique_abilities:
             random_ability_pool.append(ability_dict[unique_ability])
         for _ in range(len(ability_list) - len(unique_abilities)):
-            choice = random.choice(stackable_abilities)
+            choice = rng.choice(stackable_abilities)
             random_ability_pool.append(ability_dict[choice])
 
         return random_ability_pool
@@ -178,7 +182,12 @@ class SeedModifier:
         return valid_stat_list
 
     @staticmethod
-    def starting_growth(specific_growth: dict[GrowthType, int], random_range: tuple[int, int]) -> list[GrowthAbility]:
+    def starting_growth(
+        specific_growth: dict[GrowthType, int],
+        random_range: tuple[int, int],
+        rng: Optional[random.Random] = None,
+    ) -> list[GrowthAbility]:
+        rng = rng_or_shared(rng)
         available_growth = growth.all_individual_growth_types().copy()
 
         chosen: list[GrowthType] = []
@@ -188,13 +197,13 @@ class SeedModifier:
                 available_growth.remove(growth_type)
 
         random_min, random_max = random_range
-        random_count = random.randint(random_min, random_max)
+        random_count = rng.randint(random_min, random_max)
         if random_count == 0:
             pass
         elif random_count >= len(available_growth):
             chosen.extend(available_growth)
         else:
-            chosen.extend(random.sample(available_growth, k=random_count))
+            chosen.extend(rng.sample(available_growth, k=random_count))
 
         result: list[GrowthAbility] = []
         for growth_type, level in Counter(chosen).items():
@@ -202,7 +211,12 @@ class SeedModifier:
         return result
 
     @staticmethod
-    def starting_magic(specific_magics: dict[MagicElement, int], random_range: tuple[int, int]) -> list[MagicElement]:
+    def starting_magic(
+        specific_magics: dict[MagicElement, int],
+        random_range: tuple[int, int],
+        rng: Optional[random.Random] = None,
+    ) -> list[MagicElement]:
+        rng = rng_or_shared(rng)
         available_magic_elements = magic.all_individual_magics().copy()
 
         result: list[MagicElement] = []
@@ -212,18 +226,23 @@ class SeedModifier:
                 available_magic_elements.remove(magic_element)
 
         random_min, random_max = random_range
-        random_count = random.randint(random_min, random_max)
+        random_count = rng.randint(random_min, random_max)
         if random_count == 0:
             return result
         elif random_count >= len(available_magic_elements):
             result.extend(available_magic_elements)
             return result
         else:
-            result.extend(random.sample(available_magic_elements, k=random_count))
+            result.extend(rng.sample(available_magic_elements, k=random_count))
             return result
 
     @staticmethod
-    def starting_unlocks(specific_unlocks: dict[StoryUnlock, int], random_range: tuple[int, int]) -> list[StoryUnlock]:
+    def starting_unlocks(
+        specific_unlocks: dict[StoryUnlock, int],
+        random_range: tuple[int, int],
+        rng: Optional[random.Random] = None,
+    ) -> list[StoryUnlock]:
+        rng = rng_or_shared(rng)
         available_unlocks = storyunlock.all_individual_story_unlocks().copy()
 
         result: list[StoryUnlock] = []
@@ -233,12 +252,12 @@ class SeedModifier:
                 available_unlocks.remove(unlock)
 
         random_min, random_max = random_range
-        random_count = random.randint(random_min, random_max)
+        random_count = rng.randint(random_min, random_max)
         if random_count == 0:
             return result
         elif random_count >= len(available_unlocks):
             result.extend(available_unlocks)
             return result
         else:
-            result.extend(random.sample(available_unlocks, k=random_count))
+            result.extend(rng.sample(available_unlocks, k=random_count))
             return result
@@ -1,9 +1,10 @@
 
 import random
-from typing import List
+from typing import List, Optional
 
 from Class.itemClass import KH2Item
 from Class.newLocationClass import KH2Location
+from Class.randomUtils import rng_or_shared
 from List.ItemList import Items
 from List.configDict import itemType, locationCategory
 from Module.RandomizerSettings import RandomizerSettings
@@ -47,7 +48,8 @@ class MultiWorldOutput():
         return output
 
 class MultiWorld():
-    def __init__(self, seeds: List[Randomizer], config: MultiWorldConfig):
+    def __init__(self, seeds: List[Randomizer], config: MultiWorldConfig, rng: Optional[random.Random] = None):
+        self.rng = rng_or_shared(rng)
         self.all_candidate_swaps: List[List[ItemAssignment]] = []
 
         for seed in seeds:
@@ -89,12 +91,12 @@ class MultiWorld():
         
 
         swap_chain = []
-        swap_chain.append(random.choice(full_swaps))
+        swap_chain.append(self.rng.choice(full_swaps))
         full_swaps.remove(swap_chain[-1])
 
         for _ in range(max_item_swap-1):
             filtered_list = [it for it in full_swaps if it[0]!=swap_chain[-1][0]]
-            swap_chain.append(random.choice(filtered_list))
+            swap_chain.append(self.rng.choice(filtered_list))
             full_swaps.remove(swap_chain[-1])
 
         self.multi_output = MultiWorldOutput()
@@ -4,16 +4,17 @@ import random
 from collections import Counter
 from dataclasses import dataclass
 from dataclasses import field
-from typing import Optional
+from typing import Callable, Optional
 
 from Class.exceptions import (
     GeneratorException,
     CantAssignItemException,
     SettingsException,
+    RandomizerExceptions,
 )
 from Class.itemClass import KH2Item
 from Class.newLocationClass import KH2Location
-from Class.randomUtils import weighted_sample_without_replacement
+from Class.randomUtils import WeightedSampler, weighted_sample_without_replacement
 from List.ItemList import Items
 from List.NewLocationList import Locations
 from List.ObjectiveList import KH2Objective
@@ -44,6 +45,7 @@ from List.location import (
     hundredacrewood as haw,
     hollowbastion as hb,
 )
+from List.location.graph import ItemInventory
 from Module.RandomizerSettings import RandomizerSettings
 from Module.depths import ItemDepths
 from Module.modifier import SeedModifier
@@ -142,6 +144,11 @@ class SynthesisRecipe:
             return NotImplemented
 
 
+_STRUGGLE_LOCATION_NAMES = frozenset(
+    [stt.CheckLocation.StruggleWinnerChampionBelt, stt.CheckLocation.StruggleLoserMedal]
+)
+
+
 def _find_location(
     location_name: str, locations: list[KH2Location]
 ) -> Optional[KH2Location]:
@@ -155,15 +162,26 @@ def _find_locations(
 
 
 class Randomizer:
-    def __init__(self, settings: RandomizerSettings, progress_bar_vis: bool = False, attempt_number: int = 0):
+    def __init__(
+        self,
+        settings: RandomizerSettings,
+        progress_bar_vis: bool = False,
+        attempt_number: int = 0,
+        rng: Optional[random.Random] = None,
+    ):
         if settings is None:
             raise SettingsException(
                 "Invalid settings passed to randomize. Change settings and try again"
             )
-        random.seed(settings.full_rando_seed)
+        # Every random choice made for this seed comes from this instance (never the shared generator), so that
+        # seeds generated alongside each other can't affect each other.
+        self.rng = rng if rng is not None else settings.create_seeded_rng()
         self.progress_bar_vis = progress_bar_vis
-        self.regular_locations = Locations(settings, secondary_graph=False)
-        self.reverse_locations = Locations(settings, secondary_graph=True)
+        self.regular_locations = Locations.cached(settings, secondary_graph=False)
+        self.reverse_locations = Locations.cached(settings, secondary_graph=True)
+        # Choosing the level check slots has always re-seeded the generator. Do the same here so that a given seed
+        # string keeps producing the same seed.
+        settings.excluded_levels(self.rng)
         self.master_locations = (
             self.regular_locations if settings.regular_rando else self.reverse_locations
         )
@@ -179,22 +197,38 @@ class Randomizer:
         self.num_available_items = None
         self.starting_item_ids: list[int] = []
         self.assignments: list[ItemAssignment] = []
+        # Indexes into self.assignments, kept up to date as items are assigned. Each keeps the first matching
+        # assignment in list order, to match what a scan of the list would find.
+        self._assignments_by_location: dict[tuple, ItemAssignment] = {}
+        self._assignments_by_location_name: dict[str, ItemAssignment] = {}
+        self._assignments_by_sword_level: dict[int, ItemAssignment] = {}
+        self._assignments_by_item: dict[InventoryItem, ItemAssignment] = {}
+        self._assignments_by_item_id: dict[int, ItemAssignment] = {}
         self.donald_assignments: list[ItemAssignment] = []
         self.goofy_assignments: list[ItemAssignment] = []
         self.equipment_assignments: list[ItemAssignment] = []
         self.weapon_stats: list[WeaponStats] = []
+        self._weapon_stats_by_location_name: dict[str, WeaponStats] = {}
+        self._weapon_stats_indexed = 0
         self.level_stats: list[LevelStats] = []
         self.form_level_exp: list[FormExp] = []
         self.synthesis_recipes: list[SynthesisRecipe] = []
         self.shop_items: list[KH2Item] = []
         self.objectives: list[KH2Objective] = []
-        self.assign_sora_items(settings, attempt_number)
-        if progress_bar_vis:
-            return
-        self.assign_party_items()
-        self.assign_weapon_stats(settings)
-        self.assign_level_stats(settings)
-        self.assign_form_level_exp(settings)
+        # Describes what item placement was doing, so that a failed attempt can say where it failed
+        self.placement_step = "item pools"
+        try:
+            self.assign_sora_items(settings, attempt_number)
+            if progress_bar_vis:
+                return
+            self.placement_step = "party items and stats"
+            self.assign_party_items()
+            self.assign_weapon_stats(settings)
+            self.assign_level_stats(settings)
+            self.assign_form_level_exp(settings)
+        except RandomizerExceptions as e:
+            e.add_note(f"Failed during {self.placement_step}")
+            raise
 
     def assign_form_level_exp(self, settings: RandomizerSettings):
         """Assigns experience values to each form level."""
@@ -253,12 +287,12 @@ class Randomizer:
         level_stat_pool = [(s[0], s[1]) for s in settings.level_stat_pool]
         stat_weights = [s[2] for s in settings.level_stat_pool]
         experience = settings.sora_exp()
-        excluded_levels = settings.excluded_levels()
+        excluded_levels = settings.excluded_levels(self.rng)
         double_stat_levels = settings.double_stat_levels()
         for index, location in enumerate(locations):
             if index != 0:
                 stat_choices = weighted_sample_without_replacement(
-                    population=level_stat_pool, weights=stat_weights, k=2
+                    population=level_stat_pool, weights=stat_weights, k=2, rng=self.rng
                 )
                 adder_function(stat_choices[0])
                 if location.LocationId in excluded_levels and location.LocationId in double_stat_levels:
@@ -284,7 +318,7 @@ class Randomizer:
             elif target_key.struggle_weapon:
                 return sora_average
             else:
-                return random.randint(key_min, key_max)
+                return self.rng.randint(key_min, key_max)
 
         def choose_magic(target_key: Keyblade) -> int:
             if not randomize_stats:
@@ -292,7 +326,7 @@ class Randomizer:
             elif target_key.struggle_weapon:
                 return sora_average
             else:
-                return random.randint(key_min, key_max)
+                return self.rng.randint(key_min, key_max)
 
         slot_locations = {location.LocationId: location for location in weaponslot.keyblade_slots()}
         for key in keyblade.get_all_keyblades():
@@ -303,18 +337,18 @@ class Randomizer:
 
         for staff in weaponslot.donald_staff_slots():
             self.weapon_stats.append(
-                WeaponStats(staff, strength=random.randint(1, 13), magic=random.randint(1, 13))
+                WeaponStats(staff, strength=self.rng.randint(1, 13), magic=self.rng.randint(1, 13))
             )
         for shield in weaponslot.goofy_shield_slots():
             self.weapon_stats.append(
-                WeaponStats(shield, strength=random.randint(1, 13), magic=0)
+                WeaponStats(shield, strength=self.rng.randint(1, 13), magic=0)
             )
 
     def assign_party_items(self):
         """Assigns items to locations for party members."""
         donald_locations = Locations.all_donald_locations()
         for donald_ability in Items.donald_ability_list():
-            random_location = random.choice(donald_locations)
+            random_location = self.rng.choice(donald_locations)
             if self.assign_item(
                 random_location, donald_ability, self.donald_assignments
             ):
@@ -322,7 +356,7 @@ class Randomizer:
 
         goofy_locations = Locations.all_goofy_locations()
         for goofy_ability in Items.goofy_ability_list():
-            random_location = random.choice(goofy_locations)
+            random_location = self.rng.choice(goofy_locations)
             if self.assign_item(random_location, goofy_ability, self.goofy_assignments):
                 goofy_locations.remove(random_location)
 
@@ -333,21 +367,24 @@ class Randomizer:
         starting_growth_abilities = SeedModifier.starting_growth(
             specific_growth=settings.starting_growth_specific,
             random_range=settings.starting_growth_random_range,
+            rng=self.rng,
         )
         self.starting_item_ids.extend(growth_ability.id for growth_ability in starting_growth_abilities)
 
         starting_magics = SeedModifier.starting_magic(
             specific_magics=settings.starting_magics_specific,
             random_range=settings.starting_magic_random_range,
+            rng=self.rng,
         )
         self.starting_item_ids.extend(mag.id for mag in starting_magics)
 
-        starting_reports = random.sample(report.all_reports(), k=settings.starting_report_count)
+        starting_reports = self.rng.sample(report.all_reports(), k=settings.starting_report_count)
         self.starting_item_ids.extend(rpt.id for rpt in starting_reports)
 
         starting_unlocks = SeedModifier.starting_unlocks(
             specific_unlocks=settings.starting_unlocks_specific,
             random_range=settings.starting_visit_random_range,
+            rng=self.rng,
         )
         self.starting_item_ids.extend(unlock.id for unlock in starting_unlocks)
 
@@ -420,7 +457,7 @@ class Randomizer:
         if settings.shop_reports > 0:
             report_pool = [i for i in item_pool if i.ItemType == itemType.REPORT]
             num_reports_in_shop = min(settings.shop_reports, len(report_pool))
-            chosen_reports: list[KH2Item] = random.sample(
+            chosen_reports: list[KH2Item] = self.rng.sample(
                 report_pool, k=num_reports_in_shop
             )
             self.shop_items.extend(chosen_reports)
@@ -435,7 +472,7 @@ class Randomizer:
             num_visit_unlocks_in_shop = min(
                 settings.shop_unlocks, len(visit_unlock_pool)
             )
-            chosen_unlocks: list[KH2Item] = random.sample(
+            chosen_unlocks: list[KH2Item] = self.rng.sample(
                 visit_unlock_pool, k=num_visit_unlocks_in_shop
             )
             self.shop_items.extend(chosen_unlocks)
@@ -457,6 +494,7 @@ class Randomizer:
         ability_pool: list[KH2Item] = modifier(
             Items.getActionAbilityList(),
             Items.getSupportAbilityList() + Items.getKeybladeAbilityList() + Items.getLevelAbilityList(),
+            rng=self.rng,
         )
 
         # Remove any starting abilities from the pool
@@ -532,7 +570,7 @@ class Randomizer:
 
         valid_locations: list[KH2Location] = []
         invalid_locations: list[KH2Location] = []
-        excluded_levels = settings.excluded_levels()
+        excluded_levels = settings.excluded_levels(self.rng)
         for loc in all_locations:
             if (
                 no_final_form(loc)
@@ -650,11 +688,11 @@ class Randomizer:
         for location in valid_locations:
             if locationType.SYNTH in location.LocationTypes:
                 # assign a recipe to this item
-                items: list[KH2Item] = random.sample(
-                    Items.getSynthRequirementsList(), k=random.randint(1, 3)
+                items: list[KH2Item] = self.rng.sample(
+                    Items.getSynthRequirementsList(), k=self.rng.randint(1, 3)
                 )
                 requirements = [
-                    SynthRequirement(synth_item=item, amount=random.randint(1, 3))
+                    SynthRequirement(synth_item=item, amount=self.rng.randint(1, 3))
                     for item in items
                 ]
                 recipe = SynthesisRecipe(
@@ -672,6 +710,7 @@ class Randomizer:
             settings, num_junk_items=self.num_valid_locations - self.num_available_items
         )
 
+        self.placement_step = "keyblade abilities"
         self.assign_equipment_abilities(settings)
 
         self.assign_keyblade_abilities(settings, randomizable_abilities, valid_locations)
@@ -683,7 +722,7 @@ class Randomizer:
         item_pool.extend(randomizable_abilities)
         if settings.emblems:
             item_pool.extend([Items.emblemItem() for _ in range(settings.max_emblems_available)])
-        random.shuffle(item_pool)
+        self.rng.shuffle(item_pool)
 
         # vanilla location item assignment
         for loc_with_vanilla in locations_with_vanilla_items:
@@ -701,10 +740,12 @@ class Randomizer:
                         invalid_locations.remove(loc_with_vanilla)
 
         # assign items that have very restricted locations (boss depths, yeet, etc.)
+        self.placement_step = "plando-like placement"
         self.assign_plando_like_items(settings, item_pool, valid_locations)
 
         # check for objective rando
         if settings.objective_rando:
+            self.placement_step = "objective placement"
             # get the objective pool
             objective_pool = settings.available_objectives
             # filter down the pool based on what valid locations there are
@@ -727,9 +768,9 @@ class Randomizer:
             form_3_objectives = [o for o in objective_pool if "Level 3" in o.Name]
             form_5_objectives = [o for o in objective_pool if "Level 5" in o.Name]
             form_7_objectives = [o for o in objective_pool if "Level 7" in o.Name]
-            random.shuffle(form_3_objectives)
-            random.shuffle(form_5_objectives)
-            random.shuffle(form_7_objectives)
+            self.rng.shuffle(form_3_objectives)
+            self.rng.shuffle(form_5_objectives)
+            self.rng.shuffle(form_7_objectives)
             all_form_objectives = [x for x in itertools.chain(*itertools.zip_longest(form_3_objectives, form_5_objectives, form_7_objectives)) if x is not None]
             # if the pool isn't going to be big enough, we need to fill with form levels
             if settings.max_objectives_available > len(non_form_objectives):
@@ -743,7 +784,7 @@ class Randomizer:
                 raise SettingsException(f"Not enough objective locations ({len(objective_pool)}) available to allow the max number of objectives ({settings.max_objectives_available}) to be placed.")
 
             # pick a number of objectives
-            self.objectives = random.sample(objective_pool,k=settings.max_objectives_available)
+            self.objectives = self.rng.sample(objective_pool,k=settings.max_objectives_available)
             picked_objectives_location_names = [o.Location for o in self.objectives]
             # plando completion marks onto the selected objectives
             objective_locations = [v for v in valid_locations if v.Description in picked_objectives_location_names]
@@ -754,14 +795,18 @@ class Randomizer:
 
 
         if settings.chainLogic:
+            self.placement_step = "chain logic"
             self.assign_chain_logic(settings, item_pool, valid_locations)
         else:
             # create some space for random assignment by doing a forward-pass assignment
+            self.placement_step = "forward-pass placement"
             self.create_available_location_space(settings, item_pool, valid_locations, attempt_number)
 
+        self.placement_step = "random placement"
         self.randomly_assign_items(item_pool, valid_locations)
 
         # move remaining items to invalid locations for junk item assignment
+        self.placement_step = "junk placement"
         invalid_locations.extend(valid_locations)
         self.assign_junk_locations(settings, invalid_locations)
 
@@ -787,7 +832,7 @@ class Randomizer:
         #       a) specifically visit locks and proofs from the "very restricted" pool
         #   4) Determine the existing dependency graph (we will use this to make sure we don't overlap two unlocks in the chain)
         from Module.seedEvaluation import LocationInformedSeedValidator
-        validator = LocationInformedSeedValidator()
+        validator = LocationInformedSeedValidator(self.rng)
         validator.prep_requirements_list(settings, self)
         item_locking_ids_per_world = validator.generate_locking_item_ids()
 
@@ -800,7 +845,7 @@ class Randomizer:
         last_unlocked_sphere = accessible_locations
 
         world_names_to_unlock = [w for w in item_locking_ids_per_world.keys() for _ in item_locking_ids_per_world[w]]
-        random.shuffle(world_names_to_unlock)
+        self.rng.shuffle(world_names_to_unlock)
         world_names_to_unlock = [w for w in world_names_to_unlock if w in settings.enabledLocations]
 
         proof_nonexistence_assignment = self.assignment_for_item_id(proof.ProofOfNonexistence.id)
@@ -828,7 +873,7 @@ class Randomizer:
 
         history_of_items = []
         # print("Starting chain....")
-        while (item_depth < min_item_depth or (item_depth < max_item_depth and random.random() < 0.75)): # 25% chance of breaking early
+        while (item_depth < min_item_depth or (item_depth < max_item_depth and self.rng.random() < 0.75)): # 25% chance of breaking early
             # dummy_do_not_use = input("...")
             # print("+++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++")
             # print(f"Depth {item_depth}/({min_item_depth}-{max_item_depth})")
@@ -930,7 +975,7 @@ class Randomizer:
         #    place that somewhere that's available
         #    loop again        
         from Module.seedEvaluation import LocationInformedSeedValidator
-        validator = LocationInformedSeedValidator()
+        validator = LocationInformedSeedValidator(self.rng)
         validator.prep_requirements_list(settings, self)
 
         shop_item_ids = [i.Id for i in self.shop_items]
@@ -943,7 +988,7 @@ class Randomizer:
             if len(sphere_0) < num_available_locations_needed_to_allow_random_assignment:
                 # pick a locking item we don't have, assign it somewhere valid, repeat
                 unlocks = [] + [s.id for s in storyunlock.all_story_unlocks()] + [k.id for k in keyblade.get_locking_keyblades()]
-                random.shuffle(unlocks)
+                self.rng.shuffle(unlocks)
                 for u in unlocks:
                     i_data = next((it for it in item_pool if it.Id == u), None)
                     if i_data is not None:
@@ -969,14 +1014,17 @@ class Randomizer:
         # check if any of the already assigned locations are valid right now, and if so, add their item to current inventory
         while found_new_item:
             found_new_item = False
+            inventory = ItemInventory(self.starting_item_ids + acquired_items + aux_items)
             # get unassigned locations that are available
-            sphere_0 = [loc for loc in valid_locations if validator.is_location_available(self.starting_item_ids + acquired_items + aux_items,loc)]
+            sphere_0 = [loc for loc in valid_locations if validator.is_location_available(inventory,loc)]
             # get already assigned items from available locations
             for assignment in self.assignments:
-                if assignment.location.LocationCategory is not locationCategory.WEAPONSLOT and assignment.location not in acquired_item_locations and validator.is_location_available(self.starting_item_ids + acquired_items + aux_items, assignment.location):
+                if assignment.location.LocationCategory is not locationCategory.WEAPONSLOT and assignment.location not in acquired_item_locations and validator.is_location_available(inventory, assignment.location):
                     if assignment.location.Description != stt.CheckLocation.StruggleWinnerChampionBelt:
                         acquired_item_locations.append(assignment.location)
-                        acquired_items.extend([i.Id for i in assignment.items()])
+                        assignment_item_ids = [i.Id for i in assignment.items()]
+                        acquired_items.extend(assignment_item_ids)
+                        inventory.extend(assignment_item_ids)
                         found_new_item = True
         return acquired_items,sphere_0
 
@@ -992,7 +1040,7 @@ class Randomizer:
                 haw.yeet_the_bear_location_names(), valid_locations
             )
             if len(yeet_locations) > 0:
-                yeet_location = random.choice(yeet_locations)
+                yeet_location = self.rng.choice(yeet_locations)
                 proof_item = next(
                         key for key in item_pool if key.Id == proof.ProofOfNonexistence.id
                     )
@@ -1020,7 +1068,7 @@ class Randomizer:
             good_choices = False
             while not good_choices:
                 good_choices = True
-                chosen_locations = random.sample(valid_for_proofs,k=len(remaining_proofs))
+                chosen_locations = self.rng.sample(valid_for_proofs,k=len(remaining_proofs))
                 for index,c in enumerate(chosen_locations):
                     # check that each proof is valid for the location (i.e. no connection on Terra)
                     if remaining_proofs[index].ItemType in c.InvalidChecks:
@@ -1034,7 +1082,7 @@ class Randomizer:
             promise_charm_item_list = [i for i in item_pool if i.ItemType is misc.PromiseCharm.type]
             # pick N valid locations for these items
             valid_for_promise_charm = [loc for loc in valid_locations if self.promise_charm_depths.is_valid(loc)]
-            chosen_locations = random.sample(valid_for_promise_charm,k=len(promise_charm_item_list))
+            chosen_locations = self.rng.sample(valid_for_promise_charm,k=len(promise_charm_item_list))
             for index,c in enumerate(chosen_locations):
                 item_pool.remove(promise_charm_item_list[index])
                 if self.assign_item(c, promise_charm_item_list[index]):
@@ -1044,7 +1092,7 @@ class Randomizer:
             # pick N valid locations for these items
             valid_for_unlocks = [loc for loc in valid_locations if self.story_depths.is_valid(loc)]
             number_of_choices = min(len(remaining_unlocks),len(valid_for_unlocks))
-            chosen_locations = random.sample(valid_for_unlocks,k=number_of_choices)
+            chosen_locations = self.rng.sample(valid_for_unlocks,k=number_of_choices)
             for index,c in enumerate(chosen_locations):
                 item_pool.remove(remaining_unlocks[index])
                 if self.assign_item(c, remaining_unlocks[index]):
@@ -1054,7 +1102,7 @@ class Randomizer:
             # pick N valid locations for these items
             valid_for_reports = [loc for loc in valid_locations if self.report_depths.is_valid(loc)]
             number_of_choices = min(len(remaining_reports),len(valid_for_reports))
-            chosen_locations = random.sample(valid_for_reports,k=number_of_choices)
+            chosen_locations = self.rng.sample(valid_for_reports,k=number_of_choices)
             for index,c in enumerate(chosen_locations):
                 item_pool.remove(remaining_reports[index])
                 if self.assign_item(c, remaining_reports[index]):
@@ -1065,89 +1113,93 @@ class Randomizer:
         if len(location_pool) == 0:
             raise CantAssignItemException(f"Ran out of locations to assign items {item}")
 
-        weights = self.compute_location_weights(item, location_pool)
-
-        count = 0
-        while True:
-            count += 1
-            if len(weights) == 0:
-                raise CantAssignItemException(
-                    f"Ran out of locations to assign items to."
-                )
-            if sum(weights) == 0:
-                raise CantAssignItemException(
-                    f"Somehow, can't assign an item because there are no valid locations for {item.Name}."
-                )
+        sampler = self.location_sampler(item, location_pool)
+        if sampler.total() == 0:
+            raise CantAssignItemException(
+                f"Somehow, can't assign an item because there are no valid locations for {item.Name}."
+            )
 
-            random_location: KH2Location = random.choices(location_pool, weights)[
-                0
-            ]
-            if item.ItemType not in random_location.InvalidChecks:
-                if self.assign_item(random_location, item):
-                    location_pool.remove(random_location)
-                    locations_to_remove.append(random_location)
+        random_location: KH2Location = location_pool[sampler.draw(self.rng)]
+        if self.assign_item(random_location, item):
+            location_pool.remove(random_location)
+            locations_to_remove.append(random_location)
 
-                    struggle_pair = self._maybe_assign_struggle_pair(
-                        random_location, item, location_pool
-                    )
-                    if struggle_pair is not None:
-                        location_pool.remove(struggle_pair)
-                        locations_to_remove.append(struggle_pair)
-                break
-            if count == 100:
-                raise CantAssignItemException(
-                    f"Trying to assign {item} and failed 100 times in {len([i for i in location_pool if i.LocationCategory==locationCategory.POPUP])} popups left out of {len(location_pool)}"
-                )
+            struggle_pair = self._maybe_assign_struggle_pair(
+                random_location, item, location_pool
+            )
+            if struggle_pair is not None:
+                location_pool.remove(struggle_pair)
+                locations_to_remove.append(struggle_pair)
         return locations_to_remove
 
 
     def randomly_assign_items(self, item_pool, valid_locations):
+        # One sampler per item type over a fixed ordering of the locations, built the first time an item of that type
+        # is placed. Filled locations are removed from every sampler rather than from the list on each placement.
+        location_pool = list(valid_locations)
+        location_indices = [self.location_weights.location_index(loc) for loc in location_pool]
+        samplers: dict[itemType, WeightedSampler] = {}
+        filled_indices: set[int] = set()
+
+        def remaining_locations() -> list[KH2Location]:
+            return [loc for index, loc in enumerate(location_pool) if index not in filled_indices]
+
+        def fill(index: int):
+            filled_indices.add(index)
+            for other_sampler in samplers.values():
+                other_sampler.remove(index)
+
         for item in item_pool:
-            if len(valid_locations) == 0:
+            if len(filled_indices) == len(location_pool):
                 raise CantAssignItemException(f"Ran out of locations to assign items")
 
-            weights = self.compute_location_weights(item, valid_locations)
-
-            count = 0
-            while True:
-                count += 1
-                if len(weights) == 0:
-                    raise CantAssignItemException(
-                        f"Ran out of locations to assign items to."
-                    )
-                if sum(weights) == 0:
-                    raise CantAssignItemException(
-                        f"Somehow, can't assign an item because there are no valid locations for {item.Name}."
-                    )
+            sampler = samplers.get(item.ItemType)
+            if sampler is None:
+                sampler = self.location_sampler(item, location_pool, location_indices)
+                for index in filled_indices:
+                    sampler.remove(index)
+                samplers[item.ItemType] = sampler
+            if sampler.total() == 0:
+                raise CantAssignItemException(
+                    f"Somehow, can't assign an item because there are no valid locations for {item.Name}."
+                )
 
-                random_location: KH2Location = random.choices(valid_locations, weights)[
-                    0
-                ]
-                if item.ItemType not in random_location.InvalidChecks:
-                    if self.assign_item(random_location, item):
-                        valid_locations.remove(random_location)
+            random_index = sampler.draw(self.rng)
+            random_location: KH2Location = location_pool[random_index]
+            if self.assign_item(random_location, item):
+                fill(random_index)
 
-                        struggle_pair = self._maybe_assign_struggle_pair(
-                            random_location, item, valid_locations
-                        )
-                        if struggle_pair is not None:
-                            valid_locations.remove(struggle_pair)
-                    break
-                if count == 100:
-                    raise CantAssignItemException(
-                        f"Trying to assign {item} and failed 100 times in {len([i for i in valid_locations if i.LocationCategory==locationCategory.POPUP])} popups left out of {len(valid_locations)}"
+                if random_location.name() in _STRUGGLE_LOCATION_NAMES:
+                    struggle_pair = self._maybe_assign_struggle_pair(
+                        random_location, item, remaining_locations()
                     )
+                    fill(location_pool.index(struggle_pair))
 
+        valid_locations[:] = remaining_locations()
 
     def compute_location_weights(
-        self, item: KH2Item, location_pool: list[KH2Location]
+        self, item: KH2Item, location_pool: list[KH2Location], location_indices: Optional[list[int]] = None
     ) -> list[int]:
         loc_weights = self.location_weights
-        result = [
-            loc_weights.get_weight(item.ItemType, loc) for loc in location_pool
-        ]
+        if location_indices is None:
+            location_indices = [loc_weights.location_index(loc) for loc in location_pool]
+        weight_row = loc_weights.weight_table[item.ItemType]
+        result = [weight_row[index] for index in location_indices]
         return result
 
+    def location_sampler(
+        self, item: KH2Item, location_pool: list[KH2Location], location_indices: Optional[list[int]] = None
+    ) -> WeightedSampler:
+        """
+        Returns a sampler over the location pool for the given item. Locations that can't hold the item are given no
+        weight up front, rather than being rejected after they've been drawn.
+        """
+        weights = self.compute_location_weights(item, location_pool, location_indices)
+        for index, loc in enumerate(location_pool):
+            if item.ItemType in loc.InvalidChecks:
+                weights[index] = 0
+        return WeightedSampler(weights)
+
     def assign_junk_locations(
         self, settings: RandomizerSettings, locations: list[KH2Location]
     ):
@@ -1164,7 +1216,7 @@ class Randomizer:
         )
         struggle_loser = _find_location(stt.CheckLocation.StruggleLoserMedal, locations)
         if struggle_winner is not None and struggle_loser is not None:
-            junk_item = random.choice(junk_items)
+            junk_item = self.rng.choice(junk_items)
             self.assign_item(struggle_winner, junk_item)
             self.assign_item(struggle_loser, junk_item)
             locations.remove(struggle_winner)
@@ -1178,29 +1230,28 @@ class Randomizer:
                 "Attempting to assign junk to struggle loser but winner already has an item"
             )
 
-        excluded_levels = settings.excluded_levels()
+        excluded_levels = settings.excluded_levels(self.rng)
         for loc in locations:
             if loc.LocationCategory is not locationCategory.LEVEL or (
                 loc.LocationCategory is locationCategory.LEVEL
                 and loc.LocationId not in excluded_levels
             ):
-                junk_item = random.choice(junk_items)
+                junk_item = self.rng.choice(junk_items)
                 # assign another junk item if that location needs another item
                 if not self.assign_item(loc, junk_item):
-                    junk_item = random.choice(junk_items)
+                    junk_item = self.rng.choice(junk_items)
                     self.assign_item(loc, junk_item)
             else:
                 self.assign_item(loc, Items.getNullItem())
 
-    @staticmethod
-    def get_n_junk(settings: RandomizerSettings, num_junk_items: int) -> list[KH2Item]:
+    def get_n_junk(self, settings: RandomizerSettings, num_junk_items: int) -> list[KH2Item]:
         """Returns a given number of "junk" items."""
         all_junk_items = [
             item
             for item in Items.getJunkList(betterJunk=False)
             if item.Id in settings.junk_pool
         ]
-        return random.choices(all_junk_items, k=num_junk_items)
+        return self.rng.choices(all_junk_items, k=num_junk_items)
 
     def augment_invalid_checks(
         self, locations: list[KH2Location], settings: RandomizerSettings
@@ -1279,7 +1330,7 @@ class Randomizer:
             valid_ability_ids = set(settings.equipment_abilities_list)
             all_abilities = Items.getActionAbilityList() + Items.getSupportAbilityList() + Items.getKeybladeAbilityList() + Items.getLevelAbilityList()
             valid_abilities = [abil for abil in all_abilities if abil.Id in valid_ability_ids]
-            random.shuffle(valid_abilities)
+            self.rng.shuffle(valid_abilities)
             slot_locations = {location.LocationId: location for location in weaponslot.armor_accessory_slots()}
             # repeat the ability list a max number of times
             valid_abilities = valid_abilities*len(slot_locations)
@@ -1342,7 +1393,7 @@ class Randomizer:
                     else:
                         ability_weights = [1 for _ in eligible_abilities]
 
-                    random_ability = random.choices(eligible_abilities, ability_weights)[0]
+                    random_ability = self.rng.choices(eligible_abilities, ability_weights)[0]
                     self.assign_item(location, random_ability)
                     valid_locations.remove(location)
                     ability_pool.remove(random_ability)
@@ -1389,11 +1440,11 @@ class Randomizer:
             )
 
         # Select two different stats to put on Xemnas 1
-        stat1 = random.choice(stat_items)
+        stat1 = self.rng.choice(stat_items)
         stat_items.remove(stat1)
         stat2 = stat1
         while stat1 == stat2:
-            stat2 = random.choice(stat_items)
+            stat2 = self.rng.choice(stat_items)
         stat_items.remove(stat2)
         self.assign_item(double_stat[0], stat1)
         self.assign_item(double_stat[0], stat2)
@@ -1406,7 +1457,7 @@ class Randomizer:
 
         # Assign the rest
         for item in stat_items:
-            loc = random.choice(single_stat)
+            loc = self.rng.choice(single_stat)
             single_stat.remove(loc)
             if self.assign_item(loc, item):
                 avail_locations.remove(loc)
@@ -1441,11 +1492,17 @@ class Randomizer:
                 f"Trying to assign {item} to {location} even though it's invalid."
             )
 
-        assignment = next(
-            filter(lambda a: a.location == location, assigned_items), None
-        )
+        if assigned_items is self.assignments:
+            assignment = self._assignments_by_location.get(location.equality_key())
+        else:
+            assignment = next(
+                filter(lambda a: a.location == location, assigned_items), None
+            )
         if assignment is None:
-            assigned_items.append(ItemAssignment(location, item))
+            new_assignment = ItemAssignment(location, item)
+            assigned_items.append(new_assignment)
+            if assigned_items is self.assignments:
+                self._index_assignment(new_assignment)
             all_slots_filled = not double_item
         else:
             if assignment.item is None:
@@ -1489,20 +1546,43 @@ class Randomizer:
         self.assign_item(opposite, item)
         return opposite
 
+    def _index_assignment(self, assignment: ItemAssignment):
+        location = assignment.location
+        self._assignments_by_location.setdefault(location.equality_key(), assignment)
+        self._assignments_by_location_name.setdefault(location.name(), assignment)
+        if location.LocationCategory == locationCategory.LEVEL:
+            self._assignments_by_sword_level.setdefault(location.LocationId, assignment)
+        self._index_assignment_item(assignment)
+
+    def _index_assignment_item(self, assignment: ItemAssignment):
+        if assignment.item is not None:
+            self._assignments_by_item.setdefault(assignment.item.item, assignment)
+            self._assignments_by_item_id.setdefault(assignment.item.Id, assignment)
+
+    def replace_assigned_items(self, replacement: Callable[[Optional[KH2Item]], Optional[KH2Item]]):
+        """Replaces the item(s) of every assignment with the result of the given function, keeping the indexes in sync."""
+        self._assignments_by_item.clear()
+        self._assignments_by_item_id.clear()
+        for assignment in self.assignments:
+            assignment.item = replacement(assignment.item)
+            assignment.item2 = replacement(assignment.item2)
+            self._index_assignment_item(assignment)
+
     def assignment_for_location(self, location_name: str) -> Optional[ItemAssignment]:
-        return next((a for a in self.assignments if a.location.name() == location_name), None)
+        return self._assignments_by_location_name.get(location_name)
 
     def assignment_for_sword_level(self, level: int) -> Optional[ItemAssignment]:
-        level_assignments = (
-            a for a in self.assignments if (a.location.LocationCategory == locationCategory.LEVEL and a.location.LocationId == level)
-        )
-        return next(level_assignments, None)
+        return self._assignments_by_sword_level.get(level)
 
     def assignment_for_item(self, item: InventoryItem) -> Optional[ItemAssignment]:
-        return next((a for a in self.assignments if a.item.item == item), None)
+        return self._assignments_by_item.get(item)
 
     def assignment_for_item_id(self, item_id: int) -> Optional[ItemAssignment]:
-        return next((a for a in self.assignments if a.item.item.id == item_id), None)
+        return self._assignments_by_item_id.get(item_id)
 
     def weapon_stats_for_location(self, location_name: str) -> Optional[WeaponStats]:
-        return next((w for w in self.weapon_stats if w.location.name() == location_name), None)
+        # weapon stats are only ever appended, so index any that were added since the last lookup
+        for stats in self.weapon_stats[self._weapon_stats_indexed:]:
+            self._weapon_stats_by_location_name.setdefault(stats.location.name(), stats)
+        self._weapon_stats_indexed = len(self.weapon_stats)
+        return self._weapon_stats_by_location_name.get(location_name)
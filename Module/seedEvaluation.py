@@ -1,11 +1,12 @@
-import copy
 import random
+from typing import Optional
 
 from altgraph.Graph import Graph
 
 from Class.exceptions import ValidationException
 from Class.newLocationClass import KH2Location
-from List.NewLocationList import get_all_parent_edge_requirements, Locations
+from Class.randomUtils import rng_or_shared
+from List.NewLocationList import Locations
 from List.configDict import ItemAccessibilityOption, locationType
 from List.inventory import storyunlock, keyblade, proof, form, magic, misc
 from List.inventory.misc import NullItem
@@ -28,7 +29,7 @@ from List.location import (
     formlevel,
     starting,
 )
-from List.location.graph import RequirementFunction
+from List.location.graph import RequirementFunction, ItemInventory
 from Module.RandomizerSettings import RandomizerSettings
 from Module.itemPlacementRestriction import ItemPlacementHelpers
 from Module.newRandomize import Randomizer, SynthesisRecipe
@@ -44,7 +45,8 @@ class ValidationResult:
 
 class LocationInformedSeedValidator:
 
-    def __init__(self):
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng_or_shared(rng)
         self.location_requirements: dict[KH2Location, list[RequirementFunction]] = {}
         self.human_readable_lock_list: dict[locationType,Graph] = {}
         self.location_spheres: dict[KH2Location, int] = {}
@@ -266,7 +268,7 @@ class LocationInformedSeedValidator:
             current_node = next((n for n in graph.node_list() if graph.inc_degree(n)==0),None)
             if current_node is None:
                 # if there is no obvious start node, pick one at random
-                current_node = random.choice(graph.node_list())
+                current_node = self.rng.choice(graph.node_list())
 
             while True:
                 # populate the data for the current node
@@ -276,7 +278,7 @@ class LocationInformedSeedValidator:
                 candidate_nodes = [n for n in graph.out_nbrs(current_node) if n not in current_node_list]
                 if len(candidate_nodes)==0:
                     break
-                current_node = random.choice(candidate_nodes)
+                current_node = self.rng.choice(candidate_nodes)
                 # repeat
             if len(graph.node_list()) != len(current_item_data):
                 return None
@@ -298,9 +300,25 @@ class LocationInformedSeedValidator:
             item_id_lock_list[location_type] = new_list
         return item_id_lock_list
 
+    @staticmethod
+    def _assigned_item_ids_by_location(randomizer: Randomizer) -> dict[tuple, list[int]]:
+        result: dict[tuple, list[int]] = {}
+        for assignment in randomizer.assignments:
+            # if assignment is one of the struggle win/lose items, only count one, and not count the second.
+            if assignment.location.name() == stt.CheckLocation.StruggleWinnerChampionBelt:
+                continue
+            key = assignment.location.equality_key()
+            if key not in result:
+                item_ids = [assignment.item.Id]
+                if assignment.item2 is not None:
+                    item_ids.append(assignment.item2.Id)
+                result[key] = item_ids
+        return result
+
     @staticmethod
     def evaluate(inventory: list[int], reqs_list: list[RequirementFunction]) -> bool:
-        return all([r(inventory) for r in reqs_list])
+        inventory = ItemInventory.of(inventory)
+        return all(r(inventory) for r in reqs_list)
 
     def is_location_available(self, inventory: list[int], location: KH2Location) -> bool:
         return self.evaluate(inventory, self.location_requirements[location])
@@ -308,8 +326,9 @@ class LocationInformedSeedValidator:
     def prepare_requirements_list(self, location_lists: list[Locations], synthesis_recipes: list[SynthesisRecipe]):
         self.location_requirements.clear()
         for locations in location_lists:
+            node_requirements = locations.node_requirements()
             for node_id in locations.node_ids():
-                parent_requirement_function = get_all_parent_edge_requirements(node_id, locations.location_graph)
+                parent_requirement_function = node_requirements.requirement_for_node(node_id)
                 for location in locations.locations_for_node(node_id):
                     if location not in self.location_requirements:
                         self.location_requirements[location] = []
@@ -343,26 +362,28 @@ class LocationInformedSeedValidator:
     ) -> list[KH2Location]:
         self.prep_requirements_list(settings, randomizer)
 
-        location_requirements = copy.deepcopy(self.location_requirements)
+        location_requirements = {location: list(requirements) for location, requirements in self.location_requirements.items()}
+        location_order = {location: index for index, location in enumerate(location_requirements)}
+        assigned_item_ids = self._assigned_item_ids_by_location(randomizer)
+        final_xemnas_remaining = sum(1 for location in location_requirements if location.name() == twtnw.CheckLocation.FinalXemnas)
 
         results = ValidationResult()
-        inventory = [item_id for item_id in randomizer.starting_item_ids]
+        inventory = ItemInventory(randomizer.starting_item_ids)
         if len(randomizer.shop_items) > 0:
             for shop_item in randomizer.shop_items:
                 inventory.append(shop_item.Id)
 
+        # Locations that weren't reachable, keyed by the item IDs their requirements looked at. A location can only
+        # become reachable once one of those items is collected, so each pass only re-checks those locations.
+        waiting_on_item: dict[int, set[KH2Location]] = {}
+        locations_to_check = list(location_requirements)
+
         changed = True
         depth = 0
         while changed:
             depth += 1
-            final_xem_in_list = False
-            if not results.any_percent:
-                for location, requirements in location_requirements.items():
-                    if location.name() == twtnw.CheckLocation.FinalXemnas:
-                        final_xem_in_list = True
-                        break
-                if not final_xem_in_list:
-                    results.any_percent = True
+            if not results.any_percent and final_xemnas_remaining == 0:
+                results.any_percent = True
 
             if len(location_requirements) == 0:
                 if verbose:
@@ -373,25 +394,34 @@ class LocationInformedSeedValidator:
             changed = False
             locations_to_remove = []
             items_to_add_to_inventory = []
-            for location, requirements in location_requirements.items():
-                if self.evaluate(inventory, requirements):
-                    # find assigned item to location
-                    for assignment in randomizer.assignments:
-                        # if assignment is one of the struggle win/lose items, only count one, and not count the second.
-                        if assignment.location.name() == stt.CheckLocation.StruggleWinnerChampionBelt:
-                            continue
-                        if location == assignment.location:
-                            items_to_add_to_inventory.append(assignment.item.Id)
-                            if assignment.item2 is not None:
-                                items_to_add_to_inventory.append(assignment.item2.Id)
-                            break
+            for location in locations_to_check:
+                accessed_ids: set[int] = set()
+                inventory.accessed_ids = accessed_ids
+                available = self.evaluate(inventory, location_requirements[location])
+                inventory.accessed_ids = None
+                if available:
+                    items_to_add_to_inventory.extend(assigned_item_ids.get(location.equality_key(), []))
                     locations_to_remove.append(location)
                     self.location_spheres[location] = depth-1
                     changed = True
-            for shop_item in locations_to_remove:
-                location_requirements.pop(shop_item)
+                else:
+                    for item_id in accessed_ids:
+                        waiting_on_item.setdefault(item_id, set()).add(location)
+            for location in locations_to_remove:
+                location_requirements.pop(location)
+                if location.name() == twtnw.CheckLocation.FinalXemnas:
+                    final_xemnas_remaining -= 1
             inventory.extend(items_to_add_to_inventory)
 
+            # only locations that looked at one of the newly collected items can have a different result next pass
+            next_locations_to_check: set[KH2Location] = set()
+            for item_id in set(items_to_add_to_inventory) | {ItemInventory.ANY_ITEM}:
+                next_locations_to_check.update(waiting_on_item.pop(item_id, set()))
+            locations_to_check = sorted(
+                (location for location in next_locations_to_check if location in location_requirements),
+                key=lambda loc: location_order[loc]
+            )
+
         if (settings.item_accessibility == ItemAccessibilityOption.ALL and results.full_clear) \
                 or (settings.item_accessibility == ItemAccessibilityOption.BEATABLE and results.any_percent):
             # we all good
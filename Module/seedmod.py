@@ -1,10 +1,8 @@
-import io
 import textwrap
-import zipfile
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional, Any
-from zipfile import ZipFile, ZIP_DEFLATED
+from zipfile import ZipFile
 
 import yaml
 
@@ -14,6 +12,7 @@ from List.configDict import locationType
 from Module.RandomizerSettings import RandomizerSettings
 from Module.cosmeticsmods.keyblade import KeybladeRandomizer, KeybladeRandomizerResult
 from Module.resources import resource_path
+from Module.staticdata import mutable_copy, static_data
 
 
 def _relative_mod_path(name: str) -> Path:
@@ -49,6 +48,9 @@ class SeedModBuilder:
         self.prize_table = PrizeTable(_relative_mod_file("przt.yml"))
         self.treasures = Treasures(_relative_mod_file("TrsrList.yml"))
         self.atkp_organizer = AttackEntriesOrganizer(_relative_mod_file("AtkpList.yml"))
+        # Contents of the cmd listpatches written so far, by their name in the zip, so that merging them doesn't need
+        # to read them back out of the zip
+        self.cmd_listpatches: dict[str, Any] = {}
 
     def add_base_assets(self):
         """Adds asset entries to the mod for files that get included with every seed."""
@@ -497,7 +499,7 @@ class SeedModBuilder:
                 resource_path(f"static/as_data_split/{script_name}"), source_name
             )
 
-    def write_puzzle_assets(self, modified_puzzle_binary: bytearray):
+    def write_puzzle_assets(self, modified_puzzle_binary: bytes):
         """Adds assets and files to the mod for modified puzzle rewards."""
         source_name = _relative_mod_file("modified_puzzle.bin")
 
@@ -530,7 +532,7 @@ class SeedModBuilder:
 
         self.out_zip.writestr(source_name, modified_puzzle_binary)
 
-    def write_shop_assets(self, modified_shop_binary: bytearray):
+    def write_shop_assets(self, modified_shop_binary: bytes):
         """Adds assets and files to the mod for modified shop content."""
         source_name = _relative_mod_file("modified_shop.bin")
 
@@ -548,8 +550,8 @@ class SeedModBuilder:
 
     def write_synth_assets(
         self,
-        modified_recipes_binary: bytearray,
-        modified_requirements_binary: bytearray,
+        modified_recipes_binary: bytes,
+        modified_requirements_binary: bytes,
     ):
         """Adds assets and files to the mod for modified synthesis recipes and requirements."""
         recipes_source_name = _relative_mod_file("modified_synth.bin")
@@ -720,8 +722,9 @@ class SeedModBuilder:
         self.out_zip.write(
             resource_path(f"static/{modified_cmd_list_yml}"), source_name
         )
+        self.cmd_listpatches[source_name.replace("\\", "/")] = static_data(f"static/{modified_cmd_list_yml}")
 
-    def write_battle_level_assets(self, modified_battle_level_binary: bytearray):
+    def write_battle_level_assets(self, modified_battle_level_binary: bytes):
         """Adds assets and files to the mod for modified battle levels."""
         source_name = _relative_mod_file("modified_btlv.bin")
 
@@ -1129,10 +1132,11 @@ class SeedModBuilder:
             resource_path("static/chests/obj/F_EX040_PRF.mdlx"), prf_source_name
         )
 
-    def validate_and_write_mod_yml(
-        self, zip_data: io.BytesIO, settings: RandomizerSettings
-    ) -> io.BytesIO:
-        """Performs some validation and deduplication of assets in the mod, and writes the mod.yml to the zip file."""
+    def validate_and_write_mod_yml(self, settings: RandomizerSettings):
+        """
+        Performs some validation and deduplication of assets in the mod, and writes the mod.yml (and any merged files)
+        to the zip file. Must be called while the zip is still open, after everything else has been written to it.
+        """
 
         mod_data = self.mod_yml.data
 
@@ -1152,13 +1156,13 @@ class SeedModBuilder:
 
         # if there are multiple cmd listpatches, we have to read all the contents to create new file
         if len(listpatch_file_paths) > 1:
-            with ZipFile(zip_data, "r") as current_zip:
-                for listpatch_file_path in listpatch_file_paths:
-                    path = zipfile.Path(current_zip, at=listpatch_file_path)
-                    with path.open(encoding="UTF-8") as current_listpatch_file:
-                        listpatch_contents.extend(
-                            yaml.safe_load(current_listpatch_file)
-                        )
+            for listpatch_file_path in listpatch_file_paths:
+                if listpatch_file_path in self.cmd_listpatches:
+                    listpatch_contents.extend(mutable_copy(self.cmd_listpatches[listpatch_file_path]))
+                else:
+                    # Written by something other than this builder (khbr, for example), so it has to be read back
+                    listpatch_text = self.out_zip.read(listpatch_file_path).decode("utf-8")
+                    listpatch_contents.extend(yaml.safe_load(listpatch_text))
 
             # remove all instances of 03_system cmd listpatches (we'll add another afterward)
             num_03system_entries = 0
@@ -1227,18 +1231,14 @@ class SeedModBuilder:
                 asset["multi"].append({"name": "msg/sp/eh.bar"})
 
         # now that the mod yml is proper, we want to add any merged files into the zip, along with the mod.yml
-        with ZipFile(zip_data, "a", ZIP_DEFLATED) as current_zip:
-            self.mod_yml.write_to_zip_file(current_zip)
-            if len(listpatch_contents) > 0:
-                write_yaml_to_zip_file(
-                    current_zip,
-                    merged_command_list_source,
-                    listpatch_contents,
-                    sort_keys=False,
-                )
-
-        zip_data.seek(0)
-        return zip_data
+        self.mod_yml.write_to_zip_file(self.out_zip)
+        if len(listpatch_contents) > 0:
+            write_yaml_to_zip_file(
+                self.out_zip,
+                merged_command_list_source,
+                listpatch_contents,
+                sort_keys=False,
+            )
 
     def write_mod_ymls(self, include_main_mod_yml: bool):
         """Writes the output for the various mod YAML files."""
@@ -1,11 +1,16 @@
-from typing import Optional
+import json
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional
 
-from Class.itemClass import KH2Item
+from Class.itemClass import ItemEncoder, KH2Item
 from List.ItemList import Items
 from List.ObjectiveList import KH2Objective
 from List.configDict import locationType
 from List.inventory import misc
 from Module.newRandomize import ItemAssignment, SynthesisRecipe, WeaponStats
+from Module.resources import resource_path
 from Module.weighting import LocationWeights
 
 
@@ -101,9 +106,13 @@ def synth_recipe_dictionary(assignments: list[ItemAssignment], recipes: list[Syn
     sorted_recipes = [r for r in recipes]
     sorted_recipes.sort(key=lambda r: r.location.LocationId)
 
+    assignments_by_location: dict[tuple, ItemAssignment] = {}
+    for assignment in assignments:
+        assignments_by_location.setdefault(assignment.location.equality_key(), assignment)
+
     for recipe in sorted_recipes:
         location = recipe.location
-        synth_assignment = next(a for a in assignments if a.location == location)
+        synth_assignment = assignments_by_location[location.equality_key()]
         requirement_strings = []
         for requirement in recipe.requirements:
             requirement_strings.append(" x".join([requirement.synth_item.Name, f"{requirement.amount}"]))
@@ -124,11 +133,14 @@ def weapon_stats_dictionary(
         weapons: list[WeaponStats]
 ) -> list[dict[str, str]]:
     all_assignments = sora_assignments + donald_assignments + goofy_assignments
+    assignments_by_location: dict[tuple, ItemAssignment] = {}
+    for assignment in all_assignments:
+        assignments_by_location.setdefault(assignment.location.equality_key(), assignment)
 
     result: list[dict[str, str]] = []
     for weapon in weapons:
         location = weapon.location
-        assignment = next((a for a in all_assignments if a.location == location), None)
+        assignment = assignments_by_location.get(location.equality_key())
         if assignment is None:
             assignment_item = ""
         else:
@@ -162,3 +174,83 @@ def objectives_dictionary(objectives: list[KH2Objective]) -> list[dict[str, str]
             "difficulty": objective.Difficulty.value,
         })
     return result
+
+
+# Each section of a spoiler log, by its name in the JSON document, and the placeholder it fills in static/spoilerlog.html
+SPOILER_SECTION_PLACEHOLDERS: dict[str, str] = {
+    "seed_name": "SEED_NAME_STRING",
+    "seed_string": "SEED_STRING",
+    "platform": "PLATFORM_GENERATED",
+    "level_stats": "LEVEL_STATS_JSON",
+    "form_exp": "FORM_EXP_JSON",
+    "depth_values": "DEPTH_VALUES_JSON",
+    "sora_items": "SORA_ITEM_JSON",
+    "donald_items": "DONALD_ITEM_JSON",
+    "goofy_items": "GOOFY_ITEM_JSON",
+    "boss_enemy": "BOSS_ENEMY_JSON",
+    "battle_levels": "BATTLE_LEVEL_JSON",
+    "synthesis_recipes": "SYNTHESIS_RECIPE_JSON",
+    "weapon_stats": "WEAPON_STATS_JSON",
+    "journal_hints": "JOURNAL_HINTS_JSON",
+    "objectives": "OBJECTIVES_JSON",
+    "settings": "SETTINGS_JSON",
+}
+# Sections that go into the page as plain text rather than as JSON
+_TEXT_SECTIONS = frozenset(["seed_name", "seed_string", "platform"])
+
+# static/spoilerlog.html, split into (text, name of the section that follows it or None at the end)
+_html_template: Optional[list[tuple[str, Optional[str]]]] = None
+_html_template_lock = threading.Lock()
+
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), cls=ItemEncoder).replace("PromiseCharm", "Promise Charm")
+
+
+def _spoiler_html_template() -> list[tuple[str, Optional[str]]]:
+    global _html_template
+    with _html_template_lock:
+        if _html_template is None:
+            with open(resource_path("static/spoilerlog.html")) as spoiler_site:
+                template = spoiler_site.read().replace("PromiseCharm", "Promise Charm")
+            section_names = {placeholder: name for name, placeholder in SPOILER_SECTION_PLACEHOLDERS.items()}
+            pattern = re.compile("{(" + "|".join(section_names.keys()) + ")}")
+            parts = pattern.split(template)
+            # re.split alternates between the text and the captured placeholder names, ending with text
+            _html_template = [(parts[i], section_names[parts[i + 1]]) for i in range(0, len(parts) - 1, 2)]
+            _html_template.append((parts[-1], None))
+        return _html_template
+
+
+@dataclass(frozen=True)
+class SpoilerLog:
+    """
+    A seed's spoiler log, held as the compact JSON text of each of its sections. This is cheap to build and to pass
+    between processes. The HTML page, which is much larger, is only rendered when it's actually wanted.
+    """
+    sections: dict[str, str]
+
+    @staticmethod
+    def from_data(data: dict[str, Any]) -> "SpoilerLog":
+        """Makes a spoiler log from the value of each section (see SPOILER_SECTION_PLACEHOLDERS)."""
+        return SpoilerLog({name: _compact_json(data[name]) for name in SPOILER_SECTION_PLACEHOLDERS})
+
+    @staticmethod
+    def from_json(document: str) -> "SpoilerLog":
+        """Reads a spoiler log previously written with to_json."""
+        data = json.loads(document)
+        return SpoilerLog({name: _compact_json(data[name]) for name in SPOILER_SECTION_PLACEHOLDERS})
+
+    def to_json(self) -> str:
+        """Returns the whole spoiler log as one compact JSON document."""
+        return "{" + ",".join(f"{json.dumps(name)}:{section}" for name, section in self.sections.items()) + "}"
+
+    def to_html(self) -> str:
+        """Renders the spoiler log page."""
+        parts: list[str] = []
+        for text, section_name in _spoiler_html_template():
+            parts.append(text)
+            if section_name is not None:
+                section = self.sections[section_name]
+                parts.append(json.loads(section) if section_name in _TEXT_SECTIONS else section)
+        return "".join(parts)
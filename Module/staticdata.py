@@ -0,0 +1,118 @@
+"""
+Process-wide registry of the parsed YAML and JSON data files that ship in static/.
+
+Each file is parsed at most once per process, the first time it's asked for. The parsed data is also saved to a pickle
+sidecar keyed by a hash of the file's contents, so later runs (and other worker processes) skip parsing entirely, and an
+edited data file is simply parsed again.
+
+The data handed out is shared, so it's read-only: dicts come back as mappingproxy objects and lists as tuples. Anything
+that needs changing should be copied first (dict(entry), list(entries), or mutable_copy for all of it). Lookup tables
+built from a file's data can be kept alongside it with derived_static_data.
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, TypeVar
+
+import yaml
+
+from Module.resources import resource_path
+
+SIDECAR_FOLDER = Path("cache") / "static-data"
+
+T = TypeVar("T")
+
+_loaded: dict[str, Any] = {}
+_derived: dict[tuple[str, Callable], Any] = {}
+_loaded_lock = threading.Lock()
+
+
+def static_data(relative_path: str) -> Any:
+    """Returns a read-only view of the parsed contents of the given YAML or JSON file (for example, static/stats.yml)."""
+    try:
+        return _loaded[relative_path]
+    except KeyError:
+        pass
+    with _loaded_lock:
+        if relative_path not in _loaded:
+            source_path = Path(resource_path(relative_path))
+            _loaded[relative_path] = _freeze(_load(source_path, SIDECAR_FOLDER))
+        return _loaded[relative_path]
+
+
+def derived_static_data(relative_path: str, derive: Callable[[Any], T]) -> T:
+    """
+    Returns the result of derive(static_data(relative_path)), computed once per process for each derive function.
+    Meant for indexes over a data file, which like the data itself must be treated as read-only.
+    """
+    key = (relative_path, derive)
+    try:
+        return _derived[key]
+    except KeyError:
+        pass
+    data = static_data(relative_path)
+    with _loaded_lock:
+        if key not in _derived:
+            _derived[key] = derive(data)
+        return _derived[key]
+
+
+def mutable_copy(data: Any) -> Any:
+    """Returns a deep copy of (some of) the data handed out by static_data, as plain dicts and lists."""
+    if isinstance(data, MappingProxyType):
+        return {key: mutable_copy(value) for key, value in data.items()}
+    elif isinstance(data, tuple):
+        return [mutable_copy(value) for value in data]
+    else:
+        return data
+
+
+def _load(source_path: Path, sidecar_folder: Path) -> Any:
+    """Returns the parsed (mutable) contents of the source file, from its sidecar if there's an up-to-date one."""
+    raw = source_path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()[:16]
+    sidecar_path = sidecar_folder / f"{source_path.name}.{digest}.pickle"
+    try:
+        with open(sidecar_path, "rb") as sidecar_file:
+            return pickle.load(sidecar_file)
+    except FileNotFoundError:
+        pass
+    except (OSError, EOFError, pickle.UnpicklingError):
+        # An unreadable or truncated sidecar is just rebuilt
+        pass
+
+    if source_path.suffix == ".json":
+        data = json.loads(raw)
+    else:
+        data = yaml.safe_load(raw)
+    _write_sidecar(source_path, sidecar_path, data)
+    return data
+
+
+def _write_sidecar(source_path: Path, sidecar_path: Path, data: Any):
+    try:
+        sidecar_path.parent.mkdir(parents=True, exist_ok=True)
+        for stale_sidecar in sidecar_path.parent.glob(f"{source_path.name}.*.pickle"):
+            stale_sidecar.unlink(missing_ok=True)
+        # Written to a temporary file first so that a concurrent reader never sees a partial sidecar
+        file_descriptor, temp_path = tempfile.mkstemp(dir=sidecar_path.parent, suffix=".tmp")
+        with os.fdopen(file_descriptor, "wb") as temp_file:
+            pickle.dump(data, temp_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, sidecar_path)
+    except OSError:
+        # Not being able to cache (a read-only install, for example) only costs parsing the file again next time
+        pass
+
+
+def _freeze(data: Any) -> Any:
+    if isinstance(data, dict):
+        return MappingProxyType({key: _freeze(value) for key, value in data.items()})
+    elif isinstance(data, list):
+        return tuple(_freeze(value) for value in data)
+    else:
+        return data
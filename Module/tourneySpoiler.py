@@ -1,13 +1,91 @@
+import os
+import re
 import shutil
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
 
+from Class.exceptions import SettingsException
 from Module import hashimage
 from Module.resources import resource_path
+from Module.seedshare import SEED_SPLITTER
+from Module.spoilerLog import SpoilerLog
 from UI import theme
 
+# Each seed's files are in a folder of their own, named like seed1
+_SEED_FOLDER_PATTERN = re.compile(r"seed(\d+)")
+_SEED_STRING_FILENAME = "seed-string.txt"
+_HASH_IMAGE_FILENAME = "hash.png"
+_SPOILER_JSON_FILENAME = "spoiler.json"
+_SPOILER_HTML_FILENAME = "spoiler.html"
+
+
+def _seed_spoiler_html(spoilers: SpoilerLog) -> str:
+    # The page expects the font next to it, but the seed's folder shares the one in the tourney folder
+    return spoilers.to_html().replace('url("misc/KHMenu.otf")', 'url("../misc/KHMenu.otf")')
+
+
+def render_spoiler_html(spoiler_json_path: Path) -> Path:
+    """
+    Renders the page for a tourney seed's spoiler log saved as JSON into an HTML file next to it, and returns that
+    file's path.
+    """
+    with open(spoiler_json_path) as infile:
+        spoilers = SpoilerLog.from_json(infile.read())
+    html_path = spoiler_json_path.with_suffix(".html")
+    with open(html_path, "w") as outfile:
+        outfile.write(_seed_spoiler_html(spoilers))
+    return html_path
+
+
+def _share_string_settings(share_string: str) -> list[str]:
+    # Everything in a share string other than the seed name: the generator version, whether it's a tourney seed,
+    # whether it has a spoiler log, and the settings string
+    parts = share_string.split(SEED_SPLITTER)
+    return parts[:2] + parts[3:]
+
+
+def saved_seed_folders(path_to_save: Path) -> list[Path]:
+    """Returns the folders of the complete seeds already saved in a tourney folder, in seed number order."""
+    saved_seeds: list[tuple[int, Path]] = []
+    if path_to_save.is_dir():
+        for seed_folder in path_to_save.iterdir():
+            match = _SEED_FOLDER_PATTERN.fullmatch(seed_folder.name)
+            if match is not None and (seed_folder / _SEED_STRING_FILENAME).is_file():
+                saved_seeds.append((int(match.group(1)), seed_folder))
+    return [seed_folder for _, seed_folder in sorted(saved_seeds)]
+
+
+def _write_text_atomically(path: Path, text: str):
+    file_descriptor, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "w") as temp_file:
+            temp_file.write(text)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
 
 class TourneySeedSaver:
+    """
+    Saves tourney seeds into a folder as they're generated: a page listing all of the seeds, and a folder for each seed
+    with its hash image and spoiler log (as JSON, and as a page unless spoiler_html is off). Spoiler pages that were
+    skipped can be rendered later with render_spoiler_html.
+
+    Seeds are written by a background thread while the next ones are generated. Each seed's folder is written under a
+    temporary name and then renamed, and the seed list page is rewritten after every seed, so if generation stops
+    partway through, the folder only ever contains complete seeds.
+
+    If the folder already has seeds in it, a saver that resumes picks up where the earlier one stopped: those seeds
+    stay in the list, and new seeds are numbered after them (call check_settings() before adding any, so that seeds
+    with different settings aren't mixed in). Otherwise, the earlier seeds are deleted.
 
-    def __init__(self, path_to_save, tourney_name):
+    Call save() once all of the seeds have been added, to wait for them to be written.
+    """
+
+    def __init__(self, path_to_save, tourney_name, spoiler_html: bool = True, resume: bool = False):
         self.start_html = f"""
 <!DOCTYPE html>
 <html lang="en">
@@ -52,48 +130,145 @@ class TourneySeedSaver:
 </body>
 </html>
 """
-        self.seed_strings = []
-        self.seed_names = []
-        self.path_to_save = path_to_save
+        self.seed_strings: list[str] = []
+        self.seed_names: list[str] = []
+        self.path_to_save = Path(path_to_save)
         self.tourney_name = tourney_name
+        self.spoiler_html = spoiler_html
+        self._last_seed_number = 0
 
-        self.seed_htmls = []
-
-    def save(self):
-        with open(self.path_to_save / f"{self.tourney_name}.html", "w") as outfile:
-            outfile.write(self.start_html)
-            for h in self.seed_htmls:
-                outfile.write(h)
-            outfile.write(self.end_html)
+        # Only used by the writer thread, apart from while resuming here
+        self.seed_htmls: list[str] = []
+        self._pending_writes: list[Future] = []
+        self._writer: Optional[ThreadPoolExecutor] = None
 
+        self.path_to_save.mkdir(parents=True, exist_ok=True)
+        self._remove_stale_seeds()
+        if resume:
+            self._resume()
+        else:
+            self._remove_saved_seeds()
         misc_dir = self.path_to_save / "misc"
-        misc_dir.mkdir()
-        shutil.copy(resource_path("static/KHMenu.otf"), misc_dir)
+        misc_dir.mkdir(exist_ok=True)
+        if not (misc_dir / "KHMenu.otf").exists():
+            shutil.copy(resource_path("static/KHMenu.otf"), misc_dir)
 
-    def add_seed(self, seed_string, settings, spoilers):
-        self.seed_strings.append(seed_string)
+    def _remove_stale_seeds(self):
+        for stale_folder in self.path_to_save.glob(".seed*.tmp"):
+            # A seed that was still being written when an earlier run stopped
+            shutil.rmtree(stale_folder, ignore_errors=True)
+
+    def _remove_saved_seeds(self):
+        for seed_folder in saved_seed_folders(self.path_to_save):
+            shutil.rmtree(seed_folder)
+
+    def _resume(self):
+        for seed_folder in saved_seed_folders(self.path_to_save):
+            seed_number = int(_SEED_FOLDER_PATTERN.fullmatch(seed_folder.name).group(1))
+            seed_string = (seed_folder / _SEED_STRING_FILENAME).read_text()
+            spoiler_filename = _SPOILER_HTML_FILENAME
+            if not (seed_folder / _SPOILER_HTML_FILENAME).exists():
+                spoiler_filename = _SPOILER_JSON_FILENAME
+            self.seed_strings.append(seed_string)
+            self.seed_names.append(seed_folder.name)
+            self._add_seed_html(seed_number, seed_string, seed_folder.name, spoiler_filename)
+            self._last_seed_number = seed_number
+
+    def check_settings(self, seed_string: str):
+        """
+        Raises a SettingsException if any of the seeds already in the folder were made with different settings (or a
+        different generator version) than the given seed string.
+        """
+        expected_settings = _share_string_settings(seed_string)
+        mismatched = [
+            seed_name for seed_name, saved_string in zip(self.seed_names, self.seed_strings)
+            if _share_string_settings(saved_string) != expected_settings
+        ]
+        if len(mismatched) > 0:
+            raise SettingsException(
+                f"{', '.join(mismatched)} in {self.path_to_save} were made with different settings. Start this "
+                f"tourney over, or use a different tourney name."
+            )
 
-        seed_filename = f"seed{len(self.seed_strings)}"
+    def save(self):
+        """Waits for all of the seeds to be written, and raises the error if any of them couldn't be."""
+        writer = self._writer
+        self._writer = None
+        if writer is not None:
+            writer.shutdown(wait=True)
+        else:
+            self._write_index()
+        self._raise_write_errors()
+
+    def add_seed(self, seed_string, settings, spoilers: SpoilerLog):
+        """Adds a seed to be written in the background."""
+        self._raise_write_errors()
+        self._last_seed_number += 1
+        seed_number = self._last_seed_number
+        seed_filename = f"seed{seed_number}"
+        self.seed_strings.append(seed_string)
         self.seed_names.append(seed_filename)
 
-        image_data = hashimage.generate_seed_hash_image(settings.seedHashIcons, use_bitmap=False)
-        with open(self.path_to_save / f"{seed_filename}.png", "wb") as outfile:
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tourney-seed-writer")
+        hash_icons = list(settings.seedHashIcons)
+        self._pending_writes.append(
+            self._writer.submit(self._write_seed, seed_number, seed_string, seed_filename, hash_icons, spoilers)
+        )
+
+    def _raise_write_errors(self):
+        still_pending: list[Future] = []
+        for future in self._pending_writes:
+            if future.done():
+                # Raises the error if the write failed
+                future.result()
+            else:
+                still_pending.append(future)
+        self._pending_writes = still_pending
+
+    def _write_seed(
+        self, seed_number: int, seed_string: str, seed_filename: str, hash_icons: list[str], spoilers: SpoilerLog
+    ):
+        # Runs on the writer thread
+        seed_folder = self.path_to_save / seed_filename
+        temp_folder = self.path_to_save / f".{seed_filename}.tmp"
+        shutil.rmtree(temp_folder, ignore_errors=True)
+        temp_folder.mkdir()
+
+        image_data = hashimage.generate_seed_hash_image(hash_icons, use_bitmap=False)
+        with open(temp_folder / _HASH_IMAGE_FILENAME, "wb") as outfile:
             outfile.write(image_data)
+        with open(temp_folder / _SPOILER_JSON_FILENAME, "w") as outfile:
+            outfile.write(spoilers.to_json())
+        if self.spoiler_html:
+            with open(temp_folder / _SPOILER_HTML_FILENAME, "w") as outfile:
+                outfile.write(_seed_spoiler_html(spoilers))
+            spoiler_filename = _SPOILER_HTML_FILENAME
+        else:
+            spoiler_filename = _SPOILER_JSON_FILENAME
+        # Written last, since it's what marks the folder as a complete seed
+        with open(temp_folder / _SEED_STRING_FILENAME, "w") as outfile:
+            outfile.write(seed_string)
+        os.replace(temp_folder, seed_folder)
 
-        with open(self.path_to_save / f"{seed_filename}.html", "w") as outfile:
-            outfile.write(spoilers)
+        self._add_seed_html(seed_number, seed_string, seed_filename, spoiler_filename)
+        self._write_index()
 
-        self._add_seed_html(seed_string=seed_string, seed_filename=seed_filename)
+    def _write_index(self):
+        _write_text_atomically(
+            self.path_to_save / f"{self.tourney_name}.html",
+            self.start_html + "".join(self.seed_htmls) + self.end_html,
+        )
 
-    def _add_seed_html(self, seed_string: str, seed_filename: str):
+    def _add_seed_html(self, seed_number: int, seed_string: str, seed_filename: str, spoiler_filename: str):
         self.seed_htmls.append(f"""
 <div class="tourney-seed">
-    <h2>Seed {len(self.seed_strings)}    
+    <h2>Seed {seed_number}    
         <button onclick="navigator.clipboard.writeText(document.getElementById('{seed_filename}').textContent).then(function(){{var b=document.getElementById('copy-btn-{seed_filename}');b.textContent='Copied!';setTimeout(function(){{b.textContent='Copy'}},1500)}})" id="copy-btn-{seed_filename}" style="margin-left:10px;padding:3px 10px;background:#422169;color:#c663f5;border:1px solid #c663f5;border-radius:4px;cursor:pointer;font-family:KHMenu,sans-serif;font-size:0.8em;">Copy</button>
     </h2>
     <h3><span id="{seed_filename}">{seed_string}</span>
     </h3>
-    <img src="{seed_filename}.png">
-    <a href="{seed_filename}.html">Spoiler Log</a>
+    <img src="{seed_filename}/{_HASH_IMAGE_FILENAME}">
+    <a href="{seed_filename}/{spoiler_filename}">Spoiler Log</a>
 </div>
 """)
@@ -1,3 +1,4 @@
+from itertools import chain
 from math import ceil, floor
 from typing import Union
 
@@ -209,6 +210,32 @@ class LocationWeights:
 
         self.weights[itemType.PROMISE_CHARM] = self.base_weights[settings.promise_charm_weights]
 
+        # Dense lookup tables, built once so that weighting a location pool doesn't recompute depths for every item.
+        # Each location gets a stable index, and each item type gets a row of weights by location index. Item types
+        # sharing the same weighting also share the same row.
+        self.location_indices: dict[KH2Location, int] = {}
+        location_depths: list[Union[int, tuple[int, int]]] = []
+        for location in chain(self.location_depths, self.reverse_location_depths):
+            if location in self.location_indices:
+                continue
+            try:
+                depth = self.get_depth(location)
+            except (KeyError, ValueError):
+                # Left out of the table; looking it up reports the same error as computing its depth directly
+                continue
+            self.location_indices[location] = len(location_depths)
+            location_depths.append(depth)
+
+        rows_by_weighting: dict[tuple[int, ...], list[int]] = {}
+        self.weight_table: dict[itemType, list[int]] = {}
+        for item_type, rarity_weights in self.weights.items():
+            weighting = tuple(rarity_weights)
+            row = rows_by_weighting.get(weighting)
+            if row is None:
+                row = [self._weight_for_depth(rarity_weights, depth) for depth in location_depths]
+                rows_by_weighting[weighting] = row
+            self.weight_table[item_type] = row
+
     def get_depth(self, location: KH2Location) -> Union[int, tuple[int, int]]:
         """
         Returns either a single depth (for levels or regular or reverse rando) or a tuple of
@@ -244,10 +271,20 @@ class LocationWeights:
             return (regular_weight + reverse_weight) // 2
         
 
+    def location_index(self, location: KH2Location) -> int:
+        """ Returns the index of the given location in the rows of the weight table. """
+        index = self.location_indices.get(location)
+        if index is None:
+            self.get_depth(location)
+            raise KeyError(location)
+        return index
+
     def get_weight(self, item_type: itemType, location: KH2Location) -> int:
         """ Returns the weight that should be used for an item of the given type at the given location. """
-        depth_or_depths = self.get_depth(location)
-        rarity_weights = self.weights[item_type]
+        return self.weight_table[item_type][self.location_index(location)]
+
+    @staticmethod
+    def _weight_for_depth(rarity_weights: list[int], depth_or_depths: Union[int, tuple[int, int]]) -> int:
         if isinstance(depth_or_depths, int):
             return rarity_weights[depth_or_depths]
         elif isinstance(depth_or_depths, tuple):
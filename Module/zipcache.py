@@ -0,0 +1,114 @@
+"""
+Process-wide cache of compressed zip file data, keyed by a hash of the source file's contents and the compression used.
+
+Most of the files copied into a mod zip (scripts, textures, fonts, icons) are the same for every seed, so compressing
+them again for each seed is wasted work, especially when generating a batch of seeds. ModZipFile takes the compressed
+bytes from here and splices them straight into the zip, producing exactly what compressing the file would have.
+"""
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from zipfile import ZIP_DEFLATED, ZIP_STORED
+
+# The compression methods whose output is cached. Anything else is just compressed as usual.
+CACHEABLE_COMPRESSION = frozenset([ZIP_STORED, ZIP_DEFLATED])
+
+
+@dataclass(frozen=True)
+class CompressedFile:
+    """A file's contents as stored in a zip."""
+    crc: int
+    file_size: int
+    compressed_data: bytes
+
+
+def compress_file_data(data: bytes, compress_type: int, compresslevel: Optional[int]) -> CompressedFile:
+    """Compresses the data exactly the way ZipFile would for the given compression method and level."""
+    if compress_type == ZIP_STORED:
+        compressed_data = data
+    elif compress_type == ZIP_DEFLATED:
+        level = zlib.Z_DEFAULT_COMPRESSION if compresslevel is None else compresslevel
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        compressed_data = compressor.compress(data) + compressor.flush()
+    else:
+        raise ValueError(f"Unsupported compression method {compress_type}")
+    return CompressedFile(zlib.crc32(data), len(data), compressed_data)
+
+
+class CompressedFileCache:
+    """
+    Least-recently-used cache of compressed files, holding at most max_bytes of compressed data. Files larger than
+    max_file_bytes are never cached.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, max_file_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, int, Optional[int]], CompressedFile] = OrderedDict()
+        self._cached_bytes = 0
+        # Path to the (size, modification time, content hash) it had when last hashed, to avoid reading unchanged files
+        self._source_hashes: dict[str, tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def compressed_file(self, path: str, compress_type: int, compresslevel: Optional[int]) -> Optional[CompressedFile]:
+        """
+        Returns the contents of the file at the path, compressed with the given method and level. Returns None for a file
+        that can't be cached (too large, or using another compression method), which should be compressed as usual.
+        """
+        if compress_type not in CACHEABLE_COMPRESSION:
+            return None
+        if compress_type == ZIP_STORED:
+            compresslevel = None
+        stat = os.stat(path)
+        if stat.st_size > self.max_file_bytes:
+            return None
+
+        path_key = os.path.abspath(path)
+        with self._lock:
+            known_hash = self._source_hashes.get(path_key)
+            if known_hash is not None and known_hash[:2] == (stat.st_size, stat.st_mtime_ns):
+                entry = self._entries.get((known_hash[2], compress_type, compresslevel))
+                if entry is not None:
+                    self._entries.move_to_end((known_hash[2], compress_type, compresslevel))
+                    self.hits += 1
+                    return entry
+
+        with open(path, "rb") as source_file:
+            data = source_file.read()
+        source_hash = hashlib.sha256(data).hexdigest()
+        key = (source_hash, compress_type, compresslevel)
+        with self._lock:
+            self._source_hashes[path_key] = (stat.st_size, stat.st_mtime_ns, source_hash)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Compressed outside the lock, so that (rarely) two threads may both compress the same file
+        entry = compress_file_data(data, compress_type, compresslevel)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = entry
+                self._cached_bytes += len(entry.compressed_data)
+                while self._cached_bytes > self.max_bytes and len(self._entries) > 0:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._cached_bytes -= len(evicted.compressed_data)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._source_hashes.clear()
+            self._cached_bytes = 0
+
+
+# Shared by every seed generated in this process
+SHARED_FILE_CACHE = CompressedFileCache()
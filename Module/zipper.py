@@ -1,21 +1,23 @@
 import base64
 import io
 import json
+import os
 import random
+import threading
+from contextlib import contextmanager, suppress
 from itertools import accumulate
-from typing import Optional, Any
-from zipfile import ZipFile, ZIP_DEFLATED
+from typing import Optional, Any, BinaryIO, Callable, Iterator, Union
+from zipfile import ZipFile
 
 import yaml
 
 from Class import settingkey
-from Class.exceptions import GeneratorException
-from Class.itemClass import ItemEncoder, KH2Item
+from Class.exceptions import GeneratorException, RandomizerExceptions, ZipOutputException
+from Class.itemClass import KH2Item
 from Class.newLocationClass import KH2Location
-from Class.openkhmod import ModYml
+from Class.openkhmod import ModYml, ModZipFile
 from Class.seedSettings import SeedSettings, ExtraConfigurationData, makeKHBRSettings
 from List import ChestList
-from List.DropRateIds import id_to_enemy_name
 from List.ItemList import Items
 from List.LvupStats import DreamWeaponOffsets
 from List.ObjectiveList import KH2Objective
@@ -26,12 +28,16 @@ from List.location import simulatedtwilighttown as stt
 from Module import hashimage
 from Module.RandomizerSettings import RandomizerSettings
 from Module.battleLevels import BtlvViewer
+from Module.binarytables import BinaryTable, PatchedBinary, DROP_RATES, PUZZLES, SHOP_HEADER, SHOP_INVENTORIES, \
+    SHOP_PRODUCTS, SHOP_VALID_ITEMS, SYNTHESIS_RECIPES, SYNTHESIS_REQUIREMENTS
+from Module.cancellation import CancellationToken
 from Module.cosmetics import CosmeticsMod
 from Module.hints import Hints, HintData
 from Module.knockbackTypes import KnockbackTypes
 from Module.multiworld import MultiWorldOutput
-from Module.newRandomize import Randomizer, SynthesisRecipe, ItemAssignment
+from Module.newRandomize import Randomizer, SynthesisRecipe, ItemAssignment, WeaponStats, LevelStats
 from Module.resources import resource_path
+from Module.staticdata import static_data
 from Module.seedEvaluation import SeedCheckerLuaGenerator
 from Module.seedmod import SeedModBuilder, ChestVisualAssignment, CosmeticsModAppender
 from Module.spoilerLog import (
@@ -40,26 +46,34 @@ from Module.spoilerLog import (
     synth_recipe_dictionary,
     weapon_stats_dictionary,
     objectives_dictionary,
+    SpoilerLog,
 )
 from Module.version import LOCAL_UI_VERSION
+from Module.zipcache import SHARED_FILE_CACHE
 from Module import atkpRandomizer
 from Module.atkpRandomizer import atkpRandomizerClass
 
 
-def noop(self, *args, **kw):
-    pass
+# khbr only knows how to draw from the shared generator, so only one invocation may seed and use it at a time.
+_khbr_random_lock = threading.Lock()
 
 
-def number_to_bytes(item) -> tuple[int, int]:
-    # for byte1, find the most significant bits from the item Id
-    item_byte1 = item >> 8
-    # for byte0, isolate the least significant bits from the item Id
-    item_byte0 = item & 0x00FF
-    return item_byte0, item_byte1
+def _skip_tag(self, *args, **kw):
+    pass
 
 
-def bytes_to_number(byte0, byte1=0) -> int:
-    return int(byte0) + int(byte1 << 8)
+@contextmanager
+def _khbr_yaml_without_tags():
+    """
+    khbr writes its files with plain yaml.dump, which would include YAML tags. Its output has always been written with
+    tags turned off, so keep doing that, but only while khbr is running (callers must hold _khbr_random_lock).
+    """
+    original_process_tag = yaml.emitter.Emitter.process_tag
+    yaml.emitter.Emitter.process_tag = _skip_tag
+    try:
+        yield
+    finally:
+        yaml.emitter.Emitter.process_tag = original_process_tag
 
 
 def _assignment_subset(
@@ -83,14 +97,18 @@ def _assignment_subset_from_type(
 
 
 def _run_khbr(
-    platform: str, enemy_options: dict, mod_yml: ModYml, out_zip: ZipFile
+    platform: str,
+    enemy_options: dict,
+    mod_yml: ModYml,
+    out_zip: ZipFile,
+    rng: Optional[random.Random] = None,
 ) -> tuple[Optional[str], dict[str, list]]:
     if platform == "PC":
         enemy_options["memory_expansion"] = True
     else:
         enemy_options["memory_expansion"] = False
 
-    enemy_spoilers = _invoke_khbr_with_overrides(enemy_options, mod_yml.data, out_zip)
+    enemy_spoilers = _invoke_khbr_with_overrides(enemy_options, mod_yml.data, out_zip, rng)
 
     lines = enemy_spoilers.split("\n")
 
@@ -119,76 +137,46 @@ def _run_khbr(
     return enemy_spoilers, enemy_spoilers_json
 
 
-def _add_cosmetics(out_zip: ZipFile, mod_yml: ModYml, settings: SeedSettings):
+def _raise_if_cancelled(cancellation: Optional[CancellationToken]):
+    if cancellation is not None:
+        cancellation.raise_if_cancelled()
+
+
+def _add_cosmetics(
+    out_zip: ZipFile,
+    mod_yml: ModYml,
+    settings: SeedSettings,
+    rng: Optional[random.Random] = None,
+    cancellation: Optional[CancellationToken] = None,
+    recolor_progress: Optional[Callable[[int, int], None]] = None,
+):
     appender = CosmeticsModAppender(out_zip=out_zip, mod_yml=mod_yml)
 
-    mod_yml.add_mod_assets(CosmeticsMod.randomize_field2d(settings))
-    mod_yml.add_mod_assets(CosmeticsMod.randomize_itempics(settings))
-    mod_yml.add_mod_assets(CosmeticsMod.randomize_end_screen(settings))
+    _raise_if_cancelled(cancellation)
+    mod_yml.add_mod_assets(CosmeticsMod.randomize_field2d(settings, rng))
+    mod_yml.add_mod_assets(CosmeticsMod.randomize_itempics(settings, rng))
+    mod_yml.add_mod_assets(CosmeticsMod.randomize_end_screen(settings, rng))
 
-    keyblade_result = CosmeticsMod.randomize_keyblades(settings)
+    _raise_if_cancelled(cancellation)
+    keyblade_result = CosmeticsMod.randomize_keyblades(settings, rng)
     appender.write_keyblade_rando_assets(keyblade_result)
 
-    music_assets, music_replacements = CosmeticsMod.randomize_music(settings)
+    _raise_if_cancelled(cancellation)
+    music_assets, music_replacements = CosmeticsMod.randomize_music(settings, rng)
     appender.write_music_rando_assets(music_assets, music_replacements)
 
+    _raise_if_cancelled(cancellation)
     from Module.cosmeticsmods.texture import TextureRecolorizer
-    texture_assets = TextureRecolorizer(settings).recolor_textures()
+    texture_assets = TextureRecolorizer(
+        settings, rng, cancellation=cancellation, progress=recolor_progress
+    ).recolor_textures()
     mod_yml.add_mod_assets(texture_assets)
 
+    _raise_if_cancelled(cancellation)
     if settings.get(settingkey.RANDO_THEMED_TEXTURES):
         appender.write_rando_themed_texture_assets()
 
 
-class SynthList:
-    def __init__(self, offset: int, binary: bytearray):
-        self.offset = offset
-        self.id = bytes_to_number(binary[0], binary[1])
-        self.reward = bytes_to_number(binary[2], binary[3])
-        self.reward_type = bytes_to_number(binary[4])
-        self.material_type = bytes_to_number(binary[5])
-        self.material_rank = bytes_to_number(binary[6])
-        self.condition_type = bytes_to_number(binary[7])
-        self.count_needed = bytes_to_number(binary[8], binary[9])
-        self.unlock_event_shop = bytes_to_number(binary[10], binary[11])
-
-    def __str__(self):
-        if self.reward_type == 1:
-            return f"{self.offset}: ID{self.id} R{self.reward} RT{self.reward_type} MT{self.material_type} MR{self.material_rank} CT{self.condition_type} CN{self.count_needed}"
-        else:
-            return ""
-
-
-class DropRates:
-    def __init__(self, offset: int, binary: bytearray):
-        self.offset = offset
-        self.id = bytes_to_number(binary[0], binary[1])
-        self.small_hp = bytes_to_number(binary[2])
-        self.big_hp = bytes_to_number(binary[3])
-        self.big_munny = bytes_to_number(binary[4])
-        self.medium_munny = bytes_to_number(binary[5])
-        self.small_munny = bytes_to_number(binary[6])
-        self.small_mp = bytes_to_number(binary[7])
-        self.big_mp = bytes_to_number(binary[8])
-        self.small_drive = bytes_to_number(binary[9])
-        self.big_drive = bytes_to_number(binary[10])
-        self.item1 = bytes_to_number(binary[12], binary[13])
-        self.item1_chance = bytes_to_number(binary[14], binary[15])
-        self.item2 = bytes_to_number(binary[16], binary[17])
-        self.item2_chance = bytes_to_number(binary[18], binary[19])
-        self.item3 = bytes_to_number(binary[20], binary[21])
-        self.item3_chance = bytes_to_number(binary[22], binary[23])
-
-    def __str__(self):
-        if True:  # self.item1_chance and self.id not in id_to_enemy_name:
-            dummy = ""
-            return f"{self.id} {(id_to_enemy_name[self.id] if self.id in id_to_enemy_name else dummy)} \n HP ({self.small_hp},{self.big_hp}) \n MP ({self.small_mp},{self.big_mp}) \n Munny ({self.small_munny},{self.medium_munny},{self.big_munny}) \n Orbs ({self.small_drive},{self.big_drive}) Items: \n--- {self.item1} ({self.item1_chance/1.0}%)\n--- {self.item2} ({self.item2_chance/1.0}%)\n--- {self.item3} ({self.item3_chance/1.0}%)"
-        # elif self.id in id_to_enemy_name:
-        #     return f"{self.id} {id_to_enemy_name[self.id]}"
-        # else:
-        #     return ""
-
-
 class SynthLocation:
     def __init__(self, loc: int, item: int, in_recipe: SynthesisRecipe):
         self.location = loc
@@ -201,39 +189,63 @@ class SynthLocation:
                 recipe_requirement.amount,
             )
 
-    def get_starting_location(self) -> int:
-        # header bytes + offset to the specific recipe + skip over the recipe bytes
-        return 16 + self.location * 32 + 2
-
-    def get_bytes(self) -> list[int]:
-        binary = [self.unlock_rank, 0]  # unlock condition/rank
-        item_byte0, item_byte1 = number_to_bytes(self.item)
-        # add the item for this recipe
-        binary.append(item_byte0)
-        binary.append(item_byte1)
-        # add the item as the upgraded version
-        binary.append(item_byte0)
-        binary.append(item_byte1)
-
-        for req in self.requirements:
-            item_byte0, item_byte1 = number_to_bytes(req[0])
-            # add the item as an ingredient
-            binary.append(item_byte0)
-            binary.append(item_byte1)
-            item_byte0, item_byte1 = number_to_bytes(req[1])
-            # add the amount of that ingredient
-            binary.append(item_byte0)
-            binary.append(item_byte1)
-        return binary
-
-
-# (output zip, spoiler log, enemy log)
-SeedZipResult = tuple[io.BytesIO, Optional[str], Optional[str]]
+    def write_to(self, recipes: BinaryTable):
+        # the item for this recipe, also used as the upgraded version
+        recipes.replace(self.location, unlock_rank=self.unlock_rank, unknown=0, reward=self.item, upgraded_reward=self.item)
+        for number, (ingredient, amount) in enumerate(self.requirements, start=1):
+            recipes.set(self.location, f"ingredient{number}", ingredient)
+            recipes.set(self.location, f"ingredient{number}_amount", amount)
+
+
+# (output zip, spoiler log, enemy log), where the output zip is only returned if it was built in memory
+SeedZipResult = tuple[Optional[io.BytesIO], Optional[SpoilerLog], Optional[str]]
 SeedNotZipResult = tuple[Optional[str], Optional[str]]
 
 
+# Somewhere to write a mod zip to: a file path, or any writable binary file object (an open file, a pipe, a socket)
+ZipOutput = Union[str, os.PathLike, BinaryIO]
+
+
+@contextmanager
+def _zip_output_file(output: ZipOutput) -> Iterator[BinaryIO]:
+    """
+    Yields a binary file to write a zip to the output with. A path is opened (and closed) here, while a file object is
+    written to from its current position and left open for the caller.
+
+    If writing fails, whatever was written is thrown away so that another attempt can write to the same output (a file
+    created here is removed, but a file that was already there is left for the next attempt to overwrite). That isn't
+    possible for a stream that can't seek (a pipe, for example), so instead of letting the seed be retried into the same
+    stream, the failure becomes a ZipOutputException.
+    """
+    if isinstance(output, (str, os.PathLike)):
+        created = not os.path.exists(output)
+        output_file = open(output, "wb")
+        try:
+            with output_file:
+                yield output_file
+        except BaseException:
+            if created:
+                with suppress(FileNotFoundError):
+                    os.remove(output)
+            raise
+        return
+
+    try:
+        start = output.tell() if output.seekable() else None
+    except OSError:
+        start = None
+    try:
+        yield output
+    except RandomizerExceptions as e:
+        if start is None:
+            raise ZipOutputException(f"Couldn't finish writing the seed to an output that can't be rewound: {e}") from e
+        output.seek(start)
+        output.truncate()
+        raise
+
+
 def _invoke_khbr_with_overrides(
-    enemy_options: dict, mod: dict[str, Any], out_zip: ZipFile
+    enemy_options: dict, mod: dict[str, Any], out_zip: ZipFile, rng: Optional[random.Random] = None
 ):
     # """
     # A function that mimics the call to generateToZip in khbr. Splitting this out to allow for granular control of
@@ -243,9 +255,7 @@ def _invoke_khbr_with_overrides(
     # from kh2fmbr.KH2.EnemyManager import EnemyManager
     # from kh2fmbr.textutils import create_spoiler_text
 
-    random.seed(
-        str(enemy_options)
-    )  # seed boss/enemy with enemy options, which should include the seed name
+    seed_string = str(enemy_options)  # seed boss/enemy with enemy options, which should include the seed name
     del enemy_options["seed_name"]  # remove it so khbr doesn't complain
 
     # khbr_randomizer = BossEnemyRandomizer()
@@ -297,7 +307,13 @@ def _invoke_khbr_with_overrides(
     ### Backup old way
     from Module import compat as _compat  # noqa: F401 - must precede kh2fmbr import
     from kh2fmbr.randomizer import Randomizer as BossEnemyRandomizer
-    enemySpoilers = BossEnemyRandomizer().generateToZip("kh2", enemy_options, mod, out_zip)
+    with _khbr_random_lock:
+        random.seed(seed_string)
+        with _khbr_yaml_without_tags():
+            enemySpoilers = BossEnemyRandomizer().generateToZip("kh2", enemy_options, mod, out_zip)
+        if rng is not None:
+            # Anything randomized after the bosses/enemies continues from where khbr left off, as it always has
+            rng.setstate(random.getstate())
     return enemySpoilers
 
 
@@ -310,21 +326,23 @@ class SeedZip:
         extra_data: ExtraConfigurationData,
         location_spheres: dict[KH2Location,int],
         multiworld: Optional[MultiWorldOutput] = None,
+        rng: Optional[random.Random] = None,
     ):
         self.settings = settings
         self.randomizer = randomizer
+        self.rng = rng if rng is not None else randomizer.rng
         self.hints = hints
         self.extra_data = extra_data
         self.location_spheres = location_spheres
         self.multiworld = multiworld
 
-    def make_spoiler_without_zip(self) -> str:
+    def make_spoiler_without_zip(self) -> SpoilerLog:
         enemy_spoilers_json: dict[str, str] = {}
 
         settings = self.settings
         btlv_option_name = settings.battle_level_rando
 
-        btlv = BtlvViewer()
+        btlv = BtlvViewer(self.rng)
         btlv.use_setting(
             btlv_option_name,
             battle_level_offset=settings.battle_level_offset,
@@ -335,12 +353,17 @@ class SeedZip:
         )
         battle_level_spoiler = btlv.get_spoiler()
         journal_hints_spoiler = {}
-        spoiler_log_output = self.generate_spoiler_html(
-            enemy_spoilers_json, battle_level_spoiler, journal_hints_spoiler
-        )
-        return spoiler_log_output
+        return self.create_spoiler_log(enemy_spoilers_json, battle_level_spoiler, journal_hints_spoiler)
 
-    def create_zip(self) -> SeedZipResult:
+    def create_zip(
+            self,
+            output: Optional[ZipOutput] = None,
+            cancellation: Optional[CancellationToken] = None,
+    ) -> SeedZipResult:
+        """
+        Writes the seed's mod zip to the output as its files are generated, or builds it in memory (and returns it) if
+        no output is given. The cancellation token (if any) is checked between the slower steps.
+        """
         settings = self.settings
         spoiler_log = settings.spoiler_log
         extra_data = self.extra_data
@@ -351,11 +374,11 @@ class SeedZip:
             title += " w/ Spoiler"
         title+=" "+LOCAL_UI_VERSION
 
-        zip_data = io.BytesIO()
-        spoiler_log_output: Optional[str] = None
+        zip_data = io.BytesIO() if output is None else None
+        spoiler_log_output: Optional[SpoilerLog] = None
         enemy_log_output: Optional[str] = None
-        with ZipFile(zip_data, "w", ZIP_DEFLATED) as out_zip:
-            yaml.emitter.Emitter.process_tag = noop
+        with _zip_output_file(zip_data if output is None else output) as output_file, \
+                ModZipFile(output_file, "w", file_cache=SHARED_FILE_CACHE) as out_zip:
             mod = SeedModBuilder(title, out_zip)
             mod.add_base_assets()
             mod.add_base_messages(
@@ -380,9 +403,7 @@ class SeedZip:
                     else:
                         return original_item
 
-                for assignment in self.randomizer.assignments:
-                    assignment.item = actual_assignment_item(assignment.item)
-                    assignment.item2 = actual_assignment_item(assignment.item2)
+                self.randomizer.replace_assigned_items(actual_assignment_item)
 
                 # if valor/final in starting inventory, swap their ids
                 orig_to_dummy = Items.getFormToDummyMap()
@@ -397,6 +418,7 @@ class SeedZip:
             self.assign_starting_items(mod)
 
             enemy_spoilers, enemy_spoilers_json = self.run_khbr_if_needed(mod, out_zip)
+            _raise_if_cancelled(cancellation)
 
             if self.multiworld:
                 out_zip.writestr("multiworld.multi", json.dumps(self.multiworld()))
@@ -454,11 +476,11 @@ class SeedZip:
 
             if spoiler_log or tourney_gen:
                 # For a tourney seed, generate the spoiler log to return to the caller but don't include it in the zip
-                spoiler_log_output = self.generate_spoiler_html(
+                spoiler_log_output = self.create_spoiler_log(
                     enemy_spoilers_json, battle_level_spoiler, journal_hints_spoiler
                 )
                 if not tourney_gen:
-                    out_zip.writestr("spoilerlog.html", spoiler_log_output)
+                    out_zip.writestr("spoilerlog.html", spoiler_log_output.to_html())
                     out_zip.write(resource_path("static/KHMenu.otf"), "misc/KHMenu.otf")
 
                 # For a tourney seed, return the enemy log to the caller but don't include it in the zip
@@ -466,19 +488,24 @@ class SeedZip:
                 if enemy_spoilers and not tourney_gen:
                     out_zip.writestr("enemyspoilers.txt", enemy_spoilers)
 
-            _add_cosmetics(out_zip=out_zip, mod_yml=mod.mod_yml, settings=settings.ui_settings)
+            _add_cosmetics(
+                out_zip=out_zip,
+                mod_yml=mod.mod_yml,
+                settings=settings.ui_settings,
+                rng=self.rng,
+                cancellation=cancellation,
+            )
 
             out_zip.write(resource_path("Module/icon.png"), "icon.png")
 
             mod.write_mod_ymls(
                 include_main_mod_yml=False
             )  # We'll add the main mod.yml after the validation
-            out_zip.close()
-        zip_data.seek(0)
-
-        new_data = mod.validate_and_write_mod_yml(zip_data, settings)
+            mod.validate_and_write_mod_yml(settings)
 
-        return new_data, spoiler_log_output, enemy_log_output
+        if zip_data is not None:
+            zip_data.seek(0)
+        return zip_data, spoiler_log_output, enemy_log_output
 
     def run_khbr_if_needed(
         self, mod: SeedModBuilder, out_zip: ZipFile
@@ -514,17 +541,17 @@ class SeedZip:
 
         if _should_run_khbr():
             return _run_khbr(
-                self.extra_data.platform, enemy_options, mod.mod_yml, out_zip
+                self.extra_data.platform, enemy_options, mod.mod_yml, out_zip, self.rng
             )
         else:
             return None, {}
 
-    def generate_spoiler_html(
+    def create_spoiler_log(
             self,
             enemy_spoilers_json,
             battle_level_spoiler,
             journal_hints_spoiler: dict[str, str]
-    ) -> str:
+    ) -> SpoilerLog:
         settings = self.settings
         randomizer = self.randomizer
         platform = self.extra_data.platform
@@ -580,27 +607,24 @@ class SeedZip:
         )
         objectives_json = objectives_dictionary(randomizer.objectives)
 
-        with open(resource_path("static/spoilerlog.html")) as spoiler_site:
-            return (
-                spoiler_site.read()
-                .replace("{SEED_NAME_STRING}", settings.random_seed)
-                .replace("{SEED_STRING}", settings.seed_string)
-                .replace("{PLATFORM_GENERATED}", platform)
-                .replace("{LEVEL_STATS_JSON}", json.dumps(levelStatsDictionary(randomizer.level_stats)))
-                .replace("{FORM_EXP_JSON}", json.dumps(exp_multipliers_json))
-                .replace("{DEPTH_VALUES_JSON}", json.dumps(randomizer.location_weights.weights))
-                .replace("{SORA_ITEM_JSON}", json.dumps(sora_items_json, indent=4, cls=ItemEncoder))
-                .replace("{DONALD_ITEM_JSON}", json.dumps(donald_items_json, indent=4, cls=ItemEncoder))
-                .replace("{GOOFY_ITEM_JSON}", json.dumps(goofy_items_json, indent=4, cls=ItemEncoder))
-                .replace("{BOSS_ENEMY_JSON}", json.dumps(enemy_spoilers_json))
-                .replace("{BATTLE_LEVEL_JSON}", json.dumps(battle_level_spoiler))
-                .replace("{SYNTHESIS_RECIPE_JSON}", json.dumps(synthesis_recipe_json))
-                .replace("{WEAPON_STATS_JSON}", json.dumps(weapon_stats_spoiler))
-                .replace("{JOURNAL_HINTS_JSON}", json.dumps(journal_hints_spoiler))
-                .replace("{OBJECTIVES_JSON}", json.dumps(objectives_json))
-                .replace("{SETTINGS_JSON}", json.dumps(settings_spoiler_json))
-                .replace("PromiseCharm", "Promise Charm")
-            )
+        return SpoilerLog.from_data({
+            "seed_name": settings.random_seed,
+            "seed_string": settings.seed_string,
+            "platform": platform,
+            "level_stats": levelStatsDictionary(randomizer.level_stats),
+            "form_exp": exp_multipliers_json,
+            "depth_values": randomizer.location_weights.weights,
+            "sora_items": sora_items_json,
+            "donald_items": donald_items_json,
+            "goofy_items": goofy_items_json,
+            "boss_enemy": enemy_spoilers_json,
+            "battle_levels": battle_level_spoiler,
+            "synthesis_recipes": synthesis_recipe_json,
+            "weapon_stats": weapon_stats_spoiler,
+            "journal_hints": journal_hints_spoiler,
+            "objectives": objectives_json,
+            "settings": settings_spoiler_json,
+        })
 
     def generate_seed_hash_image(self, out_zip: ZipFile):
         hash_icons = self.settings.seedHashIcons
@@ -615,7 +639,7 @@ class SeedZip:
         location_spheres = self.location_spheres
         btlv_option_name = settings.battle_level_rando
 
-        btlv = BtlvViewer()
+        btlv = BtlvViewer(self.rng)
         btlv.use_setting(
             btlv_option_name,
             battle_level_offset=settings.battle_level_offset,
@@ -662,17 +686,10 @@ class SeedZip:
             assigned_puzzles = _assignment_subset_from_type(
                 self.randomizer.assignments, [locationType.Puzzle]
             )
-            with open(resource_path("static/puzzle.bin"), "rb") as puzzleBar:
-                modified_puzzle_binary = bytearray(puzzleBar.read())
-                for puzz in assigned_puzzles:
-                    byte0 = 20 + puzz.location.LocationId * 16
-                    byte1 = 20 + puzz.location.LocationId * 16 + 1
-                    item = puzz.item.Id
-
-                    item_byte_0, item_byte_1 = number_to_bytes(item)
-                    modified_puzzle_binary[byte0] = item_byte_0
-                    modified_puzzle_binary[byte1] = item_byte_1
-                mod.write_puzzle_assets(modified_puzzle_binary)
+            puzzles = PatchedBinary("static/puzzle.bin").table(PUZZLES)
+            for puzz in assigned_puzzles:
+                puzzles.set(puzz.location.LocationId, "reward", puzz.item.Id)
+            mod.write_puzzle_assets(puzzles.binary.to_bytes())
 
     def create_drop_rate_assets(self, mod: SeedModBuilder):
         settings = self.settings
@@ -689,19 +706,8 @@ class SeedZip:
             or rich_enemies
             or near_unlimited_mp
         ):
-            all_drops = {}
-            testing = []
-            with open(resource_path("static/drops.bin"), "rb") as drops_bar:
-                drops_binary = bytearray(drops_bar.read())
-                for i in range(0, 184):
-                    start_index = 8 + 24 * i
-                    rate = DropRates(
-                        start_index, drops_binary[start_index : start_index + 24]
-                    )
-                    all_drops[rate.id] = rate
-
-                    if rate.id not in id_to_enemy_name:
-                        testing.append(rate.id)
+            drops = PatchedBinary("static/drops.bin").table(DROP_RATES)
+            drop_ids = [drop.id for drop in drops]
 
             spawnable_enemy_ids = [
                 1,
@@ -778,101 +784,67 @@ class SeedZip:
             stt_enemies = [119, 120, 121, 130, 145]
             struggles = [122, 131, 132]
 
-            modded_ids = []
+            modded_indices: set[int] = set()
+            spawnable_enemies = [index for index, drop_id in enumerate(drop_ids) if drop_id in spawnable_enemy_ids]
 
             if rich_enemies:
-                for drop in all_drops.values():
-                    if drop.id in spawnable_enemy_ids:
-                        modded_ids.append(drop.id)
-                        drop.medium_munny = max(drop.medium_munny, 2)
-                        drop.small_munny = max(drop.small_munny, 2)
+                modded_indices.update(spawnable_enemies)
+                for field in ["medium_munny", "small_munny"]:
+                    drops.update_field(field, lambda amount: max(amount, 2), spawnable_enemies)
             if near_unlimited_mp:
-                for drop in all_drops.values():
-                    if drop.id in spawnable_enemy_ids:
-                        modded_ids.append(drop.id)
-                        drop.big_mp = max(drop.big_mp, 5)
-                        drop.small_mp = max(drop.small_mp, 5)
+                modded_indices.update(spawnable_enemies)
+                for field in ["big_mp", "small_mp"]:
+                    drops.update_field(field, lambda amount: max(amount, 5), spawnable_enemies)
 
             if global_lucky_lucky > 0:
-                for drop in all_drops.values():
-                    if drop.item1 != 0:
-                        modded_ids.append(drop.id)
-                        drop.item1_chance = min(
-                            drop.item1_chance
-                            + (drop.item1_chance // 2) * global_lucky_lucky,
-                            100,
-                        )
-                    if drop.item2 != 0:
-                        modded_ids.append(drop.id)
-                        drop.item2_chance = min(
-                            drop.item2_chance
-                            + (drop.item2_chance // 2) * global_lucky_lucky,
-                            100,
-                        )
-                    if drop.item3 != 0:
-                        modded_ids.append(drop.id)
-                        drop.item3_chance = min(
-                            drop.item3_chance
-                            + (drop.item3_chance // 2) * global_lucky_lucky,
-                            100,
-                        )
-            if global_jackpot > 0:
-                for drop in all_drops.values():
-                    modded_ids.append(drop.id)
-                    drop.small_hp = min(
-                        drop.small_hp + (drop.small_hp // 2) * global_jackpot, 64
-                    )
-                    drop.big_hp = min(
-                        drop.big_hp + (drop.big_hp // 2) * global_jackpot, 64
-                    )
-                    drop.big_munny = min(
-                        drop.big_munny + (drop.big_munny // 2) * global_jackpot, 64
-                    )
-                    drop.medium_munny = min(
-                        drop.medium_munny + (drop.medium_munny // 2) * global_jackpot,
-                        64,
-                    )
-                    drop.small_munny = min(
-                        drop.small_munny + (drop.small_munny // 2) * global_jackpot, 64
-                    )
-                    drop.small_mp = min(
-                        drop.small_mp + (drop.small_mp // 2) * global_jackpot, 64
-                    )
-                    drop.big_mp = min(
-                        drop.big_mp + (drop.big_mp // 2) * global_jackpot, 64
-                    )
-                    drop.small_drive = min(
-                        drop.small_drive + (drop.small_drive // 2) * global_jackpot, 64
-                    )
-                    drop.big_drive = min(
-                        drop.big_drive + (drop.big_drive // 2) * global_jackpot, 64
+                for item_field in ["item1", "item2", "item3"]:
+                    drops_with_item = [index for index, drop in enumerate(drops) if getattr(drop, item_field) != 0]
+                    modded_indices.update(drops_with_item)
+                    drops.update_field(
+                        f"{item_field}_chance",
+                        lambda chance: min(chance + (chance // 2) * global_lucky_lucky, 100),
+                        drops_with_item,
                     )
+            if global_jackpot > 0:
+                modded_indices.update(range(len(drops)))
+                for field in [
+                    "small_hp",
+                    "big_hp",
+                    "big_munny",
+                    "medium_munny",
+                    "small_munny",
+                    "small_mp",
+                    "big_mp",
+                    "small_drive",
+                    "big_drive",
+                ]:
+                    drops.update_field(field, lambda amount: min(amount + (amount // 2) * global_jackpot, 64))
 
             if fast_urns:
-                for u in urn_ids:
-                    modded_ids.append(u)
-                    all_drops[u].big_hp = 64
-
-            for drop in all_drops.values():
-                if drop.id in modded_ids:
-                    mod.prize_table.add_prize(
-                        identifier=drop.id,
-                        small_hp_orbs=drop.small_hp,
-                        big_hp_orbs=drop.big_hp,
-                        big_money_orbs=drop.big_munny,
-                        medium_money_orbs=drop.medium_munny,
-                        small_money_orbs=drop.small_munny,
-                        small_mp_orbs=drop.small_mp,
-                        big_mp_orbs=drop.big_mp,
-                        small_drive_orbs=drop.small_drive,
-                        big_drive_orbs=drop.big_drive,
-                        item_1=drop.item1,
-                        item_1_percentage=drop.item1_chance,
-                        item_2=drop.item2,
-                        item_2_percentage=drop.item2_chance,
-                        item_3=drop.item3,
-                        item_3_percentage=drop.item3_chance,
-                    )
+                urn_indices = [drop_ids.index(urn_id) for urn_id in urn_ids]
+                modded_indices.update(urn_indices)
+                drops.set_field("big_hp", 64, urn_indices)
+
+            for index in sorted(modded_indices):
+                drop = drops.record(index)
+                mod.prize_table.add_prize(
+                    identifier=drop.id,
+                    small_hp_orbs=drop.small_hp,
+                    big_hp_orbs=drop.big_hp,
+                    big_money_orbs=drop.big_munny,
+                    medium_money_orbs=drop.medium_munny,
+                    small_money_orbs=drop.small_munny,
+                    small_mp_orbs=drop.small_mp,
+                    big_mp_orbs=drop.big_mp,
+                    small_drive_orbs=drop.small_drive,
+                    big_drive_orbs=drop.big_drive,
+                    item_1=drop.item1,
+                    item_1_percentage=drop.item1_chance,
+                    item_2=drop.item2,
+                    item_2_percentage=drop.item2_chance,
+                    item_3=drop.item3,
+                    item_3_percentage=drop.item3_chance,
+                )
 
     def create_objective_rando_assets(self, mod: SeedModBuilder, num_objectives_needed: int, objective_list: list[KH2Objective]):
         mod.add_objective_randomization_mods(num_objectives_needed, objective_list)
@@ -917,59 +889,56 @@ class SeedZip:
         if not self.settings.equipment_abilities_enabled:
             return
         equipment_assignments = self.randomizer.equipment_assignments
-        with open(resource_path("static/stats.yml"), "r") as file:
-            stat_data = yaml.safe_load(file)
-        equipment_default_stats = stat_data
-        with open(resource_path("static/full_items.json"), "r") as item_json:
-            all_item_jsons = json.loads(item_json.read())
-            for assignment in equipment_assignments:
-                equip_slot = assignment.location
-                ability = assignment.item
-                item_json = None
-                for y in all_item_jsons["Items"]:
-                    if y["Flag1"] == equip_slot.LocationId and y["Type"] in ["Accessory","Armor"]:
-                        item_json = y
-                        break
-                item_json["Description"] = ability.item.ingame_text_id
-                mod.items.add_item(
-                    item_id=item_json["Id"],
-                    item_type=item_json["Type"],
-                    flag_0=item_json["Flag0"],
-                    flag_1=item_json["Flag1"],
-                    rank=item_json["Rank"],
-                    stat_entry=item_json["StatEntry"],
-                    name=item_json["Name"],
-                    description=item_json["Description"],
-                    shop_buy=item_json["ShopBuy"],
-                    shop_sell=item_json["ShopSell"],
-                    command=item_json["Command"],
-                    slot=item_json["Slot"],
-                    picture=item_json["Picture"],
-                    icon_1=item_json["Icon1"],
-                    icon_2=item_json["Icon2"],
-                )
+        equipment_default_stats = static_data("static/stats.yml")
+        all_item_jsons = static_data("static/full_items.json")
+        for assignment in equipment_assignments:
+            equip_slot = assignment.location
+            ability = assignment.item
+            item_json = None
+            for y in all_item_jsons["Items"]:
+                if y["Flag1"] == equip_slot.LocationId and y["Type"] in ["Accessory","Armor"]:
+                    item_json = dict(y)
+                    break
+            item_json["Description"] = ability.item.ingame_text_id
+            mod.items.add_item(
+                item_id=item_json["Id"],
+                item_type=item_json["Type"],
+                flag_0=item_json["Flag0"],
+                flag_1=item_json["Flag1"],
+                rank=item_json["Rank"],
+                stat_entry=item_json["StatEntry"],
+                name=item_json["Name"],
+                description=item_json["Description"],
+                shop_buy=item_json["ShopBuy"],
+                shop_sell=item_json["ShopSell"],
+                command=item_json["Command"],
+                slot=item_json["Slot"],
+                picture=item_json["Picture"],
+                icon_1=item_json["Icon1"],
+                icon_2=item_json["Icon2"],
+            )
 
-                equipment_stats = None
-                for y in equipment_default_stats:
-                    if y["Id"] == equip_slot.LocationId:
-                        equipment_stats = y
-                equipment_stats["Ability"] = ability.item.id
-                mod.items.add_stats(
-                    location_id=equipment_stats["Id"],
-                    attack=equipment_stats["Attack"],
-                    magic=equipment_stats["Magic"],
-                    defense=equipment_stats["Defense"],
-                    ability=equipment_stats["Ability"],
-                    ability_points=equipment_stats["AbilityPoints"],
-                    unknown_08=equipment_stats["Unknown08"],
-                    fire_resistance=equipment_stats["FireResistance"],
-                    ice_resistance=equipment_stats["IceResistance"],
-                    lightning_resistance=equipment_stats["LightningResistance"],
-                    dark_resistance=equipment_stats["DarkResistance"],
-                    unknown_0d=equipment_stats["Unknown0d"],
-                    general_resistance=equipment_stats["GeneralResistance"],
-                    unknown=equipment_stats["Unknown"],
-                )
+            equipment_stats = None
+            for y in equipment_default_stats:
+                if y["Id"] == equip_slot.LocationId:
+                    equipment_stats = dict(y)
+            equipment_stats["Ability"] = ability.item.id
+            mod.items.add_stats(
+                location_id=equipment_stats["Id"],
+                attack=equipment_stats["Attack"],
+                magic=equipment_stats["Magic"],
+                defense=equipment_stats["Defense"],
+                ability=equipment_stats["Ability"],
+                ability_points=equipment_stats["AbilityPoints"],
+                unknown_08=equipment_stats["Unknown08"],
+                fire_resistance=equipment_stats["FireResistance"],
+                ice_resistance=equipment_stats["IceResistance"],
+                lightning_resistance=equipment_stats["LightningResistance"],
+                dark_resistance=equipment_stats["DarkResistance"],
+                unknown_0d=equipment_stats["Unknown0d"],
+                general_resistance=equipment_stats["GeneralResistance"],
+                unknown=equipment_stats["Unknown"],
+            )
 
     def create_shop_rando_assets(self, mod: SeedModBuilder):
         shop_items = self.randomizer.shop_items
@@ -1036,107 +1005,58 @@ class SeedZip:
                 # for i in remaining_items:
                 #     items_for_shop.append((i.Id,price_map[i.Rarity]))
 
-            with open(resource_path("static/full_items.json"), "r") as item_json:
-                all_item_jsons = json.loads(item_json.read())
-                for item_id, price in items_for_shop:
-                    item_json = None
-                    for y in all_item_jsons["Items"]:
-                        if y["Id"] == item_id:
-                            item_json = y
-                            break
-                    item_json["ShopBuy"] = price
-                    mod.items.add_item(
-                        item_id=item_json["Id"],
-                        item_type=item_json["Type"],
-                        flag_0=item_json["Flag0"],
-                        flag_1=item_json["Flag1"],
-                        rank=item_json["Rank"],
-                        stat_entry=item_json["StatEntry"],
-                        name=item_json["Name"],
-                        description=item_json["Description"],
-                        shop_buy=item_json["ShopBuy"],
-                        shop_sell=item_json["ShopSell"],
-                        command=item_json["Command"],
-                        slot=item_json["Slot"],
-                        picture=item_json["Picture"],
-                        icon_1=item_json["Icon1"],
-                        icon_2=item_json["Icon2"],
-                    )
+            all_item_jsons = static_data("static/full_items.json")
+            for item_id, price in items_for_shop:
+                item_json = None
+                for y in all_item_jsons["Items"]:
+                    if y["Id"] == item_id:
+                        item_json = dict(y)
+                        break
+                item_json["ShopBuy"] = price
+                mod.items.add_item(
+                    item_id=item_json["Id"],
+                    item_type=item_json["Type"],
+                    flag_0=item_json["Flag0"],
+                    flag_1=item_json["Flag1"],
+                    rank=item_json["Rank"],
+                    stat_entry=item_json["StatEntry"],
+                    name=item_json["Name"],
+                    description=item_json["Description"],
+                    shop_buy=item_json["ShopBuy"],
+                    shop_sell=item_json["ShopSell"],
+                    command=item_json["Command"],
+                    slot=item_json["Slot"],
+                    picture=item_json["Picture"],
+                    icon_1=item_json["Icon1"],
+                    icon_2=item_json["Icon2"],
+                )
 
-            with open(resource_path("static/shop.bin"), "rb") as shop_bar:
-                modified_shop_binary = bytearray(shop_bar.read())
+            shop = PatchedBinary("static/shop.bin")
+            shop_header = shop.table(SHOP_HEADER)
+            original_product_count = shop_header.get(0, "product_count")
+            shop_header.set(0, "product_count", original_product_count + len(items_for_shop))
 
-                byte0, byte1 = number_to_bytes(80 + len(items_for_shop))
-                modified_shop_binary[10] = byte0
-                modified_shop_binary[11] = byte1
+            # the new products go after the existing ones, in an inventory of their own (the inventory at 752)
+            products = shop.table(SHOP_PRODUCTS)
+            shop.table(SHOP_INVENTORIES).replace(
+                29,
+                product_count=len(items_for_shop),
+                product_offset=products.record_offset(original_product_count),
+            )
 
-                byte0, byte1 = number_to_bytes(len(items_for_shop))
+            # the new items also go after the 60 existing valid items
+            valid_items = shop.table(SHOP_VALID_ITEMS, offset=shop_header.get(0, "valid_items_offset"))
+            for index, (item_id, _) in enumerate(items_for_shop):
+                products.set(original_product_count + index, "item", item_id)
+                valid_items.set(60 + index, "item", item_id)
 
-                # inventory 752
-                modified_shop_binary[754] = byte0
-                modified_shop_binary[755] = byte1
-                byte0, byte1 = number_to_bytes(984)
-                modified_shop_binary[756] = byte0
-                modified_shop_binary[757] = byte1
+            mod.write_shop_assets(shop.to_bytes())
 
-                valid_start = bytes_to_number(
-                    modified_shop_binary[12], modified_shop_binary[13]
-                )
-                for asset in range(len(items_for_shop)):
-                    product_index = 984 + 2 * asset
-                    valid_item_index = valid_start + (60 + asset) * 2
-                    byte0, byte1 = number_to_bytes(items_for_shop[asset][0])
-                    modified_shop_binary[product_index] = byte0
-                    modified_shop_binary[product_index + 1] = byte1
-                    modified_shop_binary[valid_item_index] = byte0
-                    modified_shop_binary[valid_item_index + 1] = byte1
-
-                mod.write_shop_assets(modified_shop_binary)
-
-                # ## code below prints out the shop information in relevant format
-
-                # print(f"file type: {bytes_to_number(binaryContent[4],binaryContent[5])}")
-                # shop_list_count = bytes_to_number(binaryContent[6],binaryContent[7])
-                # print(f"shop list count: {shop_list_count}")
-                # inventory_list_count = bytes_to_number(binaryContent[8],binaryContent[9])
-                # print(f"inventory entry count: {inventory_list_count}")
-                # product_list_count = bytes_to_number(binaryContent[10],binaryContent[11])
-                # print(f"product entry count: {product_list_count}")
-                # valid_start = bytes_to_number(binaryContent[12],binaryContent[13])
-                # print(f"valid items offset: {valid_start}")
-
-                # shop_start = 16
-                # print("Shop Entries")
-                # for x in range(shop_list_count):
-                #     shop_index = shop_start+x*24
-                #     print(f"---- Shop ID: {bytes_to_number(binaryContent[shop_index+18])}")
-                #     print(f"---- Inventory Amount: {bytes_to_number(binaryContent[shop_index+16],binaryContent[shop_index+17])}")
-                #     print(f"---- Inventory Offset: {bytes_to_number(binaryContent[shop_index+20],binaryContent[shop_index+21])}")
-                #     print("----------")
-
-                # inventory_start = shop_start+shop_list_count*24
-                # print("Inventory Entries")
-                # for x in range(inventory_list_count):
-                #     inventory_index = inventory_start+x*8
-                #     print(f"---- Inventory Address: {inventory_index}")
-                #     print(f"---- Unlock event: {bytes_to_number(binaryContent[inventory_index],binaryContent[inventory_index+1])}")
-                #     print(f"---- Product Amount: {bytes_to_number(binaryContent[inventory_index+2],binaryContent[inventory_index+3])}")
-                #     print(f"---- Product Offset: {bytes_to_number(binaryContent[inventory_index+4],binaryContent[inventory_index+5])}")
-                #     print("----------")
-
-                # product_start = inventory_start+inventory_list_count*8
-                # print("Product Entries")
-                # for x in range(product_list_count):
-                #     product_index = product_start+x*2
-                #     print(f"---- Address {product_index}")
-                #     print(f"---- Product (Item Id):  {bytes_to_number(binaryContent[product_index],binaryContent[product_index+1])}")
-
-                # print("Valid Items")
-                # for x in range(63):
-                #     valid_index = valid_start+x*2
-                #     item_id = bytes_to_number(binaryContent[valid_index],binaryContent[valid_index+1])
-                #     if item_id!=0:
-                #         print(f"---- Valid Item (Item Id):  {item_id}")
+            # ## uncomment to print out the shop information
+            # print(shop_header.record(0))
+            # for table in [SHOP_INVENTORIES, SHOP_PRODUCTS, SHOP_VALID_ITEMS]:
+            #     for record in shop.table(table):
+            #         print(record)
 
     def create_synth_assets(self, mod: SeedModBuilder):
         if locationType.SYNTH in self.settings.disabledLocations:
@@ -1147,67 +1067,42 @@ class SeedZip:
             randomizer.assignments, [locationType.SYNTH]
         )
 
+        recipes_by_location: dict[tuple, SynthesisRecipe] = {}
+        for recipe in randomizer.synthesis_recipes:
+            recipes_by_location.setdefault(recipe.location.equality_key(), recipe)
+
         synth_items = []
         for assignment in assigned_synth:
             synth_items.append(
                 SynthLocation(
                     assignment.location.LocationId,
                     assignment.item.Id,
-                    [
-                        r
-                        for r in randomizer.synthesis_recipes
-                        if r.location == assignment.location
-                    ][0],
+                    recipes_by_location[assignment.location.equality_key()],
                 )
             )
 
-        with open(resource_path("static/synthesis.bin"), "rb") as recipes_bar:
-            modified_recipes_binary = bytearray(recipes_bar.read())
-            for synth_loc in synth_items:
-                starting_byte = synth_loc.get_starting_location()
-                data = synth_loc.get_bytes()
-
-                for i, item in enumerate(data):
-                    modified_recipes_binary[starting_byte + i] = 0xFF & item
-
-        with open(resource_path("static/synthesis_reqs.bin"), "rb") as requirements_bar:
-            modified_requirements_binary = bytearray(requirements_bar.read())
-
-            # uncomment to see some data about the synth lists
-            # index = 16
-            # while index + 12 < len(modified_requirements_binary):
-            #     print(SynthList(index, modified_requirements_binary[index:]))
-            #     index += 12
-
-            # 3/6 free dev 8,9 bytes from offset index
-            free_dev1 = number_to_bytes(3)
-            free_dev2 = number_to_bytes(6)
-            modified_requirements_binary[36] = free_dev1[0]
-            modified_requirements_binary[37] = free_dev1[1]
-            modified_requirements_binary[72] = free_dev2[0]
-            modified_requirements_binary[73] = free_dev2[1]
-
-            # 1,3 ori+ version,
-            # free_dev1 = number_to_bytes(1)
-            # free_dev2 = number_to_bytes(3)
-            # ori_plus_id = number_to_bytes(12) # not sure on this
-            # binaryContent[33] = ori_plus_id[0]
-            # binaryContent[35] = 0
-            # binaryContent[36] = free_dev1[0]
-            # binaryContent[37] = free_dev1[1]
-            # binaryContent[69] = ori_plus_id[0]
-            # binaryContent[71] = 0
-            # binaryContent[72] = free_dev2[0]
-            # binaryContent[73] = free_dev2[1]
-
-            # uncomment to make all existing synth buyable conditions need 7 of that material
-            # new_required_items = number_to_bytes(7)
-            # start_index=376
-            # for i in range(0,24):
-            #     binaryContent[start_index+i*12+8] = new_required_items[0]
-            #     binaryContent[start_index+i*12+9] = new_required_items[1]
-
-        mod.write_synth_assets(modified_recipes_binary, modified_requirements_binary)
+        recipes = PatchedBinary("static/synthesis.bin").table(SYNTHESIS_RECIPES)
+        for synth_loc in synth_items:
+            synth_loc.write_to(recipes)
+
+        requirements = PatchedBinary("static/synthesis_reqs.bin").table(SYNTHESIS_REQUIREMENTS)
+
+        # uncomment to see some data about the synth lists
+        # for requirement in requirements:
+        #     print(requirement)
+
+        # 3/6 free dev
+        requirements.set(1, "count_needed", 3)
+        requirements.set(4, "count_needed", 6)
+
+        # 1,3 ori+ version,
+        # for index, count_needed in [(1, 1), (4, 3)]:
+        #     requirements.replace(index, material_type=12, condition_type=0, count_needed=count_needed)  # not sure on this
+
+        # uncomment to make all existing synth buyable conditions need 7 of that material
+        # requirements.set_field("count_needed", 7, range(30, 54))
+
+        mod.write_synth_assets(recipes.binary.to_bytes(), requirements.binary.to_bytes())
 
     def create_chest_visual_assets(self, mod: SeedModBuilder):
         if not self.settings.chests_match_item:
@@ -1428,12 +1323,12 @@ class SeedZip:
             )
         )
 
+        stats_by_location: dict[tuple, WeaponStats] = {}
+        for stat in randomizer.weapon_stats:
+            stats_by_location.setdefault(stat.location.equality_key(), stat)
+
         for weapon in weapons:
-            weapon_stats = next(
-                stat
-                for stat in randomizer.weapon_stats
-                if stat.location == weapon.location
-            )
+            weapon_stats = stats_by_location[weapon.location.equality_key()]
             mod.items.add_stats(
                 location_id=weapon.location.LocationId,
                 attack=weapon_stats.strength,
@@ -1603,13 +1498,11 @@ class SeedZip:
         )
         level_checks = settings.max_level_checks
 
-        # get the triple of items for each level
+        # get the triple of items for each level (if a level has more than one assignment, the last one wins)
+        item_ids_by_level = {lvup.location.LocationId: lvup.item.Id for lvup in levels}
         items_for_sword_level = {}
         offsets = DreamWeaponOffsets()
         for sword_level in range(1, 100):
-            sword_item = 0
-            shield_item = 0
-            staff_item = 0
             shield_level = (
                 offsets.get_item_lookup_for_shield(level_checks, sword_level)
                 if settings.split_levels
@@ -1620,19 +1513,17 @@ class SeedZip:
                 if settings.split_levels
                 else sword_level
             )
-            for lvup in levels:
-                if lvup.location.LocationId == sword_level:
-                    sword_item = lvup.item.Id
-                if lvup.location.LocationId == shield_level:
-                    shield_item = lvup.item.Id
-                if lvup.location.LocationId == staff_level:
-                    staff_item = lvup.item.Id
+            sword_item = item_ids_by_level.get(sword_level, 0)
+            shield_item = item_ids_by_level.get(shield_level, 0)
+            staff_item = item_ids_by_level.get(staff_level, 0)
             items_for_sword_level[sword_level] = (sword_item, shield_item, staff_item)
 
+        stats_by_location: dict[tuple, LevelStats] = {}
+        for lv in self.randomizer.level_stats:
+            stats_by_location.setdefault(lv.location.equality_key(), lv)
+
         for lvup in levels:
-            level_stats = next(
-                lv for lv in self.randomizer.level_stats if lv.location == lvup.location
-            )
+            level_stats = stats_by_location[lvup.location.equality_key()]
             level = lvup.location.LocationId
             item_id = items_for_sword_level[level]
             mod.level_ups.add_sora_level(
@@ -1733,7 +1624,7 @@ class SeedZip:
 
         atkp_organizer = mod._get_atkp_organizer()
 
-        atkp_data_randomizer = atkpRandomizerClass(kill_boss, companions_damage)
+        atkp_data_randomizer = atkpRandomizerClass(kill_boss, companions_damage, self.rng)
         randomized_data = atkp_data_randomizer.randomize_atkp_data(atkp_organizer.get_all_attack_ids(), atkp_organizer, damage_preset, element, revenge_value_preset, multi_hit_preset, knockback_amount_preset, exclude_basic_attack_preset)
         for atkp_object in randomized_data:
             atkp_organizer.convert_atkp_object_to_dict_and_add_to_data(atkp_object)
@@ -1741,18 +1632,33 @@ class SeedZip:
 
 class CosmeticsOnlyZip:
 
-    def __init__(self, ui_settings: SeedSettings):
+    def __init__(
+        self,
+        ui_settings: SeedSettings,
+        cancellation: Optional[CancellationToken] = None,
+        recolor_progress: Optional[Callable[[int, int], None]] = None,
+    ):
         self.settings = ui_settings
-
-    def create_zip(self) -> io.BytesIO:
-        data = io.BytesIO()
-        with ZipFile(data, "w", ZIP_DEFLATED) as out_zip:
+        self.cancellation = cancellation
+        self.recolor_progress = recolor_progress
+
+    def create_zip(self, output: Optional[ZipOutput] = None) -> Optional[io.BytesIO]:
+        """Writes the mod zip to the output, or builds it in memory (and returns it) if no output is given."""
+        data = io.BytesIO() if output is None else None
+        with _zip_output_file(data if output is None else output) as output_file, \
+                ModZipFile(output_file, "w", file_cache=SHARED_FILE_CACHE) as out_zip:
             mod = ModYml(
                 "Randomized Cosmetics",
                 description="Generated by the KH2 Randomizer Seed Generator.",
             )
 
-            _add_cosmetics(out_zip=out_zip, mod_yml=mod, settings=self.settings)
+            _add_cosmetics(
+                out_zip=out_zip,
+                mod_yml=mod,
+                settings=self.settings,
+                cancellation=self.cancellation,
+                recolor_progress=self.recolor_progress,
+            )
 
             mod.write_to_zip_file(out_zip)
 
@@ -1760,7 +1666,8 @@ class CosmeticsOnlyZip:
                 resource_path("static/icons/misc/cosmetics-mod.png"), "icon.png"
             )
 
-        data.seek(0)
+        if data is not None:
+            data.seek(0)
         return data
 
 
@@ -1770,7 +1677,8 @@ class BossEnemyOnlyZip:
         self.enemy_options = makeKHBRSettings(seed_name, self.settings, boss_enemy_only=True)
         self.platform = platform
 
-    def create_zip(self) -> io.BytesIO:
+    def create_zip(self, output: Optional[ZipOutput] = None) -> Optional[io.BytesIO]:
+        """Writes the mod zip to the output, or builds it in memory (and returns it) if no output is given."""
         def _should_run_khbr():
             if not self.enemy_options.get("boss", False) in [False, "Disabled"]:
                 return True
@@ -1783,8 +1691,9 @@ class BossEnemyOnlyZip:
                 "Trying to generate boss/enemy only mod without enabling those settings."
             )
 
-        data = io.BytesIO()
-        with ZipFile(data, "w", ZIP_DEFLATED) as out_zip:
+        data = io.BytesIO() if output is None else None
+        with _zip_output_file(data if output is None else output) as output_file, \
+                ModZipFile(output_file, "w", file_cache=SHARED_FILE_CACHE) as out_zip:
             mod = ModYml(
                 "Randomized Bosses/Enemies",
                 description="Generated by the KH2 Randomizer Seed Generator.",
@@ -1811,5 +1720,6 @@ class BossEnemyOnlyZip:
                 hint_data["coop_hint_type"] = self.settings.get(settingkey.COOP_HINT_TYPE)
                 Hints.write_hints(hint_data,out_zip)
 
+        if data is not None:
             data.seek(0)
-            return data
+        return data
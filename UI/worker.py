@@ -1,8 +1,9 @@
 import os
+import shutil
 import subprocess
-from io import BytesIO
+import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import Optional, BinaryIO
 
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import QProgressDialog, QFileDialog, QWidget, QMessageBox
@@ -12,9 +13,19 @@ from Class.seedSettings import SeedSettings, ExtraConfigurationData
 from Module import appconfig, platformutils
 from Module.RandomizerSettings import RandomizerSettings
 from Module.generate import generateSeed, generateMultiWorldSeed
-from Module.zipper import BossEnemyOnlyZip, CosmeticsOnlyZip, SeedZipResult
+from Module.spoilerLog import SpoilerLog
+from Module.zipper import BossEnemyOnlyZip, CosmeticsOnlyZip
 from UI.workers import BaseWorkerThread, BaseWorker
 
+# (output zip, spoiler log, enemy log)
+SeedFileResult = tuple[BinaryIO, Optional[SpoilerLog], Optional[str]]
+
+
+def _temporary_zip_file() -> BinaryIO:
+    # Mods are written to a temporary file as they're generated rather than held in memory, and then copied to wherever
+    # the user chooses to save them. The file is deleted as soon as it's closed.
+    return tempfile.TemporaryFile(prefix="kh2rando-", suffix=".zip")
+
 
 class GenerateModWorker(BaseWorker):
 
@@ -44,21 +55,24 @@ class GenerateModWorker(BaseWorker):
                         " (chmod +x) or choose a .sh or .exe file."
                     )
 
-    def download_mod(self, zip_data: BytesIO, output_file_name: str, title: str):
-        last_save_path = appconfig.read_last_save_path()
-        if last_save_path is not None:
-            output_file_name = str(last_save_path / output_file_name)
-
-        save_widget = QFileDialog()
-        filter_name = f"{title} (*.zip)"
-        save_widget.setNameFilters([filter_name])
-        outfile_name, _ = save_widget.getSaveFileName(self.parent, f"Save {title}", output_file_name, filter_name)
-        if outfile_name != "":
-            if not outfile_name.endswith(".zip"):
-                outfile_name += ".zip"
-            with open(outfile_name, "wb") as out_zip:
-                out_zip.write(zip_data.getbuffer())
-            appconfig.write_last_save_path(str(Path(outfile_name).parent))
+    def download_mod(self, zip_file: BinaryIO, output_file_name: str, title: str):
+        """Asks where to save the finished mod zip and copies it there. The zip file is closed either way."""
+        with zip_file:
+            last_save_path = appconfig.read_last_save_path()
+            if last_save_path is not None:
+                output_file_name = str(last_save_path / output_file_name)
+
+            save_widget = QFileDialog()
+            filter_name = f"{title} (*.zip)"
+            save_widget.setNameFilters([filter_name])
+            outfile_name, _ = save_widget.getSaveFileName(self.parent, f"Save {title}", output_file_name, filter_name)
+            if outfile_name != "":
+                if not outfile_name.endswith(".zip"):
+                    outfile_name += ".zip"
+                zip_file.seek(0)
+                with open(outfile_name, "wb") as out_zip:
+                    shutil.copyfileobj(zip_file, out_zip)
+                appconfig.write_last_save_path(str(Path(outfile_name).parent))
 
     @staticmethod
     def display_emu_warnings(rando_settings: RandomizerSettings, extra_data: ExtraConfigurationData):
@@ -76,17 +90,26 @@ class GenerateModWorker(BaseWorker):
 
 
 class GenerateSeedThread(BaseWorkerThread):
+    cooperative_cancel = True
 
     def __init__(self, rando_settings: RandomizerSettings, extra_data: ExtraConfigurationData):
         super().__init__()
         self.rando_settings = rando_settings
         self.extra_data = extra_data
 
-    def do_work(self) -> SeedZipResult:
+    def do_work(self) -> SeedFileResult:
         extra_data = self.extra_data
-        seed_zip_result = generateSeed(self.rando_settings, extra_data)
-        GenerateModWorker.run_custom_cosmetics_executables(extra_data)
-        return seed_zip_result
+        zip_file = _temporary_zip_file()
+        try:
+            _, spoiler_log, enemy_log = generateSeed(
+                self.rando_settings, extra_data, output=zip_file, cancellation=self.cancellation
+            )
+            self.cancellation.raise_if_cancelled()
+            GenerateModWorker.run_custom_cosmetics_executables(extra_data)
+        except BaseException:
+            zip_file.close()
+            raise
+        return zip_file, spoiler_log, enemy_log
 
 
 class GenerateSeedWorker(GenerateModWorker):
@@ -105,9 +128,9 @@ class GenerateSeedWorker(GenerateModWorker):
             title_text="Making your Seed, please wait...",
         )
 
-    def handle_result(self, result: SeedZipResult):
-        zip_data, _, _ = result
-        self.download_mod(zip_data, output_file_name="randoseed.zip", title="Randomizer Seed")
+    def handle_result(self, result: SeedFileResult):
+        zip_file, _, _ = result
+        self.download_mod(zip_file, output_file_name="randoseed.zip", title="Randomizer Seed")
         self.display_emu_warnings(self.rando_settings, self.extra_data)
 
     def handle_failure(self, failure: Exception):
@@ -117,17 +140,29 @@ class GenerateSeedWorker(GenerateModWorker):
 
 
 class GenerateMultiWorldSeedThread(BaseWorkerThread):
+    cooperative_cancel = True
 
     def __init__(self, rando_settings: list[RandomizerSettings], extra_data: ExtraConfigurationData):
         super().__init__()
         self.rando_settings = rando_settings
         self.extra_data = extra_data
 
-    def do_work(self) -> list[SeedZipResult]:
+    def do_work(self) -> list[SeedFileResult]:
         extra_data = self.extra_data
-        all_output = generateMultiWorldSeed(self.rando_settings, extra_data)
-        GenerateModWorker.run_custom_cosmetics_executables(extra_data)
-        return all_output
+        zip_files = [_temporary_zip_file() for _ in self.rando_settings]
+        try:
+            all_output = generateMultiWorldSeed(
+                self.rando_settings, extra_data, outputs=zip_files, cancellation=self.cancellation
+            )
+            self.cancellation.raise_if_cancelled()
+            GenerateModWorker.run_custom_cosmetics_executables(extra_data)
+        except BaseException:
+            for zip_file in zip_files:
+                zip_file.close()
+            raise
+        return [
+            (zip_file, spoiler_log, enemy_log) for zip_file, (_, spoiler_log, enemy_log) in zip(zip_files, all_output)
+        ]
 
 
 class GenerateMultiWorldSeedWorker(GenerateModWorker):
@@ -146,9 +181,9 @@ class GenerateMultiWorldSeedWorker(GenerateModWorker):
             title_text="Making your Seed, please wait...",
         )
 
-    def handle_result(self, result: list[SeedZipResult]):
-        for zip_data, _, _ in result:
-            self.download_mod(zip_data, output_file_name="randoseed.zip", title="Randomizer Seed")
+    def handle_result(self, result: list[SeedFileResult]):
+        for zip_file, _, _ in result:
+            self.download_mod(zip_file, output_file_name="randoseed.zip", title="Randomizer Seed")
 
     def handle_failure(self, failure: Exception):
         super().handle_failure(failure)
@@ -157,18 +192,27 @@ class GenerateMultiWorldSeedWorker(GenerateModWorker):
 
 
 class GenerateCosmeticsZipThread(BaseWorkerThread):
+    cooperative_cancel = True
 
     def __init__(self, ui_settings: SeedSettings, extra_data: ExtraConfigurationData):
         super().__init__()
         self.ui_settings = ui_settings
         self.extra_data = extra_data
 
-    def do_work(self) -> BytesIO:
+    def do_work(self) -> BinaryIO:
         extra_data = self.extra_data
-        zipper = CosmeticsOnlyZip(self.ui_settings)
-        zip_data = zipper.create_zip()
-        GenerateModWorker.run_custom_cosmetics_executables(extra_data)
-        return zip_data
+        zipper = CosmeticsOnlyZip(
+            self.ui_settings, cancellation=self.cancellation, recolor_progress=self.progress_changed.emit
+        )
+        zip_file = _temporary_zip_file()
+        try:
+            zipper.create_zip(zip_file)
+            self.cancellation.raise_if_cancelled()
+            GenerateModWorker.run_custom_cosmetics_executables(extra_data)
+        except BaseException:
+            zip_file.close()
+            raise
+        return zip_file
 
 
 class CosmeticsZipWorker(GenerateModWorker):
@@ -184,7 +228,12 @@ class CosmeticsZipWorker(GenerateModWorker):
     def create_progress_dialog(self) -> Optional[QProgressDialog]:
         return self.basic_wait_dialog("Creating cosmetics-only mod")
 
-    def handle_result(self, result: BytesIO):
+    def handle_progress(self, finished: int, total: int):
+        super().handle_progress(finished, total)
+        if self.progress is not None:
+            self.progress.setLabelText(f"Recoloring textures ({finished} of {total})")
+
+    def handle_result(self, result: BinaryIO):
         self.download_mod(result, output_file_name="randomized-cosmetics.zip", title="Cosmetics Mod")
 
 
@@ -196,11 +245,16 @@ class GenerateBossEnemyZipThread(BaseWorkerThread):
         self.platform = platform
         self.seed_name = seed_name
 
-    def do_work(self) -> BytesIO:
+    def do_work(self) -> BinaryIO:
         platform = self.platform
         zipper = BossEnemyOnlyZip(self.seed_name, self.ui_settings, platform)
-        zip_data = zipper.create_zip()
-        return zip_data
+        zip_file = _temporary_zip_file()
+        try:
+            zipper.create_zip(zip_file)
+        except BaseException:
+            zip_file.close()
+            raise
+        return zip_file
 
 
 class BossEnemyZipWorker(GenerateModWorker):
@@ -217,5 +271,5 @@ class BossEnemyZipWorker(GenerateModWorker):
     def create_progress_dialog(self) -> Optional[QProgressDialog]:
         return self.basic_wait_dialog("Creating boss/enemy-only mod")
 
-    def handle_result(self, result: BytesIO):
+    def handle_result(self, result: BinaryIO):
         self.download_mod(result, output_file_name="randomized-bosses-enemies.zip", title="Boss/Enemy Mod")
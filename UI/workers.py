@@ -4,11 +4,27 @@ from PySide6.QtCore import QThread, Signal, QObject
 from PySide6.QtGui import Qt
 from PySide6.QtWidgets import QProgressDialog, QMessageBox
 
+from Class.exceptions import CancelledException
+from Module.cancellation import CancellationToken
+
 
 class BaseWorkerThread(QThread):
-    """Base class for worker threads. Override do_work() to specify the work to perform."""
+    """
+    Base class for worker threads. Override do_work() to specify the work to perform.
+
+    Cancelling terminates the thread, unless cooperative_cancel is set. In that case, cancelling only cancels the
+    thread's cancellation token, and do_work() is expected to check it and stop with a CancelledException. A result
+    that arrives after the token was cancelled is dropped. Work that can tell how far along it is can report
+    (finished, total) through progress_changed.
+    """
     finished = Signal(object)
     failed = Signal(Exception)
+    progress_changed = Signal(int, int)
+    cooperative_cancel = False
+
+    def __init__(self):
+        super().__init__()
+        self.cancellation = CancellationToken()
 
     def run(self):
         try:
@@ -46,6 +62,7 @@ class BaseWorker(QObject):
         self.thread = thread
         thread.finished.connect(self._internal_handle_result)
         thread.failed.connect(self._internal_handle_failure)
+        thread.progress_changed.connect(self.handle_progress)
 
         if progress is not None:
             # Not sure why, but a lambda seems to be needed here instead of just a reference
@@ -62,13 +79,26 @@ class BaseWorker(QObject):
     def handle_result(self, result: Any):
         pass
 
+    def handle_progress(self, finished: int, total: int):
+        progress = self.progress
+        if progress is not None:
+            progress.setRange(0, total)
+            progress.setValue(finished)
+
     def handle_failure(self, failure: Exception):
-        message = QMessageBox(text=str(repr(failure)))
+        # Notes say where generation failed and what to change, so they're shown too
+        message = QMessageBox(text="\n".join([repr(failure)] + getattr(failure, "__notes__", [])))
         message.setTextInteractionFlags(Qt.TextSelectableByMouse)
         message.setWindowTitle("Error")
         message.exec()
 
     def _internal_handle_result(self, result: Any):
+        thread = self.thread
+        if thread is not None and thread.cancellation.cancelled:
+            # The work got past its last cancellation check before it saw the cancel; the user doesn't want the result
+            self._internal_handle_failure(CancelledException("Cancelled"))
+            return
+
         self.thread = None
 
         if self.progress is not None:
@@ -88,14 +118,18 @@ class BaseWorker(QObject):
             self.progress = None
 
         try:
-            self.handle_failure(failure)
+            if not isinstance(failure, CancelledException):
+                self.handle_failure(failure)
         finally:
             self.failed.emit(failure)
 
     def _internal_handle_cancel(self):
         thread = self.thread
         if thread is not None:
-            thread.terminate()
+            if thread.cooperative_cancel:
+                thread.cancellation.cancel()
+            else:
+                thread.terminate()
 
     @staticmethod
     def basic_wait_dialog(
@@ -0,0 +1,66 @@
+"""
+Generates a batch of tourney seeds from a settings preset, spread across multiple processes.
+
+Example: python batch_gen.py "League Summer 2025" --count 100 --name "Summer Tourney"
+"""
+import argparse
+import json
+import multiprocessing
+import os
+from pathlib import Path
+
+from Class.seedSettings import ExtraConfigurationData, SeedSettings
+from Module import appconfig
+from Module.generate import generate_batch
+from Module.resources import resource_path
+from Module.tourneySpoiler import TourneySeedSaver
+
+
+def _find_preset(preset: str) -> Path:
+    preset_path = Path(preset)
+    if preset_path.is_file():
+        return preset_path
+    for folder in [appconfig.settings_presets_folder(), Path(resource_path("static/bundled_presets"))]:
+        candidate = folder / f"{preset}.json"
+        if candidate.is_file():
+            return candidate
+    raise SystemExit(f"Preset [{preset}] not found")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates a batch of tourney seeds from a settings preset.")
+    parser.add_argument("preset", help="name of a user or bundled preset, or the path to a preset file")
+    parser.add_argument("--count", type=int, default=10, help="number of seeds to generate")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--name", default="Tourney", help="tourney name, used for the output folder and seed list")
+    parser.add_argument("--output", default=".", help="folder in which to create the tourney folder")
+    parser.add_argument("--platform", default="PC", choices=["PC", "PCSX2", "Both"], help="platform to generate seeds for")
+    args = parser.parse_args()
+
+    settings = SeedSettings()
+    with open(_find_preset(args.preset), encoding="utf-8") as preset_file:
+        settings.apply_settings_json(json.load(preset_file))
+
+    tourney_seed_path = Path(args.output) / args.name
+    tourney_seed_path.mkdir(parents=True, exist_ok=True)
+    saver = TourneySeedSaver(tourney_seed_path, args.name)
+
+    def print_progress(finished: int, total: int):
+        print(f"Finished seed {finished} of {total}", flush=True)
+
+    generate_batch(
+        settings,
+        args.count,
+        workers=args.workers,
+        extra_data=ExtraConfigurationData(platform=args.platform, tourney=True, custom_cosmetics_executables=[]),
+        saver=saver,
+        progress=print_progress,
+        make_zips=False,
+    )
+    saver.save()
+    print(f"Saved {args.count} seeds to {os.path.abspath(tourney_seed_path)}")
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    main()
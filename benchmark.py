@@ -0,0 +1,241 @@
+"""
+Benchmarks seed generation against a fixed corpus of seeds for each bundled preset, and writes the results as JSON.
+
+Each seed goes through the same retrying generation as the generator itself (placement, validation, hints, and zip
+output), and the wall time, retry counts, and (optionally) memory allocations of each phase are recorded.
+
+Example: python benchmark.py --seeds 10 --output benchmark.json
+Compare two runs: python benchmark.py --seeds 10 --output new.json --compare old.json
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from Class.exceptions import RandomizerExceptions
+from Class.seedSettings import ExtraConfigurationData, SeedSettings
+from List.NewLocationList import Locations
+from Module import zipper
+from Module.RandomizerSettings import RandomizerSettings
+from Module.generate import GenerationReport, SeedGenerator
+from Module.hints import Hints
+from Module.newRandomize import Randomizer
+from Module.resources import resource_path
+from Module.seedEvaluation import LocationInformedSeedValidator
+from Module.version import LOCAL_UI_VERSION
+from Module.zipper import SeedZip
+
+# The timed phases, as (phase name, owner, attribute name)
+BENCHMARK_PHASES = [
+    ("locations", Locations, "cached"),
+    ("assign_sora_items", Randomizer, "assign_sora_items"),
+    ("validate_seed", LocationInformedSeedValidator, "validate_seed"),
+    ("generate_hints_v2", Hints, "generate_hints_v2"),
+    ("create_zip", SeedZip, "create_zip"),
+    ("khbr", zipper, "_run_khbr"),
+]
+
+
+@dataclass
+class PhaseBenchmark:
+    """Timings, failures, and allocations for every call to one phase."""
+    calls: int = 0
+    failures: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    allocated_bytes: int = 0
+    peak_bytes: int = 0
+
+
+@dataclass
+class PresetBenchmark:
+    """Results for the seeds generated from one preset."""
+    seeds: int = 0
+    # Seed name to the error that stopped it from being generated
+    failed_seeds: dict[str, str] = field(default_factory=dict)
+    seed_attempts: int = 0
+    wall_seconds: float = 0.0
+    phases: dict[str, PhaseBenchmark] = field(default_factory=dict)
+
+
+class _PhaseRecorder:
+    """Wraps each benchmarked phase so that every call to it is recorded into the current preset's results."""
+
+    def __init__(self, trace_allocations: bool):
+        self.trace_allocations = trace_allocations
+        self.results: Optional[PresetBenchmark] = None
+        # Peak traced memory seen so far by each phase in progress, outermost first
+        self._peak_stack: list[int] = []
+
+    @contextmanager
+    def installed(self) -> Iterator[None]:
+        originals = []
+        for name, owner, attribute in BENCHMARK_PHASES:
+            original = inspect.getattr_static(owner, attribute)
+            originals.append((owner, attribute, original))
+            wrapped = self._wrap(name, getattr(owner, attribute))
+            setattr(owner, attribute, staticmethod(wrapped) if isinstance(original, staticmethod) else wrapped)
+        try:
+            yield
+        finally:
+            for owner, attribute, original in originals:
+                setattr(owner, attribute, original)
+
+    def _wrap(self, name: str, function: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            stats = self.results.phases.setdefault(name, PhaseBenchmark())
+            stats.calls += 1
+            start_memory = self._start_allocations()
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except RandomizerExceptions:
+                stats.failures += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                stats.seconds += elapsed
+                stats.max_seconds = max(stats.max_seconds, elapsed)
+                self._finish_allocations(stats, start_memory)
+
+        return timed
+
+    def _start_allocations(self) -> int:
+        if not self.trace_allocations:
+            return 0
+        current, peak = tracemalloc.get_traced_memory()
+        if self._peak_stack:
+            self._peak_stack[-1] = max(self._peak_stack[-1], peak)
+        self._peak_stack.append(current)
+        tracemalloc.reset_peak()
+        return current
+
+    def _finish_allocations(self, stats: PhaseBenchmark, start_memory: int):
+        if not self.trace_allocations:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, self._peak_stack.pop())
+        stats.allocated_bytes += max(0, current - start_memory)
+        stats.peak_bytes = max(stats.peak_bytes, peak - start_memory)
+        if self._peak_stack:
+            # Resetting the peak for this phase lost the enclosing phase's peak, so carry it back out
+            self._peak_stack[-1] = max(self._peak_stack[-1], peak)
+
+
+def _bundled_presets() -> list[Path]:
+    return sorted(Path(resource_path("static/bundled_presets")).glob("*.json"))
+
+
+def _benchmark_preset(preset_path: Path, seed_count: int, recorder: _PhaseRecorder) -> PresetBenchmark:
+    seed_settings = SeedSettings()
+    with open(preset_path, encoding="utf-8") as preset_file:
+        seed_settings.apply_settings_json(json.load(preset_file))
+    extra_data = ExtraConfigurationData(platform="PC", tourney=False, custom_cosmetics_executables=[])
+
+    results = PresetBenchmark()
+    recorder.results = results
+    start = time.perf_counter()
+    for index in range(seed_count):
+        # A fixed corpus of seed names, so that every run (and every version) generates the same seeds
+        seed_name = f"benchmark-{preset_path.stem}-{index}"
+        settings = RandomizerSettings(seed_name, True, LOCAL_UI_VERSION, seed_settings, "")
+        report = GenerationReport()
+
+        def create_zip(randomizer: Randomizer, location_spheres, hints, rng):
+            return SeedZip(settings, randomizer, hints, extra_data, location_spheres, rng=rng).create_zip()
+
+        try:
+            SeedGenerator(settings, verbose=False, report=report).generate(create_zip)
+        except Exception as e:
+            # Keep going so that one broken seed (or a missing khbr data file) doesn't lose the rest of the results
+            results.failed_seeds[seed_name] = repr(e)
+        results.seeds += 1
+        results.seed_attempts += report.seed_attempts
+    results.wall_seconds = time.perf_counter() - start
+    return results
+
+
+def run_benchmark(seed_count: int, presets: list[Path], trace_allocations: bool, progress: bool = True) -> dict:
+    """Benchmarks generating seed_count seeds from each of the given presets, returning JSON-ready results."""
+    recorder = _PhaseRecorder(trace_allocations)
+    preset_results: dict[str, PresetBenchmark] = {}
+    if trace_allocations:
+        tracemalloc.start()
+    try:
+        with recorder.installed():
+            for preset_path in presets:
+                if progress:
+                    print(f"Benchmarking {preset_path.stem}", flush=True)
+                preset_results[preset_path.stem] = _benchmark_preset(preset_path, seed_count, recorder)
+    finally:
+        if trace_allocations:
+            tracemalloc.stop()
+
+    return {
+        "generator_version": LOCAL_UI_VERSION,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "seeds_per_preset": seed_count,
+        "trace_allocations": trace_allocations,
+        "presets": {name: asdict(results) for name, results in preset_results.items()},
+    }
+
+
+def compare_benchmarks(old: dict, new: dict) -> list[str]:
+    """Describes the per-phase time change between two benchmark results, for the presets both of them include."""
+    lines = []
+    for preset_name, new_preset in new["presets"].items():
+        old_preset = old["presets"].get(preset_name)
+        if old_preset is None:
+            continue
+        lines.append(f"{preset_name}: {old_preset['wall_seconds']:.2f}s -> {new_preset['wall_seconds']:.2f}s")
+        for phase_name, new_phase in new_preset["phases"].items():
+            old_phase = old_preset["phases"].get(phase_name)
+            if old_phase is None or old_phase["seconds"] == 0:
+                continue
+            change = (new_phase["seconds"] - old_phase["seconds"]) / old_phase["seconds"] * 100.0
+            lines.append(
+                f"    {phase_name}: {old_phase['seconds']:.3f}s -> {new_phase['seconds']:.3f}s ({change:+.1f}%), "
+                f"{old_phase['failures']} -> {new_phase['failures']} failures"
+            )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks seed generation for each bundled preset.")
+    parser.add_argument("--seeds", type=int, default=5, help="number of seeds to generate per preset")
+    parser.add_argument("--preset", action="append", default=None,
+                        help="only benchmark the bundled preset with this name (may be repeated)")
+    parser.add_argument("--allocations", action="store_true",
+                        help="also trace memory allocations per phase (slows generation down noticeably)")
+    parser.add_argument("--output", default="benchmark.json", help="file to write the JSON results to")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare these results against")
+    args = parser.parse_args()
+
+    presets = _bundled_presets()
+    if args.preset is not None:
+        presets = [preset for preset in presets if preset.stem in args.preset]
+        if len(presets) == 0:
+            raise SystemExit(f"No bundled presets named {args.preset}")
+
+    results = run_benchmark(args.seeds, presets, args.allocations)
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=4)
+    print(f"Wrote results to {os.path.abspath(args.output)}")
+
+    if args.compare is not None:
+        with open(args.compare, encoding="utf-8") as compare_file:
+            old_results = json.load(compare_file)
+        print("\n".join(compare_benchmarks(old_results, results)))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -52,7 +52,7 @@ def make_random_seed_from_preset_name(requested_type:str):
         requested_preset=requested_type,
         generator_string=shared_string_text,
         hash_icons=rando_settings.seedHashIcons,
-        spoiler_html=spoiler_log
+        spoiler_html=spoiler_log.to_html()
     )
 
 
@@ -1,5 +1,6 @@
 import datetime
 import json
+import multiprocessing
 import os
 import random
 import re
@@ -8,6 +9,7 @@ import sys
 import textwrap
 import zipfile
 from pathlib import Path
+from typing import Optional
 
 import pyperclip as pc
 import pytz
@@ -29,11 +31,11 @@ from Module import appconfig, hashimage, platformutils, version, logger, seedHis
 from Module.RandomizerSettings import RandomizerSettings
 from Module.cosmetics import CosmeticsMod, CustomCosmetics
 from Module.dailySeed import allDailyModifiers, getDailyModifiers
-from Module.generate import generateSeed
+from Module.generate import generate_batch_from_settings
 from Module.newRandomize import Randomizer
 from Module.resources import resource_path
 from Module.seedshare import SharedSeed, ShareStringException
-from Module.tourneySpoiler import TourneySeedSaver
+from Module.tourneySpoiler import TourneySeedSaver, saved_seed_folders
 from Module.version import LOCAL_UI_VERSION, EXTRACTED_DATA_UPDATE_VERSION
 from UI import theme, presets, configui
 from UI.GithubInfo.releaseInfo import KH2RandomizerGithubReleases
@@ -606,12 +608,13 @@ class KH2RandomizerApp(QMainWindow):
             self.tourney_seed_path = Path(output_path) / tourney_name
             self.tourney_name = tourney_name
 
-            self.makeSeed(seed_platform)
+            made_seeds = self.makeSeed(seed_platform)
             self.num_tourney_seeds = 0
 
-            message = QMessageBox(text=f"Done making seeds")
-            message.setWindowTitle("KH2 Seed Generator")
-            message.exec()
+            if made_seeds:
+                message = QMessageBox(text=f"Done making seeds")
+                message.setWindowTitle("KH2 Seed Generator")
+                message.exec()
 
     def fixSeedName(self):
         new_string = re.sub(r'[^a-zA-Z0-9]', '', self.seedName.text())
@@ -742,7 +745,7 @@ class KH2RandomizerApp(QMainWindow):
             message.exec()
             # disable all cosmetics, generate a spoiler log, but don't put it in the zip
             extra_data = ExtraConfigurationData(platform=platform, tourney=True, custom_cosmetics_executables=[],disable_emu_warning=self.disable_emu_warnings)
-            self.genTourneySeeds(extra_data)
+            return self.genTourneySeeds(extra_data)
         else:
             extra_data = ExtraConfigurationData(
                 platform=platform,
@@ -780,30 +783,82 @@ class KH2RandomizerApp(QMainWindow):
         if not isinstance(failure,RandomizerExceptions):
             raise failure
 
-    def genTourneySeeds(self, extra_data: ExtraConfigurationData):
+    def _ask_to_resume_tourney(self, saved_seed_count: int) -> Optional[bool]:
+        # Whether to keep the seeds from an earlier run of this tourney, or None to not make any seeds
+        prompt = QMessageBox(self)
+        prompt.setWindowTitle("KH2 Seed Generator")
+        prompt.setText(
+            f"{self.tourney_seed_path} already has {saved_seed_count} seeds from an earlier run of this tourney.\n\n"
+            f"Keep them and make the rest of the {self.num_tourney_seeds} seeds with the current settings, "
+            f"or delete them and start over?"
+        )
+        resume_button = prompt.addButton("Keep and Resume", QMessageBox.AcceptRole)
+        restart_button = prompt.addButton("Delete and Start Over", QMessageBox.DestructiveRole)
+        prompt.addButton(QMessageBox.Cancel)
+        prompt.exec()
+        if prompt.clickedButton() == resume_button:
+            return True
+        elif prompt.clickedButton() == restart_button:
+            return False
+        else:
+            return None
+
+    def genTourneySeeds(self, extra_data: ExtraConfigurationData) -> bool:
+        # Returns whether any seeds were made
+        saved_seed_count = len(saved_seed_folders(self.tourney_seed_path))
+        resume = False
+        if saved_seed_count > 0:
+            resume = self._ask_to_resume_tourney(saved_seed_count)
+            if resume is None:
+                return False
+            if resume and saved_seed_count >= self.num_tourney_seeds:
+                message = QMessageBox(text=f"{self.tourney_seed_path} already has all {saved_seed_count} seeds.")
+                message.setWindowTitle("KH2 Seed Generator")
+                message.exec()
+                return False
+
         self.tourney_seed_path.mkdir(parents=True, exist_ok=True)
 
-        self.tourney_spoilers = TourneySeedSaver(self.tourney_seed_path,self.tourney_name)
-        self.progress = QProgressDialog(f"Creating seeds...","Cancel",0,self.num_tourney_seeds,self)
+        self.tourney_spoilers = TourneySeedSaver(self.tourney_seed_path,self.tourney_name,resume=resume)
+
+        # The settings for each seed come from the UI, so make them all here first.
+        # The seeds themselves are then generated in worker processes.
+        batch = []
+        for seed_number in range(len(self.tourney_spoilers.seed_strings),self.num_tourney_seeds):
+            seed_name = random_seed_name(unseeded_rng)
+            self.seedName.setText(seed_name)
+            tourney_rando_settings = self.make_rando_settings()
+            if tourney_rando_settings is not None:
+                batch.append((self.createSharedString(), tourney_rando_settings))
+
+        if resume and len(batch) > 0:
+            try:
+                self.tourney_spoilers.check_settings(batch[0][0])
+            except SettingsException as e:
+                message = QMessageBox(text=str(e))
+                message.setWindowTitle("KH2 Seed Generator")
+                message.exec()
+                return False
+
+        self.progress = QProgressDialog(f"Creating seeds...","Cancel",0,len(batch),self)
         self.progress.setMinimumDuration(50)
         self.progress.setWindowTitle("Making your seeds, please wait...")
         self.progress.setCancelButton(None)
         self.progress.setModal(True)
         self.progress.forceShow()
-        for seed_number in range(0,self.num_tourney_seeds):
-            self.progress.setValue(seed_number)
-            self.progress.setLabelText(f"Seed {seed_number+2}") # dialog updates are offset by one seed, so making display correct
-            self.progress.show()
-            seed_name = random_seed_name(unseeded_rng)
-            self.seedName.setText(seed_name)
-            tourney_rando_settings = self.make_rando_settings()
-            if tourney_rando_settings is not None:
-                zip_file, spoiler_log, enemy_log = generateSeed(tourney_rando_settings, extra_data)
-                self.tourney_spoilers.add_seed(self.createSharedString(),tourney_rando_settings,spoiler_log)
+
+        def update_progress(finished: int, total: int):
+            self.progress.setValue(finished)
+            self.progress.setLabelText(f"Created {finished} of {total} seeds")
+
+        generate_batch_from_settings(
+            batch, extra_data, saver=self.tourney_spoilers, progress=update_progress, keep_zips=False
+        )
         if self.progress:
             self.progress.close()
         self.progress = None
         self.tourney_spoilers.save()
+        return True
 
     def _reload_presets(self):
         self.all_presets: list[SettingsPreset] = []
@@ -1105,4 +1160,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Needed for tourney seed generation worker processes in the packaged app
+    multiprocessing.freeze_support()
     main()
@@ -1,4 +1,3 @@
-import random
 import unittest
 
 from Class import settingkey
@@ -45,11 +44,11 @@ class Tests(unittest.TestCase):
         seed_settings.set(settingkey.COOP_PLAYER_NUMBER, "1")
 
         for randomizer, settings in seedtest.test_seeds_with_settings(seed_settings, _COOP_SEED_COUNT):
-            random_state = random.getstate()
+            random_state = randomizer.rng.getstate()
             settings.coop_player_number = "1"
             player1_world_order = self._world_order(Hints.generate_hints_v2(randomizer, settings),settings)
 
-            random.setstate(random_state)
+            randomizer.rng.setstate(random_state)
             settings.coop_player_number = "2"
             player2_world_order = self._world_order(Hints.generate_hints_v2(randomizer, settings),settings)
 
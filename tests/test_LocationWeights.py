@@ -244,6 +244,29 @@ class Tests(unittest.TestCase):
         self.assertEqual(max_weight, reverse_weights.get_weight(itemType.FORM, level_50))
         self.assertEqual(max_weight, both_weights.get_weight(itemType.FORM, level_50))
 
+    def test_weight_table_matches_depths(self):
+        for softlock_checking in ['default', 'reverse', 'both']:
+            seed_settings = SeedSettings()
+            seed_settings.set(settingkey.WEIGHTED_FORMS, itemBias.VERY_EARLY)
+            seed_settings.set(settingkey.WEIGHTED_MAGIC, itemBias.LATE)
+            seed_settings.set(settingkey.AS_DATA_SPLIT, True)
+            seed_settings.set(settingkey.SOFTLOCK_CHECKING, softlock_checking)
+            settings = RandomizerSettings("test_name", True, "version", seed_settings, "")
+            locations = Locations(settings, secondary_graph=False)
+            weights = LocationWeights(settings, locations, Locations(settings, secondary_graph=True))
+
+            for location in locations.all_locations():
+                depth = weights.get_depth(location)
+                for item_type in [itemType.FORM, itemType.FIRE, itemType.ITEM]:
+                    rarity_weights = weights.weights[item_type]
+                    if isinstance(depth, tuple):
+                        expected = (rarity_weights[depth[0]] + rarity_weights[depth[1]]) // 2
+                    else:
+                        expected = rarity_weights[depth]
+                    index = weights.location_index(location)
+                    self.assertEqual(expected, weights.weight_table[item_type][index])
+                    self.assertEqual(expected, weights.get_weight(item_type, location))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from Class.seedSettings import SeedSettings
+from List.NewLocationList import Locations
+from List.configDict import itemType
+from Module.RandomizerSettings import RandomizerSettings
+
+
+class Tests(unittest.TestCase):
+
+    @staticmethod
+    def _settings(seed_name: str) -> RandomizerSettings:
+        return RandomizerSettings(seed_name, True, "version", SeedSettings(), "")
+
+    def test_cached_locations_match_built_locations(self):
+        settings = self._settings("cachetest")
+        for secondary_graph in [False, True]:
+            built = Locations(settings, secondary_graph)
+            cached = Locations.cached(settings, secondary_graph)
+            self.assertEqual(built.node_ids(), cached.node_ids())
+            self.assertEqual(built.all_locations(), cached.all_locations())
+            for node_id in built.node_ids():
+                built_graph = built.location_graph
+                cached_graph = cached.location_graph
+                self.assertEqual(
+                    [built_graph.edge_by_id(edge) for edge in built_graph.inc_edges(node_id)],
+                    [cached_graph.edge_by_id(edge) for edge in cached_graph.inc_edges(node_id)],
+                )
+            self.assertEqual(built.first_boss_nodes, cached.first_boss_nodes)
+            self.assertEqual(built.last_story_boss_nodes, cached.last_story_boss_nodes)
+            self.assertEqual(built.superboss_nodes, cached.superboss_nodes)
+
+    def test_cached_locations_are_independent_copies(self):
+        settings = self._settings("cachetest")
+        built = Locations(settings)
+        first = Locations.cached(settings)
+        second = Locations.cached(settings)
+
+        for location in first.all_locations():
+            location.InvalidChecks.append(itemType.GAUGE)
+        for location in second.all_locations():
+            self.assertIs(location, second.locations_by_name[location.name()])
+            self.assertEqual(built.locations_by_name[location.name()].InvalidChecks, location.InvalidChecks)
+
+
+if __name__ == '__main__':
+    unittest.main()
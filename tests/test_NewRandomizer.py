@@ -1,6 +1,10 @@
+import random
 import unittest
 
 from Class.seedSettings import SeedSettings
+from List.ItemList import Items
+from List.configDict import locationCategory
+from List.inventory import form
 from Module.newRandomize import RandomizerSettings, Randomizer
 
 
@@ -30,6 +34,73 @@ class Tests(unittest.TestCase):
         self.assertEqual(172, num_str_increase + num_mag_increase + num_def_increase + num_ap_increase)
         self.assertEqual(42, len(randomizer.form_level_exp))
 
+    def test_same_seed_makes_same_assignments(self):
+        seed_settings = SeedSettings()
+        settings = RandomizerSettings("test_name", True, "version", seed_settings, "")
+        first = Randomizer(settings)
+
+        # Neither drawing from the shared generator nor building another seed in between should have any effect
+        random.seed("something else entirely")
+        random.random()
+        other_settings = RandomizerSettings("other_name", True, "version", seed_settings, "")
+        Randomizer(other_settings)
+
+        second = Randomizer(settings)
+        self.assertEqual(self._assignment_summary(first), self._assignment_summary(second))
+        self.assertEqual(first.starting_item_ids, second.starting_item_ids)
+
+    def test_assignment_lookups_match_assignment_list(self):
+        seed_settings = SeedSettings()
+        settings = RandomizerSettings("test_name", True, "version", seed_settings, "")
+        randomizer = Randomizer(settings)
+
+        for assignment in randomizer.assignments:
+            location = assignment.location
+            self.assertIs(
+                next(a for a in randomizer.assignments if a.location.name() == location.name()),
+                randomizer.assignment_for_location(location.name())
+            )
+            item = assignment.item.item
+            self.assertIs(
+                next(a for a in randomizer.assignments if a.item.item == item),
+                randomizer.assignment_for_item(item)
+            )
+            self.assertIs(
+                next(a for a in randomizer.assignments if a.item.item.id == item.id),
+                randomizer.assignment_for_item_id(item.id)
+            )
+        for level in range(1, 100):
+            self.assertIs(
+                next((a for a in randomizer.assignments if a.location.LocationCategory == locationCategory.LEVEL
+                      and a.location.LocationId == level), None),
+                randomizer.assignment_for_sword_level(level)
+            )
+        for stats in randomizer.weapon_stats:
+            self.assertIs(stats, randomizer.weapon_stats_for_location(stats.location.name()))
+        self.assertIsNone(randomizer.assignment_for_location("Not a location"))
+
+    def test_replacing_assigned_items_updates_lookups(self):
+        seed_settings = SeedSettings()
+        settings = RandomizerSettings("test_name", True, "version", seed_settings, "")
+        randomizer = Randomizer(settings)
+        valor_assignment = randomizer.assignment_for_item(form.ValorForm)
+        dummy_valor = Items.getDummyValorForm()
+
+        randomizer.replace_assigned_items(
+            lambda item: dummy_valor if item is not None and item.item == form.ValorForm else item
+        )
+
+        self.assertIsNone(randomizer.assignment_for_item(form.ValorForm))
+        self.assertIs(valor_assignment, randomizer.assignment_for_item(dummy_valor.item))
+        self.assertIs(valor_assignment, randomizer.assignment_for_item_id(dummy_valor.Id))
+
+    @staticmethod
+    def _assignment_summary(randomizer: Randomizer) -> list[tuple[str, str, str]]:
+        return [
+            (assignment.location.name(), str(assignment.item), str(assignment.item2))
+            for assignment in randomizer.assignments
+        ]
+
 
 if __name__ == '__main__':
     unittest.main()
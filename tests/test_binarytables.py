@@ -0,0 +1,53 @@
+import unittest
+
+from Module.battleLevels import BtlvViewer
+from Module.binarytables import PatchedBinary, DROP_RATES, SHOP_HEADER, SHOP_VALID_ITEMS, pristine_binary
+
+
+class Tests(unittest.TestCase):
+
+    def test_edits_copy_on_write(self):
+        pristine = pristine_binary("static/drops.bin")
+        binary = PatchedBinary("static/drops.bin")
+        drops = binary.table(DROP_RATES)
+        self.assertFalse(binary.modified)
+
+        # Setting fields to the values they already have doesn't need a copy
+        self.assertEqual([], drops.update_field("small_hp", lambda value: value))
+        self.assertFalse(binary.modified)
+
+        changed = drops.update_field("small_hp", lambda value: value + 1 if value < 255 else value, indices=[0, 1])
+        self.assertTrue(binary.modified)
+        self.assertEqual([0, 1], changed)
+        self.assertEqual(pristine[drops.record_offset(0) + 2] + 1, drops.get(0, "small_hp"))
+        self.assertEqual(pristine, pristine_binary("static/drops.bin"))
+        self.assertEqual(len(pristine), len(binary.to_bytes()))
+
+    def test_record_fields(self):
+        pristine = pristine_binary("static/drops.bin")
+        drops = PatchedBinary("static/drops.bin").table(DROP_RATES)
+        self.assertEqual(24, DROP_RATES.layout.size)
+        self.assertEqual(184, len(list(drops)))
+
+        record = drops.record(3)
+        offset = drops.record_offset(3)
+        self.assertEqual(int.from_bytes(pristine[offset:offset + 2], "little"), record.id)
+        self.assertEqual(int.from_bytes(pristine[offset + 12:offset + 14], "little"), record.item1)
+        self.assertEqual(record.item1_chance, drops.get(3, "item1_chance"))
+        with self.assertRaises(IndexError):
+            drops.record(len(drops))
+
+    def test_shop_tables(self):
+        binary = PatchedBinary("static/shop.bin")
+        header = binary.table(SHOP_HEADER).record(0)
+        self.assertEqual(SHOP_VALID_ITEMS.offset, header.valid_items_offset)
+        valid_items = binary.table(SHOP_VALID_ITEMS)
+        self.assertEqual(len(pristine_binary("static/shop.bin")), valid_items.record_offset(len(valid_items) - 1) + 2)
+
+    def test_unchanged_battle_levels_written_as_vanilla(self):
+        viewer = BtlvViewer()
+        self.assertEqual(pristine_binary(viewer.btlv_file), viewer.write_modifications())
+
+
+if __name__ == '__main__':
+    unittest.main()
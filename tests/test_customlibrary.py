@@ -0,0 +1,95 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from Module.cosmeticsmods.customlibrary import CustomLibraryIndex
+
+
+def _set_modified(path: Path, seconds_ago: float):
+    modified = time.time() - seconds_ago
+    os.utime(path, (modified, modified))
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.root = Path(self.folder.name) / "custom"
+        for relative_path in [
+            "Battle/boss.scd",
+            "Battle/extra/fight.SCD",
+            "Battle/extra/notes.txt",
+            "Field/town.scd",
+            "Field/empty/.keep",
+            "readme.txt",
+        ]:
+            path = self.root / relative_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(b"song")
+        self._age_folder()
+        self.index_path = Path(self.folder.name) / "index.json"
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def _age_folder(self):
+        for folder, _, _ in os.walk(self.root):
+            _set_modified(Path(folder), seconds_ago=60)
+
+    def test_same_as_walking_the_folder(self):
+        index = CustomLibraryIndex(self.root, self.index_path)
+        index.refresh()
+
+        self.assertEqual([path.name for path in self.root.iterdir() if path.is_dir()], index.folders())
+        walked = [Path(folder) / name for folder, _, names in os.walk(self.root) for name in names]
+        self.assertEqual(walked, [file.path for file in index.walk_files()])
+        walked_battle = [Path(folder) / name for folder, _, names in os.walk(self.root / "Battle") for name in names]
+        self.assertEqual(walked_battle, [file.path for file in index.walk_files("Battle")])
+        self.assertEqual([self.root / "readme.txt"], [file.path for file in index.files()])
+        self.assertEqual([], index.walk_files("Missing"))
+
+    def test_only_modified_directories_are_listed_again(self):
+        index = CustomLibraryIndex(self.root, self.index_path)
+        self.assertTrue(index.refresh())
+        self.assertEqual(5, index.directories_listed)
+
+        self.assertFalse(index.refresh())
+        self.assertEqual(5, index.directories_listed)
+
+        (self.root / "Field" / "new.scd").write_bytes(b"song")
+        _set_modified(self.root / "Field", seconds_ago=30)
+        self.assertTrue(index.refresh())
+        self.assertEqual(6, index.directories_listed)
+        self.assertIn(self.root / "Field" / "new.scd", [file.path for file in index.walk_files("Field")])
+
+        (self.root / "Battle" / "extra" / "fight.SCD").unlink()
+        _set_modified(self.root / "Battle" / "extra", seconds_ago=30)
+        self.assertTrue(index.refresh())
+        self.assertEqual(["notes.txt"], [file.name for file in index.files("Battle", "extra")])
+
+    def test_recently_modified_directories_are_listed_until_settled(self):
+        index = CustomLibraryIndex(self.root, self.index_path)
+        index.refresh()
+        (self.root / "Field" / "new.scd").write_bytes(b"song")
+        index.refresh()
+        listed = index.directories_listed
+        index.refresh()
+        self.assertEqual(listed + 1, index.directories_listed)
+
+    def test_index_is_saved_and_reused(self):
+        CustomLibraryIndex(self.root, self.index_path).refresh()
+        self.assertTrue(self.index_path.is_file())
+
+        reloaded = CustomLibraryIndex(self.root, self.index_path)
+        self.assertFalse(reloaded.refresh())
+        self.assertEqual(0, reloaded.directories_listed)
+        self.assertEqual(6, len(reloaded.walk_files()))
+
+        other_root = CustomLibraryIndex(Path(self.folder.name) / "other", self.index_path)
+        self.assertEqual([], other_root.walk_files())
+
+
+if __name__ == '__main__':
+    unittest.main()
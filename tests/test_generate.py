@@ -0,0 +1,172 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from Class.exceptions import CancelledException, GeneratorException, HintException, SettingsException
+from Class.seedSettings import SeedSettings
+from Module.RandomizerSettings import RandomizerSettings
+from Module.cancellation import CancellationToken
+from Module.generate import generate_batch, GenerationPhase, SeedGenerator
+from Module.hints import Hints
+from Module.spoilerLog import SpoilerLog
+from Module.tourneySpoiler import TourneySeedSaver, render_spoiler_html
+
+
+class Tests(unittest.TestCase):
+
+    def test_batch_matches_serial_generation(self):
+        seed_names = ["batchseed1", "batchseed2"]
+        serial = generate_batch(SeedSettings(), len(seed_names), workers=1, seed_names=seed_names, make_zips=False)
+        parallel = generate_batch(SeedSettings(), len(seed_names), workers=2, seed_names=seed_names, make_zips=False)
+
+        self.assertEqual([s.share_string for s in serial], [s.share_string for s in parallel])
+        self.assertEqual([s.spoiler_log for s in serial], [s.spoiler_log for s in parallel])
+        self.assertEqual([s.settings.random_seed for s in serial], [s.settings.random_seed for s in parallel])
+
+    def test_batch_zips_made_but_not_kept(self):
+        seed_names = ["batchseed1"]
+        kept = generate_batch(SeedSettings(), len(seed_names), workers=1, seed_names=seed_names)
+        discarded = generate_batch(SeedSettings(), len(seed_names), workers=1, seed_names=seed_names, keep_zips=False)
+
+        self.assertIsNotNone(kept[0].zip_data)
+        self.assertIsNone(discarded[0].zip_data)
+        self.assertEqual(kept[0].spoiler_log, discarded[0].spoiler_log)
+        self.assertEqual(kept[0].enemy_log, discarded[0].enemy_log)
+
+    def test_batch_streams_seeds_to_saver_in_order(self):
+        seed_names = ["batchseed1", "batchseed2"]
+        progress_updates = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            saver = TourneySeedSaver(Path(temp_dir), "Test Tourney")
+            results = generate_batch(
+                SeedSettings(),
+                len(seed_names),
+                workers=2,
+                seed_names=seed_names,
+                saver=saver,
+                progress=lambda finished, total: progress_updates.append((finished, total)),
+                make_zips=False,
+            )
+            saver.save()
+            self.assertEqual([s.share_string for s in results], saver.seed_strings)
+            self.assertEqual(["seed1", "seed2"], saver.seed_names)
+            for seed_name, result in zip(saver.seed_names, results):
+                seed_folder = Path(temp_dir) / seed_name
+                self.assertEqual(result.spoiler_log.to_json(), (seed_folder / "spoiler.json").read_text())
+                self.assertEqual(result.share_string, (seed_folder / "seed-string.txt").read_text())
+                self.assertTrue((seed_folder / "spoiler.html").exists())
+        self.assertEqual([(1, 2), (2, 2)], progress_updates)
+
+    def test_skipped_spoiler_pages_rendered_later(self):
+        seed_names = ["batchseed1"]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            saver = TourneySeedSaver(Path(temp_dir), "Test Tourney", spoiler_html=False)
+            results = generate_batch(
+                SeedSettings(), len(seed_names), workers=1, seed_names=seed_names, saver=saver, make_zips=False
+            )
+            saver.save()
+            spoiler_json_path = Path(temp_dir) / "seed1" / "spoiler.json"
+            self.assertFalse(spoiler_json_path.with_suffix(".html").exists())
+            self.assertEqual(results[0].spoiler_log, SpoilerLog.from_json(spoiler_json_path.read_text()))
+
+            html_path = render_spoiler_html(spoiler_json_path)
+            self.assertIn('seed_name = "batchseed1"', html_path.read_text())
+            self.assertIn('url("../misc/KHMenu.otf")', html_path.read_text())
+
+    def test_hints_are_rerolled_without_replacing_items(self):
+        settings = RandomizerSettings("hintretry", True, "version", SeedSettings(), "")
+        generate_hints = Hints.generate_hints_v2
+        calls = []
+
+        def flaky_hints(randomizer, hint_settings, rng=None):
+            calls.append(randomizer)
+            if len(calls) == 1:
+                raise HintException("Can't find valid point hint assignment")
+            return generate_hints(randomizer, hint_settings, rng)
+
+        generator = SeedGenerator(settings, verbose=False)
+        with mock.patch.object(Hints, "generate_hints_v2", side_effect=flaky_hints):
+            randomizer = generator.generate(lambda randomizer, spheres, hints, rng: randomizer)
+
+        self.assertEqual(1, generator.report.seed_attempts)
+        self.assertEqual(1, generator.report.phases[GenerationPhase.PLACEMENT].attempts)
+        self.assertEqual(2, generator.report.phases[GenerationPhase.HINTS].attempts)
+        self.assertEqual(1, generator.report.phases[GenerationPhase.HINTS].failures)
+        self.assertEqual([randomizer, randomizer], calls)
+        self.assertEqual("hintretry", settings.random_seed)
+
+    def test_settings_failures_stop_early(self):
+        settings = RandomizerSettings("infeasible", True, "version", SeedSettings(), "")
+        error = SettingsException("Not enough objective locations")
+
+        def failing_randomizer(*args, **kwargs):
+            raise error
+
+        generator = SeedGenerator(settings, verbose=False)
+        with mock.patch("Module.generate.Randomizer", side_effect=failing_randomizer):
+            with self.assertRaises(SettingsException) as context:
+                generator.generate(lambda randomizer, spheres, hints, rng: randomizer)
+
+        self.assertIs(error, context.exception)
+        self.assertIn("Try loosening the item placement settings", "\n".join(error.__notes__))
+        self.assertTrue(generator.report.aborted_early)
+        self.assertEqual(1, generator.report.seed_attempts)
+
+    def test_rare_successes_not_given_up_on(self):
+        settings = RandomizerSettings("restrictive", True, "version", SeedSettings(), "")
+        attempts = []
+
+        def rarely_working_output(randomizer, spheres, hints, rng):
+            attempts.append(randomizer)
+            if len(attempts) < 20:
+                raise GeneratorException("Boss replacement failed")
+            return randomizer
+
+        generator = SeedGenerator(settings, verbose=False)
+        randomizer = generator.generate(rarely_working_output)
+
+        self.assertIs(attempts[-1], randomizer)
+        self.assertFalse(generator.report.aborted_early)
+        self.assertEqual(20, generator.report.phases[GenerationPhase.OUTPUT].attempts)
+        self.assertEqual(19, generator.report.phases[GenerationPhase.OUTPUT].failures)
+
+    def test_failures_summarized_once_out_of_attempts(self):
+        settings = RandomizerSettings("impossible", True, "version", SeedSettings(), "")
+
+        def failing_output(randomizer, spheres, hints, rng):
+            raise GeneratorException("Boss replacement failed")
+
+        generator = SeedGenerator(settings, verbose=False, max_attempts=3)
+        with self.assertRaises(GeneratorException) as context:
+            generator.generate(failing_output)
+
+        self.assertEqual("Boss replacement failed", str(context.exception))
+        notes = "\n".join(context.exception.__notes__)
+        self.assertIn("All 3 attempts failed", notes)
+        output_failures = generator.report.phases[GenerationPhase.OUTPUT].failures
+        self.assertIn(f"{output_failures}x Seed output: Boss replacement failed", notes)
+        self.assertIn("Try turning off boss/enemy randomization", notes)
+        self.assertFalse(generator.report.aborted_early)
+        self.assertEqual(3, generator.report.seed_attempts)
+
+    def test_cancelled_generation_stops_at_next_phase(self):
+        settings = RandomizerSettings("cancelled", True, "version", SeedSettings(), "")
+        cancellation = CancellationToken()
+
+        def cancel_during_hints(randomizer, hint_settings, rng=None):
+            cancellation.cancel()
+            raise HintException("Can't find valid point hint assignment")
+
+        generator = SeedGenerator(settings, verbose=False, cancellation=cancellation)
+        with mock.patch.object(Hints, "generate_hints_v2", side_effect=cancel_during_hints):
+            with self.assertRaises(CancelledException):
+                generator.generate(lambda randomizer, spheres, hints, rng: randomizer)
+
+        self.assertEqual(1, generator.report.seed_attempts)
+        self.assertEqual(1, generator.report.phases[GenerationPhase.HINTS].attempts)
+        self.assertEqual(0, generator.report.phases[GenerationPhase.OUTPUT].attempts)
+
+
+if __name__ == '__main__':
+    unittest.main()
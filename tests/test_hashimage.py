@@ -0,0 +1,36 @@
+import io
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from Module import hashimage
+
+
+class Tests(unittest.TestCase):
+
+    def test_hash_image_reused(self):
+        icon_names = ["ability-unequip", "form", "magic", "party", "rank-s", "item-tent", "weapon-keyblade"]
+        image_data = hashimage.generate_seed_hash_image(icon_names, use_bitmap=False)
+        with mock.patch.object(Image, "open", side_effect=AssertionError("Icon read again")):
+            self.assertIs(image_data, hashimage.generate_seed_hash_image(list(icon_names), use_bitmap=False))
+
+        with Image.open(io.BytesIO(image_data)) as image:
+            self.assertEqual("PNG", image.format)
+            self.assertEqual("RGBA", image.mode)
+        with Image.open(io.BytesIO(hashimage.generate_seed_hash_image(icon_names, use_bitmap=True))) as image:
+            self.assertEqual("BMP", image.format)
+
+    def test_least_recently_used_hash_images_evicted(self):
+        icon_names = ["form", "magic", "party", "rank-a", "gumi-ship", "weapon-keyblade", "weapon-shield"]
+        with mock.patch.object(hashimage, "MAX_CACHED_HASH_IMAGES", 2):
+            first = hashimage.generate_seed_hash_image(icon_names, use_bitmap=False)
+            hashimage.generate_seed_hash_image(list(reversed(icon_names)), use_bitmap=False)
+            hashimage.generate_seed_hash_image(icon_names[1:] + icon_names[:1], use_bitmap=False)
+            again = hashimage.generate_seed_hash_image(icon_names, use_bitmap=False)
+        self.assertEqual(first, again)
+        self.assertIsNot(first, again)
+
+
+if __name__ == '__main__':
+    unittest.main()
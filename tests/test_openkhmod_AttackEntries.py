@@ -0,0 +1,37 @@
+import unittest
+
+from Class.openkhmod import AttackEntriesOrganizer, LevelUps
+
+
+class Tests(unittest.TestCase):
+
+    def test_attack_lookups_match_first_entry_in_list(self):
+        organizer = AttackEntriesOrganizer("AtkpList.yml")
+        list_data = organizer.get_all_attack_ids()
+
+        for attack_entry in list_data[::97]:
+            sub_id, attack_id, switch = attack_entry["SubId"], attack_entry["Id"], attack_entry["Switch"]
+            expected = next(e for e in list_data if e["SubId"] == sub_id and e["Id"] == attack_id)
+            self.assertEqual(
+                organizer.attack_entry_constructor(expected).__dict__,
+                organizer.get_attack_using_ids(sub_id, attack_id).__dict__,
+            )
+            expected = next(
+                e for e in list_data if e["SubId"] == sub_id and e["Id"] == attack_id and e["Switch"] == switch
+            )
+            self.assertEqual(
+                organizer.attack_entry_constructor(expected).__dict__,
+                organizer.get_attack_using_ids_plus_switch(sub_id, attack_id, switch).__dict__,
+            )
+
+        self.assertIsNone(organizer.get_attack_using_ids(-1, -1))
+        self.assertIsNone(organizer.get_attack_using_ids_plus_switch(-1, -1, 0))
+
+    def test_companion_levels(self):
+        level_ups = LevelUps("LvupList.yml")
+        self.assertEqual(level_ups.yaml_list_data["Donald"], level_ups.get_companion_levels("Donald"))
+        self.assertIsNone(level_ups.get_companion_levels("Nobody"))
+
+
+if __name__ == '__main__':
+    unittest.main()
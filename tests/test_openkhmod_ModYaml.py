@@ -0,0 +1,34 @@
+import unittest
+
+import yaml
+
+from Class.openkhmod import _TaglessDumper, dump_mod_yaml
+
+
+class Tests(unittest.TestCase):
+
+    def _assert_same_as_python_emitter(self, data, sort_keys: bool = False):
+        expected = yaml.dump(data, Dumper=_TaglessDumper, line_break="\r\n", sort_keys=sort_keys)
+        self.assertEqual(expected, dump_mod_yaml(data, sort_keys=sort_keys))
+
+    def test_listpatch_data(self):
+        self._assert_same_as_python_emitter([
+            {"Id": 1, "Name": "Potion", "Flags": "KillBoss", "Power": 0, "Enabled": True, "Missing": None},
+            {"Id": 2, "Name": "a long name " * 12, "Nested": [{"Level": 3}, {"Level": 4}]},
+        ])
+        self._assert_same_as_python_emitter({"Sora": {1: {"Level": 1, "Exp": 0}}, "": {"Empty": ""}}, sort_keys=True)
+
+    def test_escaped_strings(self):
+        self._assert_same_as_python_emitter([
+            {"id": 17201, "en": "Beginner", "jp": "{:color #FF000080}ビギナーモード (注意!)"},
+            {"id": 20239, "en": "The Final Door\n\nopens with\n\n3 Proofs.", "jp": "quote \" and back\\slash " * 5},
+        ])
+
+    def test_no_tags(self):
+        yaml_string = dump_mod_yaml({"Entries": (1, 2)}, sort_keys=False)
+        self.assertNotIn("!!", yaml_string)
+        self.assertEqual({"Entries": [1, 2]}, yaml.safe_load(yaml_string))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import random
+import unittest
+from bisect import bisect
+from collections import Counter
+from itertools import accumulate
+
+from Class.randomUtils import WeightedSampler, weighted_sample_without_replacement
+
+
+class Tests(unittest.TestCase):
+
+    def test_sampler_matches_cumulative_search(self):
+        weights = [3, 0, 5, 1, 0, 0, 7, 2, 4]
+        sampler = WeightedSampler(weights)
+        self.assertEqual(sum(weights), sampler.total())
+
+        cumulative = list(accumulate(weights))
+        for target in range(sum(weights)):
+            self.assertEqual(bisect(cumulative, target), sampler.find(target))
+            self.assertEqual(bisect(cumulative, target + 0.5), sampler.find(target + 0.5))
+
+    def test_sampler_draws_like_random_choices(self):
+        weights = [random.Random(index).randint(0, 20) for index in range(50)]
+        sampler = WeightedSampler(weights)
+        population = list(range(len(weights)))
+
+        expected_rng = random.Random(1234)
+        actual_rng = random.Random(1234)
+        for _ in range(500):
+            self.assertEqual(expected_rng.choices(population, weights)[0], sampler.draw(actual_rng))
+
+    def test_removed_and_updated_weights(self):
+        sampler = WeightedSampler([1, 1, 1, 1])
+        sampler.remove(0)
+        sampler.remove(2)
+        sampler.update(3, 5)
+        self.assertEqual(6, sampler.total())
+        self.assertEqual(0, sampler.weight(0))
+        self.assertEqual(5, sampler.weight(3))
+
+        rng = random.Random(99)
+        counts = Counter(sampler.draw(rng) for _ in range(6000))
+        self.assertNotIn(0, counts)
+        self.assertNotIn(2, counts)
+        self.assertAlmostEqual(5.0, counts[3] / counts[1], delta=0.75)
+
+    def test_weighted_sample_without_replacement(self):
+        population = ["a", "b", "c", "d", "e"]
+        for seed in range(100):
+            sample = weighted_sample_without_replacement(population, [1, 0, 2, 3, 0], k=3, rng=random.Random(seed))
+            self.assertEqual(["a", "c", "d"], sorted(sample))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from Module.cosmeticsmods.recolorcache import RecolorCache
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.cache_folder = Path(self.folder.name) / "cache"
+        self.source_path = Path(self.folder.name) / "source.png"
+        self.source_path.write_bytes(b"source texture")
+        self.mask_path = Path(self.folder.name) / "area.mask"
+        self.mask_path.write_bytes(b"mask")
+
+    def _key(self, cache: RecolorCache, new_hue: int = 120, output_extension: str = ".png") -> str:
+        return cache.key(self.source_path, {"new_hue": new_hue}, [self.mask_path], output_extension)
+
+    def _add(self, cache: RecolorCache, key: str, size: int) -> Path:
+        path = cache.entry_path(key, ".png")
+        path.write_bytes(b"x" * size)
+        cache.add(key, path)
+        return path
+
+    def test_key_covers_inputs(self):
+        cache = RecolorCache(self.cache_folder)
+        key = self._key(cache)
+        self.assertEqual(key, self._key(RecolorCache(self.cache_folder)))
+        self.assertNotEqual(key, self._key(cache, new_hue=240))
+        self.assertNotEqual(key, self._key(cache, output_extension=".dds"))
+
+        self.mask_path.write_bytes(b"edited mask")
+        os.utime(self.mask_path, ns=(1, 1))
+        mask_key = self._key(cache)
+        self.assertNotEqual(key, mask_key)
+
+        self.source_path.write_bytes(b"other texture")
+        os.utime(self.source_path, ns=(1, 1))
+        self.assertNotEqual(mask_key, self._key(cache))
+
+    def test_entries_reused_and_checked(self):
+        cache = RecolorCache(self.cache_folder)
+        key = self._key(cache)
+        self.assertIsNone(cache.lookup(key))
+        path = self._add(cache, key, 10)
+        cache.finish()
+
+        cache = RecolorCache(self.cache_folder)
+        self.assertEqual(path, cache.lookup(self._key(cache)))
+        self.assertEqual(0, cache.verify())
+
+        # An entry that changed after it was cached isn't used
+        path.write_bytes(b"truncated")
+        self.assertIsNone(cache.lookup(key))
+        self.assertFalse(path.exists())
+        stats = cache.stats()
+        self.assertEqual((1, 1, 0, 0), (stats.hits, stats.misses, stats.entries, stats.total_bytes))
+
+    def test_least_recently_used_evicted(self):
+        cache = RecolorCache(self.cache_folder, max_bytes=25)
+        old_path = self._add(cache, "0" * 32, 10)
+        recent_path = self._add(cache, "1" * 32, 10)
+        cache.finish()
+
+        cache = RecolorCache(self.cache_folder, max_bytes=25)
+        self.assertEqual(recent_path, cache.lookup("1" * 32))
+        # Entries used by this run are kept even if they're over the cap
+        new_path = self._add(cache, "2" * 32, 10)
+        cache.finish(max_bytes=0)
+        self.assertFalse(old_path.exists())
+        self.assertTrue(recent_path.exists())
+        self.assertTrue(new_path.exists())
+        stats = cache.stats()
+        self.assertEqual((1, 2, 20), (stats.evictions, stats.entries, stats.total_bytes))
+
+    def test_unrecorded_entries_adopted(self):
+        cache = RecolorCache(self.cache_folder)
+        key = self._key(cache)
+        # Written by a run that was cancelled before it could update the manifest
+        cache.entry_path(key, ".png").write_bytes(b"recolored")
+        stale_temp_path = self.cache_folder / ".partial-1234.png"
+        stale_temp_path.write_bytes(b"rec")
+        os.utime(stale_temp_path, (1, 1))
+        old_layout_folder = self.cache_folder / "model"
+        old_layout_folder.mkdir()
+        (old_layout_folder / "model-a-120.png").write_bytes(b"recolored")
+
+        cache = RecolorCache(self.cache_folder)
+        self.assertEqual(cache.entry_path(key, ".png"), cache.lookup(key))
+        self.assertFalse(stale_temp_path.exists())
+        self.assertFalse(old_layout_folder.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import gzip
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from Module.cosmeticsmods.recolormask import MaskCache, read_text_mask, write_packed_mask, read_packed_mask
+
+
+def _write_text_mask(mask_file_path: Path, mask: np.ndarray):
+    y_dimension, x_dimension = mask.shape
+    rows = ["".join("1" if pixel else " " for pixel in row) for row in mask]
+    with gzip.open(mask_file_path, "wb") as mask_file:
+        mask_file.write(f"{y_dimension},{x_dimension}\n".encode())
+        mask_file.write("\n".join(rows).encode())
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.mask = np.random.default_rng(23).random((13, 21)) > 0.5
+
+    def test_packed_mask_round_trips(self):
+        with tempfile.TemporaryDirectory() as folder:
+            mask_file_path = Path(folder) / "area.mask"
+            _write_text_mask(mask_file_path, self.mask)
+            self.assertTrue(np.array_equal(self.mask, read_text_mask(mask_file_path)))
+
+            packed_mask_path = Path(folder) / "area.pmask"
+            write_packed_mask(packed_mask_path, self.mask)
+            self.assertEqual(12 + 13 * 3, packed_mask_path.stat().st_size)
+            self.assertTrue(np.array_equal(self.mask, read_packed_mask(packed_mask_path).unpack()))
+
+            # Packed mask files can be used directly as mask files too
+            self.assertTrue(np.array_equal(self.mask, MaskCache(Path(folder) / "packed").load(packed_mask_path)))
+
+    def test_cache_keyed_by_modification_time(self):
+        with tempfile.TemporaryDirectory() as folder:
+            mask_file_path = Path(folder) / "masks" / "area.mask"
+            mask_file_path.parent.mkdir()
+            _write_text_mask(mask_file_path, self.mask)
+            cache = MaskCache(Path(folder) / "packed")
+            self.assertEqual(1, cache.convert_all(Path(folder) / "masks"))
+            self.assertEqual(0, cache.convert_all(Path(folder) / "masks"))
+
+            self.assertTrue(np.array_equal(self.mask, cache.load(mask_file_path)))
+            self.assertTrue(np.array_equal(self.mask, cache.load(mask_file_path)))
+            self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+            _write_text_mask(mask_file_path, ~self.mask)
+            modified = mask_file_path.stat().st_mtime_ns + 1_000_000_000
+            os.utime(mask_file_path, ns=(modified, modified))
+            self.assertTrue(np.array_equal(~self.mask, cache.load(mask_file_path)))
+            self.assertEqual(2, cache.misses)
+
+    def test_earlier_conversions_removed(self):
+        with tempfile.TemporaryDirectory() as folder:
+            mask_file_path = Path(folder) / "masks" / "area.mask"
+            other_mask_file_path = Path(folder) / "other" / "area.mask"
+            for path in [mask_file_path, other_mask_file_path]:
+                path.parent.mkdir()
+                _write_text_mask(path, self.mask)
+            cache = MaskCache(Path(folder) / "packed")
+            cache.load(mask_file_path)
+            cache.load(other_mask_file_path)
+
+            _write_text_mask(mask_file_path, ~self.mask)
+            modified = mask_file_path.stat().st_mtime_ns + 1_000_000_000
+            os.utime(mask_file_path, ns=(modified, modified))
+            self.assertTrue(np.array_equal(~self.mask, cache.load(mask_file_path)))
+            self.assertTrue(np.array_equal(self.mask, cache.load(other_mask_file_path)))
+
+            packed_paths = sorted((Path(folder) / "packed").iterdir())
+            self.assertEqual(
+                sorted([
+                    cache.packed_mask_path(mask_file_path, modified),
+                    cache.packed_mask_path(other_mask_file_path, other_mask_file_path.stat().st_mtime_ns),
+                ]),
+                packed_paths,
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,7 @@ from List.inventory import storyunlock, misc, proof, form, magic
 from List.inventory.item import InventoryItem
 from List.location import landofdragons as lod, twilighttown as tt, hundredacrewood as haw, worldthatneverwas, \
     hollowbastion, agrabah as ag, disneycastle
+from List.location.graph import ItemInventory
 from Module.newRandomize import RandomizerSettings
 from Module.seedEvaluation import LocationInformedSeedValidator
 
@@ -229,6 +230,43 @@ class Tests(unittest.TestCase):
             haw.NodeId.StarryHill
         ])
 
+    def test_item_inventory_tracks_collected_items(self):
+        """ Verifies results computed against an ItemInventory are refreshed as items are collected into it. """
+        inventory = ItemInventory()
+        page_nodes = [haw.NodeId.PigletsHowse, haw.NodeId.RabbitsHowse, haw.NodeId.KangasHowse]
+        for collected, node_id in enumerate(page_nodes, start=1):
+            for location in self.locations.locations_for_node(node_id):
+                self.assertFalse(self.validator.is_location_available(inventory, location))
+            inventory.append(misc.TornPages.id)
+            self.assertEqual(collected, inventory.count(misc.TornPages.id))
+            for location in self.locations.locations_for_node(node_id):
+                self.assertTrue(self.validator.is_location_available(inventory, location))
+
+    def test_item_inventory_records_requirement_items(self):
+        """ Verifies checking a location records the items its requirements looked at, including cached results. """
+        inventory = ItemInventory()
+        for _ in range(2):
+            inventory.accessed_ids = set()
+            for location in self.locations.locations_for_node(haw.NodeId.SpookyCave):
+                self.assertFalse(self.validator.is_location_available(inventory, location))
+            self.assertIn(misc.TornPages.id, inventory.accessed_ids)
+            self.assertNotIn(proof.ProofOfPeace.id, inventory.accessed_ids)
+        inventory.accessed_ids = None
+
+    def test_item_inventory_matches_list_inventory(self):
+        """ Verifies every location gives the same result whether the inventory is a list or an ItemInventory. """
+        self._collect_ten_non_twtnw_unlocks()
+        self._collect(storyunlock.WayToTheDawn)
+        self._collect(misc.TornPages)
+        self._collect(form.ValorForm)
+        item_inventory = ItemInventory(self.inventory)
+        for location in self.locations.all_locations():
+            self.assertEqual(
+                self.validator.is_location_available(list(self.inventory), location),
+                self.validator.is_location_available(item_inventory, location),
+                msg=location.name()
+            )
+
     def _collect(self, item: InventoryItem):
         self.inventory.append(item.id)
 
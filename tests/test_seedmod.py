@@ -0,0 +1,133 @@
+import io
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+import yaml
+
+from Class.exceptions import GeneratorException, ZipOutputException
+from Class.openkhmod import ModZipFile
+from Module.resources import resource_path
+from Module.seedmod import SeedModBuilder
+from Module.zipper import _zip_output_file
+
+
+class _UnseekableStream(io.RawIOBase):
+    """Collects what's written to it, but can't seek or be read, like a pipe or a socket."""
+
+    def __init__(self):
+        self.written = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.written += data
+        return len(data)
+
+
+class Tests(unittest.TestCase):
+
+    def test_member_compression_by_extension(self):
+        with ModZipFile(io.BytesIO(), "w") as out_zip:
+            out_zip.writestr("icon.png", b"png" * 100)
+            out_zip.writestr("files/texture.DDS", b"dds" * 100)
+            out_zip.writestr("mod.yml", b"yml" * 100)
+            out_zip.writestr("sound.scd", b"scd" * 100, compress_type=zipfile.ZIP_DEFLATED)
+            out_zip.write(resource_path("Module/icon.png"), "other-icon.png")
+
+            self.assertEqual(zipfile.ZIP_STORED, out_zip.getinfo("icon.png").compress_type)
+            self.assertEqual(zipfile.ZIP_STORED, out_zip.getinfo("files/texture.DDS").compress_type)
+            self.assertEqual(zipfile.ZIP_DEFLATED, out_zip.getinfo("mod.yml").compress_type)
+            self.assertEqual(zipfile.ZIP_DEFLATED, out_zip.getinfo("sound.scd").compress_type)
+            self.assertEqual(zipfile.ZIP_STORED, out_zip.getinfo("other-icon.png").compress_type)
+
+    def test_cmd_listpatches_merged_in_open_zip(self):
+        zip_data = io.BytesIO()
+        self._write_merged_cmd_listpatches(zip_data)
+        self._assert_merged_cmd_listpatches(zip_data)
+
+    def test_cmd_listpatches_merged_into_unseekable_stream(self):
+        stream = _UnseekableStream()
+        self._write_merged_cmd_listpatches(stream)
+        self._assert_merged_cmd_listpatches(io.BytesIO(stream.written))
+
+    def test_failed_output_is_rewound(self):
+        output = io.BytesIO(b"header")
+        output.seek(0, io.SEEK_END)
+        with self.assertRaises(GeneratorException):
+            with _zip_output_file(output) as output_file, ModZipFile(output_file, "w") as out_zip:
+                out_zip.writestr("mod.yml", "title: Test")
+                raise GeneratorException("Failed partway through")
+        self.assertEqual(b"header", output.getvalue())
+
+        with self.assertRaises(ZipOutputException):
+            with _zip_output_file(_UnseekableStream()) as output_file, ModZipFile(output_file, "w") as out_zip:
+                out_zip.writestr("mod.yml", "title: Test")
+                raise GeneratorException("Failed partway through")
+
+    def test_failed_output_file_removed_only_if_created(self):
+        with tempfile.TemporaryDirectory() as folder:
+            output_path = Path(folder) / "seed.zip"
+            with self.assertRaises(GeneratorException):
+                with _zip_output_file(output_path) as output_file:
+                    output_file.write(b"partial")
+                    raise GeneratorException("Failed partway through")
+            self.assertFalse(output_path.exists())
+
+            output_path.write_bytes(b"earlier seed")
+            with self.assertRaises(GeneratorException):
+                with _zip_output_file(output_path) as output_file:
+                    raise GeneratorException("Failed partway through")
+            self.assertTrue(output_path.exists())
+
+            # A failure to open the file is raised as is, without removing anything
+            with self.assertRaises(FileNotFoundError):
+                with _zip_output_file(Path(folder) / "missing" / "seed.zip"):
+                    pass
+            with mock.patch("builtins.open", side_effect=PermissionError("In use")):
+                with self.assertRaises(PermissionError):
+                    with _zip_output_file(output_path):
+                        pass
+            self.assertTrue(output_path.exists())
+
+    def _write_merged_cmd_listpatches(self, output):
+        with ModZipFile(output, "w") as out_zip:
+            mod = SeedModBuilder("Test Seed", out_zip)
+            mod.add_base_assets()
+            mod.write_cmd_list_modifications("disable_final_form.yml")
+
+            # A listpatch written straight into the zip, the way khbr adds its own
+            other_listpatch = [{"Id": 9999, "Execute": 1}]
+            out_zip.writestr("other/cmd.yml", yaml.dump(other_listpatch))
+            mod.mod_yml.add_asset_source(
+                "03system.bin",
+                {"name": "cmd", "type": "list", "method": "listpatch", "source": [{"name": "other/cmd.yml", "type": "cmd"}]},
+            )
+
+            mod.validate_and_write_mod_yml(settings=None)
+
+    def _assert_merged_cmd_listpatches(self, zip_data: io.BytesIO):
+        other_listpatch = [{"Id": 9999, "Execute": 1}]
+        with zipfile.ZipFile(zip_data) as written_zip:
+            names = written_zip.namelist()
+            self.assertEqual(len(names), len(set(names)))
+            self.assertEqual("mod.yml", names[-2])
+
+            merged = yaml.safe_load(written_zip.read("randoseed-mod-files/cmd_list_merged.yml"))
+            with open(resource_path("static/disable_final_form.yml"), encoding="utf-8") as file:
+                self.assertEqual(yaml.safe_load(file) + other_listpatch, merged)
+
+            mod_yml = yaml.safe_load(written_zip.read("mod.yml"))
+            cmd_sources = [
+                source["source"][0]["name"]
+                for asset in mod_yml["assets"] if asset["name"] == "03system.bin"
+                for source in asset["source"] if source["name"] == "cmd"
+            ]
+            self.assertEqual(["randoseed-mod-files/cmd_list_merged.yml"], cmd_sources)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import yaml
+
+from Module import staticdata
+from Module.resources import resource_path
+
+
+class Tests(unittest.TestCase):
+
+    def test_static_data_is_shared_and_read_only(self):
+        stats = staticdata.static_data("static/stats.yml")
+        self.assertIs(stats, staticdata.static_data("static/stats.yml"))
+
+        with open(resource_path("static/stats.yml"), "r") as file:
+            self.assertEqual(yaml.safe_load(file), [dict(entry) for entry in stats])
+        with self.assertRaises(TypeError):
+            stats[0]["Attack"] = 100
+        with self.assertRaises(AttributeError):
+            stats.append({})
+
+    def test_sidecar_is_keyed_by_contents(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source_path = Path(temp_dir) / "data.yml"
+            sidecar_folder = Path(temp_dir) / "sidecars"
+            source_path.write_text("- Id: 1\n  Values: [1, 2]\n")
+
+            self.assertEqual([{"Id": 1, "Values": [1, 2]}], staticdata._load(source_path, sidecar_folder))
+            sidecars = list(sidecar_folder.glob("data.yml.*.pickle"))
+            self.assertEqual(1, len(sidecars))
+            # Loaded from the sidecar while the contents are unchanged
+            self.assertEqual([{"Id": 1, "Values": [1, 2]}], staticdata._load(source_path, sidecar_folder))
+
+            source_path.write_text("- Id: 2\n")
+            self.assertEqual([{"Id": 2}], staticdata._load(source_path, sidecar_folder))
+            new_sidecars = list(sidecar_folder.glob("data.yml.*.pickle"))
+            self.assertEqual(1, len(new_sidecars))
+            self.assertNotEqual(sidecars, new_sidecars)
+
+
+if __name__ == '__main__':
+    unittest.main()
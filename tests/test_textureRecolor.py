@@ -0,0 +1,139 @@
+import colorsys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from Class.exceptions import CancelledException
+from Module.cancellation import CancellationToken
+from Module.cosmeticsmods.image import rgb_to_hsv, hsv_to_rgb
+from Module.cosmeticsmods.texture import make_matching_conditions, recolor_image, RecolorDefinition, RecolorJob, \
+    RecolorJobScheduler, PendingRecolor, TextureConditionsLoader
+
+
+def _recolor_pixel_by_pixel(rgb_array, recolor_definitions: list[RecolorDefinition], group_index: int):
+    hsv_array = rgb_to_hsv(rgb_array)
+    original = hsv_array.copy()
+    x_dimension, y_dimension, _ = hsv_array.shape
+    for x in range(x_dimension):
+        for y in range(y_dimension):
+            hue, saturation, value, alpha = original[x, y]
+            for recolor_definition in recolor_definitions:
+                if recolor_definition.conditions.matches(x, y, group_index, hue, saturation, value, alpha):
+                    hsv_array[x, y, 0] = recolor_definition.new_hue
+                    if recolor_definition.new_saturation is not None:
+                        hsv_array[x, y, 1] = recolor_definition.new_saturation
+                    hsv_array[x, y, 2] += recolor_definition.value_offset
+                    break
+    return hsv_to_rgb(hsv_array)
+
+
+class Tests(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(21)
+        self.image = rng.integers(0, 256, (24, 31, 4), dtype=np.uint8)
+        self.image[:4, :4, :3] = 128
+        self.masks = [rng.random((26, 33)) > 0.5, None]
+
+    def _assert_same_as_pixel_by_pixel(self, recolor_definitions: list[RecolorDefinition]):
+        for group_index in [0, 1, 2]:
+            self.assertTrue(np.array_equal(
+                _recolor_pixel_by_pixel(self.image, recolor_definitions, group_index),
+                recolor_image(self.image, recolor_definitions, group_index),
+            ))
+
+    def test_overlapping_color_ranges(self):
+        self._assert_same_as_pixel_by_pixel([
+            RecolorDefinition(make_matching_conditions([], (330, 30), (20, 100), None), 200),
+            RecolorDefinition(make_matching_conditions([], (0, 180), None, (10, 90)), 90, 60, 10),
+            RecolorDefinition(make_matching_conditions([], None, (0, 50), None), 300, None, -40),
+        ])
+
+    def test_masks_take_precedence_over_color_ranges(self):
+        self._assert_same_as_pixel_by_pixel([
+            RecolorDefinition(make_matching_conditions(self.masks, (60, 120), None, None), 30, 80, 20),
+            RecolorDefinition(make_matching_conditions(self.masks, None, None, None), 240),
+            RecolorDefinition(make_matching_conditions([], (200, 100), None, None), 150, None, 50),
+        ])
+
+    def test_no_matches_round_trips(self):
+        never_matches = make_matching_conditions([], (10, 11), (99, 100), (0, 1))
+        self.assertTrue(np.array_equal(
+            hsv_to_rgb(rgb_to_hsv(self.image)),
+            recolor_image(self.image, [RecolorDefinition(never_matches, 120)], group_index=0),
+        ))
+
+    def test_conversions_same_as_colorsys(self):
+        hsv = rgb_to_hsv(self.image)
+        # Hues and saturations like the ones recolors set, and values pushed out of range by value offsets
+        shifted = hsv.copy()
+        shifted[4:8, :, 0] = np.arange(31) * 12 / 360.0
+        shifted[8:12, :, 1] = 0.0
+        shifted[12:16, :, 2] += 100
+        rgb = hsv_to_rgb(shifted)
+        for index in np.ndindex(self.image.shape[:2]):
+            r, g, b, alpha = (float(component) for component in self.image[index])
+            self.assertEqual(colorsys.rgb_to_hsv(r, g, b), tuple(hsv[index][:3]))
+            expected = [int(component) for component in colorsys.hsv_to_rgb(*shifted[index][:3])]
+            if max(expected) <= 255:
+                self.assertEqual(expected + [alpha], list(rgb[index]))
+
+    def _recolor_jobs(self, folder: Path) -> list[RecolorJob]:
+        source_path = folder / "source.png"
+        Image.fromarray(self.image, "RGBA").save(source_path)
+        pending_recolors = [
+            PendingRecolor("model", "reds", {"hue_start": 330, "hue_end": 30}, new_hue=200, value_offset=10),
+            PendingRecolor("model", "dark", {"value_start": 0, "value_end": 40}, new_hue=90, new_saturation=60),
+        ]
+        return [
+            RecolorJob(source_path, pending_recolors, group_index, folder / "recolors" / f"recolor-{group_index}.png")
+            for group_index in range(3)
+        ]
+
+    def test_recolor_jobs_same_with_worker_processes(self):
+        with tempfile.TemporaryDirectory() as serial_folder, tempfile.TemporaryDirectory() as pooled_folder:
+            serial_jobs = self._recolor_jobs(Path(serial_folder))
+            progress: list[tuple[int, int]] = []
+            serial_paths = RecolorJobScheduler(
+                TextureConditionsLoader(), max_workers=1, progress=lambda *args: progress.append(args)
+            ).run(serial_jobs)
+            self.assertEqual([job.destination_path for job in serial_jobs], serial_paths)
+            self.assertEqual([(1, 3), (2, 3), (3, 3)], progress)
+
+            definitions = serial_jobs[0].recolor_definitions(TextureConditionsLoader())
+            self.assertTrue(np.array_equal(
+                recolor_image(self.image, definitions, group_index=0),
+                np.array(Image.open(serial_paths[0])),
+            ))
+
+            pooled_jobs = self._recolor_jobs(Path(pooled_folder))
+            pooled_paths = RecolorJobScheduler(TextureConditionsLoader(), max_workers=2).run(pooled_jobs)
+            self.assertEqual([job.destination_path for job in pooled_jobs], pooled_paths)
+            for serial_path, pooled_path in zip(serial_paths, pooled_paths):
+                self.assertEqual(serial_path.read_bytes(), pooled_path.read_bytes())
+            self.assertEqual(
+                sorted(path.name for path in pooled_paths), sorted(path.name for path in pooled_paths[0].parent.iterdir())
+            )
+
+    def test_cancelled_recolor_jobs(self):
+        with tempfile.TemporaryDirectory() as folder:
+            jobs = self._recolor_jobs(Path(folder))
+            cancellation = CancellationToken()
+
+            def cancel_after_first(finished: int, total: int):
+                cancellation.cancel()
+
+            scheduler = RecolorJobScheduler(
+                TextureConditionsLoader(), max_workers=1, cancellation=cancellation, progress=cancel_after_first
+            )
+            with self.assertRaises(CancelledException):
+                scheduler.run(jobs)
+            self.assertTrue(jobs[0].destination_path.is_file())
+            self.assertFalse(jobs[1].destination_path.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
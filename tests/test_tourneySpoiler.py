@@ -0,0 +1,102 @@
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from Class.exceptions import SettingsException
+from Module.spoilerLog import SPOILER_SECTION_PLACEHOLDERS, SpoilerLog
+from Module.tourneySpoiler import TourneySeedSaver
+
+_SETTINGS = SimpleNamespace(
+    seedHashIcons=["form", "magic", "party", "rank-a", "gumi-ship", "weapon-keyblade", "weapon-shield"]
+)
+
+
+def _spoiler_log(seed_name: str) -> SpoilerLog:
+    data = {name: {} for name in SPOILER_SECTION_PLACEHOLDERS}
+    data.update(seed_name=seed_name, seed_string="", platform="PC")
+    return SpoilerLog.from_data(data)
+
+
+class Tests(unittest.TestCase):
+
+    def test_stopped_batch_resumed(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            tourney_path = Path(temp_dir)
+            saver = TourneySeedSaver(tourney_path, "Test Tourney")
+            saver.add_seed("share1", _SETTINGS, _spoiler_log("one"))
+            saver.add_seed("share2", _SETTINGS, _spoiler_log("two"))
+            saver.save()
+            # A seed that was partway through being written when generation stopped
+            (tourney_path / ".seed3.tmp").mkdir()
+            (tourney_path / ".seed3.tmp" / "hash.png").write_bytes(b"")
+
+            resumed = TourneySeedSaver(tourney_path, "Test Tourney", resume=True)
+            self.assertEqual(["share1", "share2"], resumed.seed_strings)
+            resumed.add_seed("share3", _SETTINGS, _spoiler_log("three"))
+            resumed.save()
+
+            self.assertEqual(["seed1", "seed2", "seed3"], resumed.seed_names)
+            self.assertFalse((tourney_path / ".seed3.tmp").exists())
+            self.assertEqual("share3", (tourney_path / "seed3" / "seed-string.txt").read_text())
+            index = (tourney_path / "Test Tourney.html").read_text()
+            for seed_string in ["share1", "share2", "share3"]:
+                self.assertIn(seed_string, index)
+            self.assertTrue((tourney_path / "misc" / "KHMenu.otf").exists())
+
+    def test_failed_write_raised_and_not_listed(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            tourney_path = Path(temp_dir)
+            to_html = SpoilerLog.to_html
+
+            def fail_second_seed(spoilers: SpoilerLog) -> str:
+                if spoilers.sections["seed_name"] == '"two"':
+                    raise OSError("Disk full")
+                return to_html(spoilers)
+
+            saver = TourneySeedSaver(tourney_path, "Test Tourney")
+            with mock.patch.object(SpoilerLog, "to_html", autospec=True, side_effect=fail_second_seed):
+                saver.add_seed("share1", _SETTINGS, _spoiler_log("one"))
+                saver.add_seed("share2", _SETTINGS, _spoiler_log("two"))
+                with self.assertRaises(OSError):
+                    saver.save()
+
+            self.assertTrue((tourney_path / "seed1").is_dir())
+            self.assertFalse((tourney_path / "seed2").exists())
+            self.assertNotIn("share2", (tourney_path / "Test Tourney.html").read_text())
+            self.assertEqual(["share1"], TourneySeedSaver(tourney_path, "Test Tourney", resume=True).seed_strings)
+
+    def test_starting_over_removes_earlier_seeds(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            tourney_path = Path(temp_dir)
+            saver = TourneySeedSaver(tourney_path, "Test Tourney")
+            saver.add_seed("share1", _SETTINGS, _spoiler_log("one"))
+            saver.add_seed("share2", _SETTINGS, _spoiler_log("two"))
+            saver.save()
+
+            restarted = TourneySeedSaver(tourney_path, "Test Tourney")
+            self.assertEqual([], restarted.seed_strings)
+            restarted.add_seed("share3", _SETTINGS, _spoiler_log("three"))
+            restarted.save()
+
+            self.assertEqual("share3", (tourney_path / "seed1" / "seed-string.txt").read_text())
+            self.assertFalse((tourney_path / "seed2").exists())
+            self.assertNotIn("share1", (tourney_path / "Test Tourney.html").read_text())
+
+    def test_resume_refused_with_different_settings(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            tourney_path = Path(temp_dir)
+            saver = TourneySeedSaver(tourney_path, "Test Tourney")
+            saver.add_seed("3.0$1$seedone$0$settingsA", _SETTINGS, _spoiler_log("one"))
+            saver.save()
+
+            resumed = TourneySeedSaver(tourney_path, "Test Tourney", resume=True)
+            resumed.check_settings("3.0$1$seedtwo$0$settingsA")
+            for seed_string in ["3.0$1$seedtwo$0$settingsB", "3.1$1$seedtwo$0$settingsA"]:
+                with self.assertRaises(SettingsException):
+                    resumed.check_settings(seed_string)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import io
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from Class.openkhmod import ModZipFile
+from Module.resources import resource_path
+from Module.zipcache import CompressedFileCache
+
+_SOURCE_FILES = [
+    ("static/KHMenu.otf", "misc/KHMenu.otf"),
+    ("static/disable_final_form.yml", "randoseed-mod-files/disable_final_form.yml"),
+    ("Module/icon.png", "icon.png"),
+]
+
+
+class Tests(unittest.TestCase):
+
+    @staticmethod
+    def _write_zip(file_cache, compresslevel=None) -> bytes:
+        zip_data = io.BytesIO()
+        with ModZipFile(zip_data, "w", compresslevel=compresslevel, file_cache=file_cache) as out_zip:
+            for source, name in _SOURCE_FILES:
+                out_zip.write(resource_path(source), name)
+            out_zip.writestr("mod.yml", "title: Test")
+        return zip_data.getvalue()
+
+    def test_cached_files_are_written_identically(self):
+        file_cache = CompressedFileCache()
+        for compresslevel in [None, 1, 9]:
+            expected = self._write_zip(file_cache=None, compresslevel=compresslevel)
+            self.assertEqual(expected, self._write_zip(file_cache, compresslevel=compresslevel))
+            self.assertEqual(expected, self._write_zip(file_cache, compresslevel=compresslevel))
+        # The stored icon.png is the same whatever the compression level
+        self.assertEqual(7, file_cache.misses)
+        self.assertEqual(11, file_cache.hits)
+
+        with zipfile.ZipFile(io.BytesIO(self._write_zip(file_cache))) as written_zip:
+            self.assertIsNone(written_zip.testzip())
+            with open(resource_path("static/KHMenu.otf"), "rb") as source_file:
+                self.assertEqual(source_file.read(), written_zip.read("misc/KHMenu.otf"))
+
+    def test_changed_file_is_compressed_again(self):
+        file_cache = CompressedFileCache()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source_path = Path(temp_dir) / "script.lua"
+            source_path.write_text("print('one')")
+            first = file_cache.compressed_file(str(source_path), zipfile.ZIP_DEFLATED, None)
+            source_path.write_text("print('two, a bit longer')")
+            second = file_cache.compressed_file(str(source_path), zipfile.ZIP_DEFLATED, None)
+
+        self.assertNotEqual(first.crc, second.crc)
+        self.assertEqual(2, file_cache.misses)
+
+    def test_least_recently_used_files_evicted(self):
+        file_cache = CompressedFileCache(max_bytes=1)
+        path = resource_path("static/disable_final_form.yml")
+        file_cache.compressed_file(path, zipfile.ZIP_DEFLATED, None)
+        file_cache.compressed_file(path, zipfile.ZIP_DEFLATED, None)
+        self.assertEqual(2, file_cache.misses)
+
+
+if __name__ == '__main__':
+    unittest.main()